@@ -0,0 +1,9 @@
+"""
+Benchmarks de la API con catálogos sintéticos.
+
+    python -m benchmarks --tamanos 1k,100k --comparar
+
+Cada escenario se ejecuta contra la aplicación real (rutas, middleware,
+validación y serialización) en el mismo proceso, sin red, sobre un
+repositorio en memoria cargado con el generador.
+"""
@@ -0,0 +1,163 @@
+"""
+Ejecuta los escenarios sobre catálogos sintéticos y compara con la línea base.
+
+    python -m benchmarks                          # 1k y 100k, muestra resultados
+    python -m benchmarks --tamanos 1m             # catálogo de un millón (varios GB de RAM)
+    python -m benchmarks --guardar-linea-base     # reemplaza benchmarks/linea_base.json
+    python -m benchmarks --comparar               # sale con código 1 si hay regresiones
+
+Las mediciones son secuenciales (una solicitud a la vez): miden el costo de
+cada camino, no la concurrencia. La línea base depende de la máquina; hay
+que regenerarla en la misma máquina donde se compara.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.entorno import cliente, instalar_catalogo
+from benchmarks.escenarios import ESCENARIOS
+from benchmarks.generador import TAMANOS
+from benchmarks.resultados import resumir
+
+LINEA_BASE = os.path.join(os.path.dirname(__file__), "linea_base.json")
+
+# Percentiles que se comparan con la línea base (p99 y máximo son demasiado ruidosos)
+COMPARADOS = ("p50", "p90")
+
+
+async def medir_escenario(http, escenario, cantidad: int, solicitudes: int, calentamiento: int,
+                          semilla: int) -> dict:
+    rnd = random.Random(semilla)
+    pedidos = [escenario(rnd, cantidad) for _ in range(calentamiento + solicitudes)]
+    duraciones = []
+    errores = 0
+    inicio_total = 0.0
+    for n, (metodo, ruta, parametros, cuerpo) in enumerate(pedidos):
+        if n == calentamiento:
+            inicio_total = time.perf_counter()
+        inicio = time.perf_counter()
+        respuesta = await http.request(metodo, ruta, params=parametros, json=cuerpo)
+        duracion = time.perf_counter() - inicio
+        if n < calentamiento:
+            continue
+        duraciones.append(duracion)
+        if respuesta.status_code >= 400:
+            errores += 1
+    return resumir(duraciones, time.perf_counter() - inicio_total, errores)
+
+
+async def medir_tamano(nombre: str, escenarios: List[str], solicitudes: int, calentamiento: int,
+                       semilla: int, con_cache: bool) -> Dict[str, dict]:
+    cantidad = TAMANOS[nombre]
+    inicio = time.perf_counter()
+    instalar_catalogo(cantidad, semilla, con_cache)
+    print(f"\n== {nombre}: {cantidad} propiedades (carga {time.perf_counter() - inicio:.1f} s)")
+    # El catálogo queda vivo todo el proceso: sacarlo del GC evita pausas que no son de la API
+    gc.collect()
+    gc.freeze()
+
+    resultados = {}
+    async with cliente() as http:
+        for escenario in escenarios:
+            resultado = await medir_escenario(http, ESCENARIOS[escenario], cantidad, solicitudes,
+                                              calentamiento, semilla)
+            resultados[escenario] = resultado
+            print(f"  {escenario:<13} {resultado['por_segundo']:>9.1f} sol/s   "
+                  f"p50 {resultado['p50']:>8.3f}  p90 {resultado['p90']:>8.3f}  "
+                  f"p99 {resultado['p99']:>8.3f}  max {resultado['max']:>8.3f} ms"
+                  + (f"   {resultado['errores']} errores" if resultado["errores"] else ""))
+    gc.unfreeze()
+    return resultados
+
+
+def comparar(actual: Dict[str, Dict[str, dict]], base: Dict[str, Dict[str, dict]], tolerancia: float) -> List[str]:
+    regresiones = []
+    for tamano, escenarios in actual.items():
+        for escenario, resultado in escenarios.items():
+            referencia = base.get(tamano, {}).get(escenario)
+            if referencia is None:
+                continue
+            for medida in COMPARADOS:
+                if resultado[medida] > referencia[medida] * (1 + tolerancia):
+                    regresiones.append(
+                        f"{tamano}/{escenario} {medida}: {resultado[medida]:.3f} ms "
+                        f"(línea base {referencia[medida]:.3f} ms, "
+                        f"+{(resultado[medida] / referencia[medida] - 1) * 100:.0f}%)"
+                    )
+            if resultado["errores"] > referencia["errores"]:
+                regresiones.append(f"{tamano}/{escenario}: {resultado['errores']} errores "
+                                   f"(línea base {referencia['errores']})")
+    return regresiones
+
+
+def main(argumentos: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks de la API de InmoMax")
+    parser.add_argument("--tamanos", default="1k,100k", help=f"Catálogos a medir: {', '.join(TAMANOS)}")
+    parser.add_argument("--escenarios", default=",".join(ESCENARIOS), help="Escenarios separados por coma")
+    parser.add_argument("--solicitudes", type=int, default=300, help="Solicitudes medidas por escenario")
+    parser.add_argument("--calentamiento", type=int, default=30, help="Solicitudes previas sin medir")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--con-cache", action="store_true", help="Deja activo el cache de listados")
+    parser.add_argument("--guardar-linea-base", action="store_true", help="Guarda los resultados como línea base")
+    parser.add_argument("--comparar", action="store_true", help="Compara con la línea base y falla si empeora")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Empeoramiento admitido (0.25 = 25%%)")
+    parser.add_argument("--linea-base", default=LINEA_BASE, help="Archivo de la línea base")
+    opciones = parser.parse_args(argumentos)
+
+    tamanos = [t.strip().lower() for t in opciones.tamanos.split(",") if t.strip()]
+    escenarios = [e.strip() for e in opciones.escenarios.split(",") if e.strip()]
+    desconocidos = [t for t in tamanos if t not in TAMANOS] + [e for e in escenarios if e not in ESCENARIOS]
+    if desconocidos:
+        parser.error(f"Desconocidos: {', '.join(desconocidos)}")
+
+    resultados = {}
+    for tamano in tamanos:
+        resultados[tamano] = asyncio.run(medir_tamano(
+            tamano, escenarios, opciones.solicitudes, opciones.calentamiento, opciones.semilla, opciones.con_cache
+        ))
+
+    if opciones.guardar_linea_base:
+        anterior = {}
+        if os.path.exists(opciones.linea_base):
+            with open(opciones.linea_base, encoding="utf-8") as archivo:
+                anterior = json.load(archivo).get("resultados", {})
+        with open(opciones.linea_base, "w", encoding="utf-8") as archivo:
+            json.dump({
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "plataforma": platform.platform(),
+                "procesador": platform.processor() or platform.machine(),
+                "solicitudes": opciones.solicitudes,
+                "con_cache": opciones.con_cache,
+                # Los tamaños no medidos esta vez conservan su línea base
+                "resultados": {**anterior, **resultados},
+            }, archivo, indent=2, ensure_ascii=False)
+            archivo.write("\n")
+        print(f"\nLínea base guardada en {opciones.linea_base}")
+
+    if opciones.comparar:
+        if not os.path.exists(opciones.linea_base):
+            print(f"\nNo hay línea base en {opciones.linea_base}")
+            return 1
+        with open(opciones.linea_base, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(resultados, base["resultados"], opciones.tolerancia)
+        if regresiones:
+            print(f"\nRegresiones (tolerancia {opciones.tolerancia:.0%}):")
+            for regresion in regresiones:
+                print(f"  {regresion}")
+            return 1
+        print(f"\nSin regresiones respecto de la línea base del {base['fecha']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,279 @@
+"""
+Prueba de carga con una mezcla de operaciones como la de producción.
+
+    python -m benchmarks.carga --tamano 100k --concurrencias 1,4,16,64 --duracion 10
+    python -m benchmarks.carga --url http://127.0.0.1:8000 --concurrencias 8,32
+
+Cada usuario virtual repite operaciones elegidas por peso, sin pausa entre
+una y otra (lazo cerrado): navegar el listado con filtros, abrir una ficha
+con sus similares, escribir al chatbot o, como agente, publicar, editar o
+dar de baja una propiedad. La concurrencia sube por escalones; en cada uno
+se informan throughput, percentiles y errores por operación, y el retraso
+del event loop. El punto de saturación es el último escalón en que el
+throughput todavía crece.
+
+Sin --url la app corre en este mismo proceso (ASGI, sin red) sobre un
+catálogo sintético, y el retraso del loop es el de la propia API: muestra
+los bloqueos que sufren todas las solicitudes en curso. Con --url se apunta
+a un servidor ya levantado (por ejemplo `python -m benchmarks.servidor`).
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+import random
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+import httpx
+
+from benchmarks.escenarios import MENSAJES_CHATBOT, listado
+from benchmarks.generador import TAMANOS, generar_propiedades
+from benchmarks.resultados import percentil, resumir
+
+MEZCLA = {"navegar": 60, "ficha": 25, "chatbot": 10, "escritura": 5}
+
+# Escalones por debajo de este crecimiento de throughput se consideran saturados
+CRECIMIENTO_MINIMO = 0.10
+# Tasa de errores a partir de la cual un escalón ya no cuenta como sostenible
+ERRORES_MAXIMOS = 0.01
+
+INTERVALO_LOOP = 0.01
+
+
+class EstadoCarga:
+    """Lo que comparten los usuarios virtuales: ids existentes y propiedades creadas"""
+
+    def __init__(self, cantidad: int, semilla: int):
+        self.cantidad = cantidad
+        self.creadas: List[int] = []
+        # Las altas y ediciones usan propiedades sintéticas distintas de las del catálogo
+        self._nuevas = generar_propiedades(sys.maxsize, semilla + 1000)
+
+    def nueva(self) -> dict:
+        return jsonable_encoder(next(self._nuevas))
+
+
+class Registro:
+    def __init__(self):
+        self.duraciones: Dict[str, List[float]] = defaultdict(list)
+        self.errores: Dict[str, int] = defaultdict(int)
+        self.solicitudes = 0
+
+    def anotar(self, operacion: str, duracion: float, correcta: bool):
+        self.duraciones[operacion].append(duracion)
+        if not correcta:
+            self.errores[operacion] += 1
+
+
+async def _pedir(http: httpx.AsyncClient, registro: Registro, metodo: str, ruta: str,
+                 params: Optional[dict] = None, json: Optional[dict] = None) -> Optional[httpx.Response]:
+    registro.solicitudes += 1
+    respuesta = await http.request(metodo, ruta, params=params, json=json)
+    return respuesta if respuesta.status_code < 400 else None
+
+
+async def navegar(http, rnd: random.Random, estado: EstadoCarga, registro: Registro) -> bool:
+    _, ruta, parametros, _ = listado(rnd, estado.cantidad)
+    return await _pedir(http, registro, "GET", ruta, parametros) is not None
+
+
+async def ficha(http, rnd: random.Random, estado: EstadoCarga, registro: Registro) -> bool:
+    propiedad_id = rnd.randint(1, estado.cantidad)
+    if await _pedir(http, registro, "GET", f"/api/propiedades/{propiedad_id}") is None:
+        return False
+    return await _pedir(http, registro, "GET", f"/api/propiedades/{propiedad_id}/similares",
+                        {"limite": 4}) is not None
+
+
+async def chatbot(http, rnd: random.Random, estado: EstadoCarga, registro: Registro) -> bool:
+    return await _pedir(http, registro, "POST", "/api/chatbot/mensaje",
+                        json={"mensaje": rnd.choice(MENSAJES_CHATBOT)}) is not None
+
+
+async def escritura(http, rnd: random.Random, estado: EstadoCarga, registro: Registro) -> bool:
+    """Altas, ediciones de cualquier propiedad y bajas sólo de las creadas en la prueba"""
+    eleccion = rnd.random()
+    if eleccion < 0.6 or not estado.creadas:
+        respuesta = await _pedir(http, registro, "POST", "/api/propiedades/", json=estado.nueva())
+        if respuesta is None:
+            return False
+        estado.creadas.append(respuesta.json()["id"])
+        return True
+    if eleccion < 0.9:
+        propiedad_id = rnd.randint(1, estado.cantidad)
+        return await _pedir(http, registro, "PUT", f"/api/propiedades/{propiedad_id}",
+                            json=estado.nueva()) is not None
+    propiedad_id = estado.creadas.pop(rnd.randrange(len(estado.creadas)))
+    return await _pedir(http, registro, "DELETE", f"/api/propiedades/{propiedad_id}") is not None
+
+
+OPERACIONES: Dict[str, Callable[..., Awaitable[bool]]] = {
+    "navegar": navegar,
+    "ficha": ficha,
+    "chatbot": chatbot,
+    "escritura": escritura,
+}
+
+
+async def _usuario(http, rnd: random.Random, mezcla: Dict[str, int], estado: EstadoCarga,
+                   registro: Registro, fin: float):
+    operaciones = list(mezcla)
+    pesos = list(mezcla.values())
+    while time.perf_counter() < fin:
+        operacion = rnd.choices(operaciones, weights=pesos)[0]
+        inicio = time.perf_counter()
+        try:
+            correcta = await OPERACIONES[operacion](http, rnd, estado, registro)
+        except (httpx.HTTPError, ValueError, KeyError):
+            correcta = False
+        registro.anotar(operacion, time.perf_counter() - inicio, correcta)
+
+
+async def _vigilar_loop(retrasos: List[float]):
+    """Cuánto tarda en despertar un sleep corto: lo que el loop estuvo ocupado sin ceder"""
+    while True:
+        inicio = time.perf_counter()
+        await asyncio.sleep(INTERVALO_LOOP)
+        retrasos.append(time.perf_counter() - inicio - INTERVALO_LOOP)
+
+
+async def escalon(http, concurrencia: int, duracion: float, mezcla: Dict[str, int],
+                  estado: EstadoCarga, semilla: int) -> dict:
+    registro = Registro()
+    retrasos: List[float] = []
+    vigia = asyncio.create_task(_vigilar_loop(retrasos))
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    await asyncio.gather(*(
+        _usuario(http, random.Random(semilla * 1000 + n), mezcla, estado, registro, fin)
+        for n in range(concurrencia)
+    ))
+    total = time.perf_counter() - inicio
+    vigia.cancel()
+
+    todas = [d for duraciones in registro.duraciones.values() for d in duraciones]
+    errores = sum(registro.errores.values())
+    ordenados = sorted(retrasos)
+    return {
+        "concurrencia": concurrencia,
+        "total": resumir(todas, total, errores),
+        "solicitudes_por_segundo": round(registro.solicitudes / total, 1),
+        "operaciones": {
+            operacion: resumir(duraciones, total, registro.errores[operacion])
+            for operacion, duraciones in sorted(registro.duraciones.items())
+        },
+        "loop_p99": round(percentil(ordenados, 0.99) * 1000, 3),
+        "loop_max": round(ordenados[-1] * 1000, 3) if ordenados else 0.0,
+    }
+
+
+def punto_de_saturacion(escalones: List[dict]) -> Optional[dict]:
+    """
+    Último escalón sostenible: con errores bajo el máximo y cuyo throughput
+    todavía creció respecto del anterior
+    """
+    saturacion = None
+    for resultado in escalones:
+        total = resultado["total"]
+        if total["solicitudes"] and total["errores"] / total["solicitudes"] > ERRORES_MAXIMOS:
+            break
+        if saturacion is not None and \
+                total["por_segundo"] < saturacion["total"]["por_segundo"] * (1 + CRECIMIENTO_MINIMO):
+            break
+        saturacion = resultado
+    return saturacion
+
+
+def _imprimir(resultado: dict):
+    total = resultado["total"]
+    tasa = total["errores"] / total["solicitudes"] * 100 if total["solicitudes"] else 0.0
+    print(f"\n-- concurrencia {resultado['concurrencia']}: {total['por_segundo']:.1f} op/s "
+          f"({resultado['solicitudes_por_segundo']:.1f} sol/s), errores {tasa:.2f}%, "
+          f"retraso del loop p99 {resultado['loop_p99']:.1f} ms / máx {resultado['loop_max']:.1f} ms")
+    for operacion, datos in resultado["operaciones"].items():
+        print(f"   {operacion:<10} {datos['solicitudes']:>7} op  p50 {datos['p50']:>8.2f}  "
+              f"p90 {datos['p90']:>8.2f}  p99 {datos['p99']:>8.2f}  max {datos['max']:>8.2f} ms"
+              + (f"  {datos['errores']} errores" if datos["errores"] else ""))
+
+
+async def ejecutar(opciones) -> List[dict]:
+    mezcla = {nombre: peso for nombre, peso in opciones.mezcla.items() if peso > 0}
+    concurrencias = opciones.concurrencias
+
+    if opciones.url:
+        limites = httpx.Limits(max_connections=max(concurrencias), max_keepalive_connections=max(concurrencias))
+        http = httpx.AsyncClient(base_url=opciones.url, limits=limites, timeout=opciones.timeout)
+        cantidad = None
+        servicios = None
+    else:
+        # Imports diferidos: en modo remoto no hace falta cargar la app
+        from benchmarks.entorno import cliente, instalar_catalogo
+        import main
+        cantidad = TAMANOS[opciones.tamano]
+        inicio = time.perf_counter()
+        instalar_catalogo(cantidad, opciones.semilla, con_cache=not opciones.sin_cache)
+        print(f"Catálogo de {cantidad} propiedades cargado en {time.perf_counter() - inicio:.1f} s")
+        http = cliente()
+        servicios = main
+        await servicios.iniciar_servicios()
+
+    escalones = []
+    try:
+        async with http:
+            if cantidad is None:
+                respuesta = await http.get("/api/propiedades/", params={"limite": 1})
+                # Los catálogos sintéticos tienen ids contiguos desde 1
+                cantidad = respuesta.json()["total"]
+            estado = EstadoCarga(cantidad, opciones.semilla)
+            for n, concurrencia in enumerate(concurrencias):
+                resultado = await escalon(http, concurrencia, opciones.duracion, mezcla, estado,
+                                          opciones.semilla + n)
+                escalones.append(resultado)
+                _imprimir(resultado)
+    finally:
+        if servicios is not None:
+            await servicios.detener_servicios()
+    return escalones
+
+
+def _mezcla(texto: str) -> Dict[str, int]:
+    mezcla = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        nombre = nombre.strip()
+        if nombre not in OPERACIONES:
+            raise argparse.ArgumentTypeError(f"Operación desconocida: {nombre}")
+        mezcla[nombre] = int(peso)
+    return mezcla
+
+
+def main(argumentos: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.carga", description="Prueba de carga de la API de InmoMax")
+    parser.add_argument("--url", help="Servidor a probar; sin esto la app corre en este proceso")
+    parser.add_argument("--tamano", default="100k", choices=list(TAMANOS), help="Catálogo sintético (sólo sin --url)")
+    parser.add_argument("--concurrencias", default="1,4,16,64",
+                        type=lambda texto: [int(c) for c in texto.split(",")], help="Usuarios virtuales por escalón")
+    parser.add_argument("--duracion", type=float, default=10.0, help="Segundos por escalón")
+    parser.add_argument("--mezcla", type=_mezcla, default=MEZCLA,
+                        help="Pesos por operación, ej. navegar=60,ficha=25,chatbot=10,escritura=5")
+    parser.add_argument("--sin-cache", action="store_true", help="Desactiva el cache de listados (sólo sin --url)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por solicitud con --url")
+    parser.add_argument("--semilla", type=int, default=42)
+    opciones = parser.parse_args(argumentos)
+
+    escalones = asyncio.run(ejecutar(opciones))
+    saturacion = punto_de_saturacion(escalones)
+    if saturacion is None:
+        print("\nNingún escalón fue sostenible (demasiados errores desde el primero)")
+        return 1
+    print(f"\nPunto de saturación: concurrencia {saturacion['concurrencia']} "
+          f"({saturacion['total']['por_segundo']:.1f} op/s, p99 {saturacion['total']['p99']:.1f} ms)")
+    if saturacion is escalones[-1]:
+        print("El throughput siguió creciendo hasta el último escalón: probar con más concurrencia")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,30 @@
+"""
+Prepara la aplicación con un catálogo sintético en lugar de los datos de ejemplo.
+"""
+import httpx
+
+import main
+from cache_consultas import CacheConsultas, CacheLocal
+from repositorios import RepositorioMemoria
+import routes.chatbot
+import routes.propiedades
+
+from benchmarks.generador import AGENTE, generar_registros
+
+
+def instalar_catalogo(cantidad: int, semilla: int = 42, con_cache: bool = False) -> RepositorioMemoria:
+    """
+    Reemplaza el repositorio y el cache de las rutas. Sin cache (por defecto)
+    cada listado recorre el camino completo de filtrado y serialización.
+    """
+    repositorio = RepositorioMemoria(generar_registros(cantidad, semilla), AGENTE)
+    routes.propiedades.repositorio = repositorio
+    routes.propiedades.cache = CacheConsultas(CacheLocal(max_entradas=1000 if con_cache else 0))
+    routes.chatbot.repositorio = repositorio
+    routes.chatbot.conversaciones.escritor = repositorio.guardar_conversaciones
+    return repositorio
+
+
+def cliente(base_url: str = "http://benchmark") -> httpx.AsyncClient:
+    """Cliente que llama a la app ASGI directamente, sin sockets"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url=base_url)
@@ -0,0 +1,76 @@
+"""
+Solicitudes de cada escenario: cada función recibe el generador aleatorio y
+el tamaño del catálogo y devuelve (método, ruta, parámetros, cuerpo JSON).
+"""
+import random
+from typing import Callable, Dict, Optional, Tuple
+
+from benchmarks.generador import BARRIOS, OPERACIONES, TIPOS
+
+Solicitud = Tuple[str, str, Optional[dict], Optional[dict]]
+
+ORDENES = ["recientes", "recientes", "recientes", "precio-asc", "precio-desc", "metros-desc"]
+
+MENSAJES_CHATBOT = [
+    "Hola, buenas tardes",
+    "Busco un departamento de dos dormitorios en el centro",
+    "¿Cuánto sale alquilar una casa en Fisherton?",
+    "Quiero vender mi casa, ¿cómo es el proceso?",
+    "¿Tienen opciones de financiación o créditos hipotecarios?",
+    "Me gustaría coordinar una visita para el sábado",
+    "¿Qué documentación necesito para alquilar?",
+    "Gracias por la información",
+]
+
+
+def listado(rnd: random.Random, cantidad: int) -> Solicitud:
+    """Navegación con filtros: la mayoría fija tipo y operación, algunos precio y ambientes"""
+    parametros = {"orden": rnd.choice(ORDENES), "pagina": rnd.choice([1, 1, 1, 2, 3]), "limite": 12}
+    if rnd.random() < 0.7:
+        parametros["tipo"] = rnd.choices([t[0] for t in TIPOS], weights=[t[1] for t in TIPOS])[0]
+    if rnd.random() < 0.8:
+        parametros["operacion"] = rnd.choice(list(OPERACIONES["departamento"]))
+    if rnd.random() < 0.3:
+        parametros["habitaciones"] = rnd.randint(1, 3)
+    if rnd.random() < 0.3:
+        parametros["precio_max"] = rnd.choice([200000, 500000, 1000000])
+    return "GET", "/api/propiedades/", parametros, None
+
+
+def buscar(rnd: random.Random, cantidad: int) -> Solicitud:
+    barrio = rnd.choice(BARRIOS)[0]
+    return "GET", "/api/propiedades/buscar", {"q": f"{rnd.choice(TIPOS)[0]} {barrio}"}, None
+
+
+def facetas(rnd: random.Random, cantidad: int) -> Solicitud:
+    parametros = {}
+    if rnd.random() < 0.5:
+        parametros["operacion"] = rnd.choice(["venta", "alquiler"])
+    return "GET", "/api/propiedades/facetas", parametros, None
+
+
+def detalle(rnd: random.Random, cantidad: int) -> Solicitud:
+    return "GET", f"/api/propiedades/{rnd.randint(1, cantidad)}", None, None
+
+
+def similares(rnd: random.Random, cantidad: int) -> Solicitud:
+    return "GET", f"/api/propiedades/{rnd.randint(1, cantidad)}/similares", {"limite": 4}, None
+
+
+def estadisticas(rnd: random.Random, cantidad: int) -> Solicitud:
+    return "GET", "/api/propiedades/estadisticas/generales", None, None
+
+
+def chatbot(rnd: random.Random, cantidad: int) -> Solicitud:
+    return "POST", "/api/chatbot/mensaje", None, {"mensaje": rnd.choice(MENSAJES_CHATBOT)}
+
+
+ESCENARIOS: Dict[str, Callable[[random.Random, int], Solicitud]] = {
+    "listado": listado,
+    "buscar": buscar,
+    "facetas": facetas,
+    "detalle": detalle,
+    "similares": similares,
+    "estadisticas": estadisticas,
+    "chatbot": chatbot,
+}
@@ -0,0 +1,153 @@
+"""
+Generador de catálogos sintéticos para benchmarks.
+
+Produce PropiedadCreate válidos con distribuciones parecidas a las del
+mercado de Rosario: más departamentos que casas, más venta que alquiler,
+superficies y precios log-normales por tipo y operación, y coordenadas
+agrupadas alrededor de los barrios del Gran Rosario. Con la misma semilla
+el catálogo es siempre el mismo.
+"""
+from datetime import datetime, timedelta
+import math
+import random
+from typing import Iterator, List
+
+from models import Agente, PropiedadCreate
+
+# (tipo, peso, mediana de metros, habitaciones mín/máx, baños mín/máx)
+TIPOS = [
+    ("departamento", 45, 55, 0, 3, 1, 2),
+    ("casa", 30, 130, 2, 5, 1, 3),
+    ("local", 8, 80, 0, 0, 1, 2),
+    ("oficina", 7, 60, 0, 2, 1, 2),
+    ("terreno", 6, 400, 0, 0, 0, 0),
+    ("quinta", 4, 220, 2, 5, 2, 4),
+]
+
+# Peso de cada operación por tipo: terrenos y quintas casi sólo se venden
+OPERACIONES = {
+    "departamento": {"venta": 50, "alquiler": 42, "alquiler-temporal": 8},
+    "casa": {"venta": 65, "alquiler": 30, "alquiler-temporal": 5},
+    "local": {"venta": 40, "alquiler": 60, "alquiler-temporal": 0},
+    "oficina": {"venta": 35, "alquiler": 65, "alquiler-temporal": 0},
+    "terreno": {"venta": 97, "alquiler": 3, "alquiler-temporal": 0},
+    "quinta": {"venta": 80, "alquiler": 5, "alquiler-temporal": 15},
+}
+
+# Precio por m² (mediana): venta en dólares, alquileres mensuales en pesos
+PRECIO_M2 = {
+    "venta": 1500.0,
+    "alquiler": 4500.0,
+    "alquiler-temporal": 9000.0,
+}
+FACTOR_PRECIO_TIPO = {
+    "departamento": 1.1, "casa": 1.0, "local": 1.3,
+    "oficina": 1.1, "terreno": 0.25, "quinta": 0.8,
+}
+
+# (barrio, peso, lat, lng, dispersión en grados)
+BARRIOS = [
+    ("Centro", 28, -32.9468, -60.6393, 0.006),
+    ("Pichincha", 10, -32.9400, -60.6500, 0.005),
+    ("Echesortu", 9, -32.9530, -60.6700, 0.007),
+    ("Abasto", 6, -32.9600, -60.6450, 0.005),
+    ("Fisherton", 9, -32.9300, -60.7200, 0.010),
+    ("Alberdi", 7, -32.8950, -60.6800, 0.008),
+    ("República de la Sexta", 6, -32.9590, -60.6300, 0.005),
+    ("Arroyito", 5, -32.9200, -60.6700, 0.007),
+    ("Funes", 10, -32.9150, -60.8100, 0.015),
+    ("Roldán", 5, -32.8980, -60.9050, 0.012),
+    ("Granadero Baigorria", 5, -32.8600, -60.7000, 0.012),
+]
+
+CARACTERISTICAS = [
+    "Cocina integrada", "Balcón", "Parrilla", "Cochera", "Piscina", "Lavadero",
+    "Patio", "Terraza", "Placard empotrado", "Aire acondicionado", "Calefacción central",
+    "Portero 24 horas", "Gimnasio", "Quincho", "Ventanas DVH", "Vista al río",
+    "A estrenar", "Apto crédito", "Jardín", "Seguridad privada",
+]
+SERVICIOS = ["Gas natural", "Agua corriente", "Cloacas", "Electricidad", "Internet fibra óptica", "Cable"]
+ADJETIVOS = ["luminoso", "amplio", "moderno", "reciclado", "céntrico", "tranquilo", "impecable", "con vista"]
+
+ESTADOS = ["disponible"] * 85 + ["reservada"] * 5 + ["vendida"] * 4 + ["alquilada"] * 4 + ["inactiva"] * 2
+
+AGENTE = Agente(
+    id=1,
+    nombre="Agente Benchmark",
+    email="benchmark@inmomax.com",
+    telefono="+54 341 000-0000"
+)
+
+TAMANOS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def _elegir(rnd: random.Random, opciones, pesos):
+    return rnd.choices(opciones, weights=pesos)[0]
+
+
+def generar_propiedades(cantidad: int, semilla: int = 42) -> Iterator[PropiedadCreate]:
+    rnd = random.Random(semilla)
+    tipos = [t[0] for t in TIPOS]
+    pesos_tipo = [t[1] for t in TIPOS]
+    datos_tipo = {t[0]: t[2:] for t in TIPOS}
+    barrios = [b[0] for b in BARRIOS]
+    pesos_barrio = [b[1] for b in BARRIOS]
+    datos_barrio = {b[0]: b[2:] for b in BARRIOS}
+
+    for i in range(cantidad):
+        tipo = _elegir(rnd, tipos, pesos_tipo)
+        metros_mediana, hab_min, hab_max, banos_min, banos_max = datos_tipo[tipo]
+        pesos_operacion = OPERACIONES[tipo]
+        operacion = _elegir(rnd, list(pesos_operacion), list(pesos_operacion.values()))
+        barrio = _elegir(rnd, barrios, pesos_barrio)
+        lat, lng, dispersion = datos_barrio[barrio]
+
+        metros = round(min(9999.0, max(15.0, rnd.lognormvariate(math.log(metros_mediana), 0.4))), 1)
+        precio = round(metros * PRECIO_M2[operacion] * FACTOR_PRECIO_TIPO[tipo] * rnd.lognormvariate(0, 0.3), -2)
+        adjetivo = rnd.choice(ADJETIVOS)
+
+        yield PropiedadCreate(
+            titulo=f"{tipo.capitalize()} {adjetivo} en {barrio}",
+            descripcion=(
+                f"{tipo.capitalize()} {adjetivo} de {metros:.0f} m² en {barrio}, Rosario. "
+                f"Publicación sintética número {i} generada para pruebas de rendimiento."
+            ),
+            precio=max(precio, 100.0),
+            ubicacion=f"{barrio}, Rosario",
+            direccion=f"Calle {rnd.randint(1, 300)} {rnd.randint(100, 9999)}",
+            tipo=tipo,
+            operacion=operacion,
+            habitaciones=rnd.randint(hab_min, hab_max),
+            banos=rnd.randint(banos_min, banos_max),
+            metros=metros,
+            metros_terreno=round(metros * rnd.uniform(1.2, 4.0), 1) if tipo in ("casa", "quinta") else None,
+            antiguedad=rnd.randint(0, 60),
+            expensas=round(rnd.uniform(5000, 60000), -2) if tipo in ("departamento", "oficina") else None,
+            caracteristicas=rnd.sample(CARACTERISTICAS, rnd.randint(2, 6)),
+            servicios=rnd.sample(SERVICIOS, rnd.randint(3, 6)),
+            imagenes=[f"/images/sintetica{i}-{n}.jpg" for n in range(1, rnd.randint(2, 5))],
+            coordenadas={"lat": rnd.gauss(lat, dispersion), "lng": rnd.gauss(lng, dispersion)},
+            agente_id=AGENTE.id
+        )
+
+
+def generar_registros(cantidad: int, semilla: int = 42) -> List[dict]:
+    """
+    Registros con el mismo formato que guarda RepositorioMemoria, listos para
+    cargar el almacén de una vez (en lugar de una alta por propiedad)
+    """
+    rnd = random.Random(semilla + 1)
+    ahora = datetime.now()
+    registros = []
+    for i, propiedad in enumerate(generar_propiedades(cantidad, semilla), start=1):
+        registros.append({
+            "id": i,
+            **propiedad.model_dump(exclude={"agente_id"}),
+            "estado": rnd.choice(ESTADOS),
+            "destacada": rnd.random() < 0.05,
+            # Más antiguas primero: los slots crecen con el id, como en producción
+            "fecha_publicacion": ahora - timedelta(minutes=(cantidad - i) * 5),
+            "agente": AGENTE,
+            "vistas": int(rnd.paretovariate(1.5) * 10)
+        })
+    return registros
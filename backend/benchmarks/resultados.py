@@ -0,0 +1,23 @@
+"""
+Resumen de latencias: throughput y percentiles en milisegundos.
+"""
+from typing import List
+
+
+def percentil(ordenados: List[float], p: float) -> float:
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def resumir(duraciones: List[float], total: float, errores: int) -> dict:
+    ordenados = sorted(duraciones)
+    return {
+        "solicitudes": len(duraciones),
+        "errores": errores,
+        "por_segundo": round(len(duraciones) / total, 1) if total else 0.0,
+        "p50": round(percentil(ordenados, 0.50) * 1000, 3),
+        "p90": round(percentil(ordenados, 0.90) * 1000, 3),
+        "p99": round(percentil(ordenados, 0.99) * 1000, 3),
+        "max": round(ordenados[-1] * 1000, 3) if ordenados else 0.0,
+    }
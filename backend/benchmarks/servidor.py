@@ -0,0 +1,33 @@
+"""
+Levanta la API con uvicorn sobre un catálogo sintético, para probarla por red.
+
+    python -m benchmarks.servidor --tamano 100k --puerto 8000
+"""
+import argparse
+import sys
+from typing import List
+
+import uvicorn
+
+import main as aplicacion
+from benchmarks.entorno import instalar_catalogo
+from benchmarks.generador import TAMANOS
+
+
+def main(argumentos: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.servidor")
+    parser.add_argument("--tamano", default="100k", choices=list(TAMANOS))
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--sin-cache", action="store_true", help="Desactiva el cache de listados")
+    opciones = parser.parse_args(argumentos)
+
+    instalar_catalogo(TAMANOS[opciones.tamano], opciones.semilla, con_cache=not opciones.sin_cache)
+    # Un solo proceso: el catálogo en memoria no se comparte entre workers
+    uvicorn.run(aplicacion.app, host=opciones.host, port=opciones.puerto, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
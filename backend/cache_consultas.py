@@ -0,0 +1,231 @@
+"""
+Cache de resultados del listado de propiedades.
+
+Guarda el JSON ya armado de cada página, indexado por los parámetros de la
+consulta normalizados, en dos niveles: uno local por proceso (LRU con TTL) y,
+si hay REDIS_URL, uno compartido en Redis.
+
+La invalidación es por partición (tipo, operación). Cada consulta depende de
+un contador según los filtros que fija: el de su (tipo, operación), el de su
+tipo, el de su operación o el general. Una escritura incrementa los cuatro
+contadores que cubren la partición de la propiedad antes y después del
+cambio. El valor del contador forma parte de la clave, así que las entradas
+afectadas dejan de encontrarse y las demás siguen sirviendo. Con Redis los
+contadores viven ahí y la invalidación alcanza a todos los procesos.
+"""
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from catalogo.columnas import valor_clave
+
+logger = logging.getLogger(__name__)
+
+TODAS = "*"
+# Parámetros que el filtro compara sin distinguir mayúsculas; el resto (el
+# cursor en base64url, por ejemplo) entra en la clave tal cual
+SIN_MAYUSCULAS = {"ubicacion"}
+Particion = Tuple[str, str]
+
+
+def particion_de(registro: dict) -> Particion:
+    return valor_clave(registro["tipo"]), valor_clave(registro["operacion"])
+
+
+def _normalizar(nombre: str, valor) -> str:
+    valor = valor_clave(valor)
+    if isinstance(valor, str):
+        return valor.lower() if nombre in SIN_MAYUSCULAS else valor
+    if isinstance(valor, float):
+        return repr(valor)
+    return str(valor)
+
+
+class CacheLocal:
+    """LRU en memoria del proceso, con vencimiento por entrada"""
+
+    def __init__(self, max_entradas: int = 1000, ttl: float = 30.0):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._contadores: Dict[str, int] = {}
+
+    def obtener(self, clave: str) -> Optional[bytes]:
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        vence, valor = entrada
+        if vence < time.monotonic():
+            del self._entradas[clave]
+            return None
+        self._entradas.move_to_end(clave)
+        return valor
+
+    def guardar(self, clave: str, valor: bytes):
+        self._entradas[clave] = (time.monotonic() + self.ttl, valor)
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+
+    async def contador(self, nombre: str) -> int:
+        return self._contadores.get(nombre, 0)
+
+    async def incrementar(self, nombre: str):
+        self._contadores[nombre] = self._contadores.get(nombre, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+
+class CacheRedis:
+    """Nivel compartido sobre un cliente redis.asyncio (o RedisEnMemoria)"""
+
+    def __init__(self, cliente, ttl: int = 300, prefijo: str = "inmomax:listado:"):
+        self.cliente = cliente
+        self.ttl = ttl
+        self.prefijo = prefijo
+
+    async def obtener(self, clave: str) -> Optional[bytes]:
+        return await self.cliente.get(self.prefijo + clave)
+
+    async def guardar(self, clave: str, valor: bytes):
+        await self.cliente.set(self.prefijo + clave, valor, ex=self.ttl)
+
+    async def contador(self, nombre: str) -> int:
+        return int(await self.cliente.get(self.prefijo + "gen:" + nombre) or 0)
+
+    async def incrementar(self, nombre: str):
+        await self.cliente.incr(self.prefijo + "gen:" + nombre)
+
+    async def cerrar(self):
+        await self.cliente.aclose()
+
+
+class RedisEnMemoria:
+    """
+    Sustituto en memoria del subconjunto de redis.asyncio que usa el cache
+    (get, set con vencimiento, incr), para pruebas y desarrollo sin Redis
+    """
+
+    def __init__(self):
+        self._datos: Dict[str, Tuple[Optional[float], bytes]] = {}
+
+    async def get(self, clave: str) -> Optional[bytes]:
+        entrada = self._datos.get(clave)
+        if entrada is None:
+            return None
+        vence, valor = entrada
+        if vence is not None and vence < time.monotonic():
+            del self._datos[clave]
+            return None
+        return valor
+
+    async def set(self, clave: str, valor, ex: Optional[int] = None):
+        if isinstance(valor, str):
+            valor = valor.encode("utf-8")
+        self._datos[clave] = (time.monotonic() + ex if ex else None, valor)
+
+    async def incr(self, clave: str) -> int:
+        valor = int(await self.get(clave) or 0) + 1
+        self._datos[clave] = (None, str(valor).encode("utf-8"))
+        return valor
+
+    async def aclose(self):
+        pass
+
+
+class CacheConsultas:
+    def __init__(self, local: CacheLocal, remoto: Optional[CacheRedis] = None):
+        self.local = local
+        self.remoto = remoto
+        # Los contadores de invalidación van en el nivel compartido, si hay
+        self._contadores = remoto or local
+        self.aciertos = 0
+        self.fallos = 0
+
+    async def clave(self, parametros: dict) -> Optional[str]:
+        """
+        Clave de la consulta, o None si no se puede cachear ahora (Redis
+        caído: sin contador no hay forma de saber si una entrada sigue vigente)
+        """
+        tipo = valor_clave(parametros.get("tipo")) or TODAS
+        operacion = valor_clave(parametros.get("operacion")) or TODAS
+        try:
+            generacion = await self._contadores.contador(f"{tipo}:{operacion}")
+        except Exception:
+            logger.warning("Cache de consultas sin contadores; se omite", exc_info=True)
+            return None
+        normalizados = "&".join(
+            f"{nombre}={_normalizar(nombre, valor)}"
+            for nombre, valor in sorted(parametros.items()) if valor is not None
+        )
+        resumen = hashlib.sha1(normalizados.encode("utf-8")).hexdigest()
+        return f"{tipo}:{operacion}:{generacion}:{resumen}"
+
+    async def obtener(self, clave: Optional[str]) -> Optional[bytes]:
+        if clave is None:
+            return None
+        valor = self.local.obtener(clave)
+        if valor is None and self.remoto is not None:
+            try:
+                valor = await self.remoto.obtener(clave)
+            except Exception:
+                logger.warning("No se pudo leer del cache de Redis", exc_info=True)
+            if valor is not None:
+                self.local.guardar(clave, valor)
+        if valor is None:
+            self.fallos += 1
+        else:
+            self.aciertos += 1
+        return valor
+
+    async def guardar(self, clave: Optional[str], valor: bytes):
+        """Si hubo una escritura mientras se calculaba, la clave ya quedó vieja y no se vuelve a leer"""
+        if clave is None:
+            return
+        self.local.guardar(clave, valor)
+        if self.remoto is not None:
+            try:
+                await self.remoto.guardar(clave, valor)
+            except Exception:
+                logger.warning("No se pudo escribir en el cache de Redis", exc_info=True)
+
+    async def invalidar(self, particiones: Iterable[Particion]):
+        """Invalida las consultas que pueden incluir propiedades de estas particiones"""
+        contadores: Set[str] = set()
+        for tipo, operacion in particiones:
+            contadores.update((f"{tipo}:{operacion}", f"{tipo}:{TODAS}", f"{TODAS}:{operacion}", f"{TODAS}:{TODAS}"))
+        for nombre in sorted(contadores):
+            try:
+                await self._contadores.incrementar(nombre)
+            except Exception:
+                # Las entradas afectadas vencerán por TTL
+                logger.exception("No se pudo invalidar el cache de consultas (%s)", nombre)
+
+    async def cerrar(self):
+        if self.remoto is not None:
+            await self.remoto.cerrar()
+
+
+def crear_cache() -> CacheConsultas:
+    """
+    Nivel local siempre; nivel Redis si está REDIS_URL ("memoria://" usa
+    RedisEnMemoria)
+    """
+    local = CacheLocal(
+        max_entradas=int(os.getenv("CACHE_MAX_ENTRADAS", "1000")),
+        ttl=float(os.getenv("CACHE_TTL", "30"))
+    )
+    url = os.getenv("REDIS_URL")
+    if not url:
+        return CacheConsultas(local)
+    if url == "memoria://":
+        cliente = RedisEnMemoria()
+    else:
+        # Import diferido: redis sólo hace falta con el nivel compartido
+        import redis.asyncio
+        cliente = redis.asyncio.from_url(url)
+    return CacheConsultas(local, CacheRedis(cliente, ttl=int(os.getenv("CACHE_TTL_REDIS", "300"))))
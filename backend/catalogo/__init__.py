@@ -0,0 +1,22 @@
+"""
+Motor de catálogo en memoria: índices y estructuras auxiliares para
+resolver las consultas de propiedades sin recorrer todo el listado.
+"""
+from catalogo.almacen import AlmacenPropiedades
+from catalogo.columnas import IndiceColumnar, iterar_bits
+from catalogo.estadisticas import EstadisticasMantenidas
+from catalogo.ordenes import OrdenesMantenidos, clave_orden
+from catalogo.registros import RegistroPropiedad, Vocabulario
+from catalogo.serializacion import (
+    CAMPOS_DISPONIBLES, CAMPOS_RESUMEN, CacheSerializacion, componer_json, json_campos
+)
+from catalogo.similitud import IndiceSimilitud
+from catalogo.texto import IndiceTexto
+
+__all__ = [
+    "CAMPOS_DISPONIBLES", "CAMPOS_RESUMEN",
+    "AlmacenPropiedades", "CacheSerializacion", "EstadisticasMantenidas",
+    "IndiceColumnar", "IndiceSimilitud", "IndiceTexto", "OrdenesMantenidos", "RegistroPropiedad",
+    "Vocabulario",
+    "clave_orden", "componer_json", "iterar_bits", "json_campos",
+]
@@ -0,0 +1,133 @@
+"""
+Almacén de propiedades en memoria indexado por id.
+
+Los registros viven en una lista (su posición es el slot que usan los índices)
+y un diccionario id -> slot da acceso O(1) para detalle, edición y baja.
+Cada escritura se propaga al índice columnar, a los órdenes mantenidos, a
+los índices de similares y de texto, a las estadísticas y al cache de
+serialización, e incrementa la versión del catálogo.
+
+Los registros se guardan compactos (ver catalogo.registros) pero se leen como
+dicts, y el modelo `Propiedad` sólo se arma al responder.
+"""
+from datetime import datetime
+import itertools
+from typing import Iterator, List, Optional, Tuple
+
+from catalogo.columnas import IndiceColumnar, iterar_bits
+from catalogo.estadisticas import EstadisticasMantenidas
+from catalogo.ordenes import OrdenesMantenidos
+from catalogo.registros import RegistroPropiedad, Vocabulario
+from catalogo.serializacion import CacheSerializacion
+from catalogo.similitud import IndiceSimilitud
+from catalogo.texto import IndiceTexto
+
+
+class AlmacenPropiedades:
+    def __init__(self, registros: List[dict]):
+        self.vocabulario = Vocabulario()
+        registros = [RegistroPropiedad(registro, self.vocabulario) for registro in registros]
+        self.registros = registros
+        self.indice = IndiceColumnar()
+        self.ordenes = OrdenesMantenidos()
+        self.serializados = CacheSerializacion()
+        self.similitud = IndiceSimilitud()
+        self.texto = IndiceTexto()
+        self.estadisticas = EstadisticasMantenidas()
+        # Versión del catálogo y momento de la última escritura; las vistas no cuentan
+        self.version = 0
+        self.modificado = datetime.now()
+        self._slot_por_id = {registro["id"]: slot for slot, registro in enumerate(registros)}
+        # Los ids nunca se reutilizan, ni siquiera tras una baja
+        self._ids = itertools.count(max(self._slot_por_id, default=0) + 1)
+        self.indice.cargar(registros)
+        self.ordenes.cargar(registros)
+        self.similitud.cargar(registros)
+        self.texto.cargar(registros)
+        self.estadisticas.cargar(registros)
+
+    def __len__(self) -> int:
+        return len(self.registros)
+
+    def __iter__(self) -> Iterator[RegistroPropiedad]:
+        return iter(self.registros)
+
+    def obtener(self, propiedad_id: int) -> Optional[dict]:
+        slot = self._slot_por_id.get(propiedad_id)
+        return self.registros[slot] if slot is not None else None
+
+    def slot(self, propiedad_id: int) -> Optional[int]:
+        return self._slot_por_id.get(propiedad_id)
+
+    def crear(self, datos: dict) -> dict:
+        """Asigna un id nuevo, guarda el registro y lo indexa"""
+        registro = RegistroPropiedad({"id": next(self._ids), **datos}, self.vocabulario)
+        slot = len(self.registros)
+        self.registros.append(registro)
+        self._slot_por_id[registro["id"]] = slot
+        self.indice.agregar(registro)
+        self.ordenes.agregar(slot, registro)
+        self.similitud.agregar(slot, registro)
+        self.texto.agregar(slot, registro)
+        self.estadisticas.agregar(slot, registro)
+        self._nueva_version()
+        return registro
+
+    def actualizar(self, propiedad_id: int, cambios: dict) -> Optional[dict]:
+        slot = self._slot_por_id.get(propiedad_id)
+        if slot is None:
+            return None
+        registro = self.registros[slot]
+        registro.update(cambios)
+        self.indice.actualizar(slot, registro)
+        self.ordenes.actualizar(slot, registro)
+        self.similitud.actualizar(slot, registro)
+        self.texto.actualizar(slot, registro)
+        self.estadisticas.actualizar(slot, registro)
+        self.serializados.invalidar(propiedad_id)
+        self._nueva_version()
+        return registro
+
+    def _nueva_version(self):
+        self.version += 1
+        self.modificado = datetime.now()
+
+    def registrar_vista(self, propiedad_id: int) -> Optional[dict]:
+        registro = self.obtener(propiedad_id)
+        if registro is not None:
+            registro["vistas"] += 1
+            self.serializados.actualizar_vistas(propiedad_id, registro["vistas"])
+        return registro
+
+    def eliminar(self, propiedad_id: int) -> bool:
+        """Baja lógica: el registro queda con estado "inactiva" """
+        return self.actualizar(propiedad_id, {
+            "estado": "inactiva",
+            "fecha_actualizacion": datetime.now()
+        }) is not None
+
+    def filtrar(self, filtros) -> int:
+        return self.indice.filtrar(filtros)
+
+    def facetas(self, filtros) -> dict:
+        return self.indice.facetas(filtros)
+
+    def pagina(self, mascara: int, orden: str, inicio: int, limite: int,
+               desde: Optional[Tuple[float, int]] = None,
+               origen: Optional[Tuple[float, float]] = None) -> List[dict]:
+        if orden == "distancia":
+            # Depende del punto consultado, así que no hay orden mantenido:
+            # top-k por heap sobre lo filtrado (acotado si hay radio o caja)
+            cercanos = self.indice.coordenadas.mas_cercanos(iterar_bits(mascara), *origen, inicio + limite)
+            return [self.registros[slot] for slot in cercanos[inicio:]]
+        slots = self.ordenes.pagina(orden, mascara, inicio, limite, desde)
+        return [self.registros[slot] for slot in slots]
+
+    def similares(self, base: dict, limite: int) -> List[dict]:
+        slots = self.similitud.similares(base, self._slot_por_id.get(base["id"]), self.registros, limite)
+        return [self.registros[slot] for slot in slots]
+
+    def buscar(self, consulta: str, mascara: int, inicio: int, limite: int) -> Tuple[List[dict], int]:
+        """Página de resultados por relevancia dentro del bitmap y total de coincidencias"""
+        mejores, total = self.texto.buscar(consulta, mascara, len(self.registros), inicio + limite)
+        return [self.registros[slot] for _, slot in mejores[inicio:]], total
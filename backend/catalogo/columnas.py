@@ -0,0 +1,400 @@
+"""
+Índice columnar con bitmaps para filtrar propiedades.
+
+Cada propiedad ocupa una posición fija ("slot") dentro del índice. Los campos
+filtrables se guardan como arrays tipados y cada valor tiene un bitmap (un int
+de Python con un bit por slot), de modo que una consulta se resuelve con AND/OR
+entre enteros, que se ejecutan en C, en lugar de recorrer las propiedades.
+"""
+from array import array
+import math
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from catalogo.geo import GrillaEspacial
+
+# Bins por cada duplicación del valor en las columnas continuas (~9% de ancho)
+BINS_POR_OCTAVA = 8
+# Los histogramas de facetas agrupan los bins de a media octava (~41% de ancho)
+RANGOS_HISTOGRAMA_POR_OCTAVA = 2
+
+
+def valor_clave(valor):
+    """Normaliza enums a su valor para usarlos como clave de diccionario"""
+    return getattr(valor, "value", valor)
+
+
+def rango_histograma(rango: int, cantidad: int) -> dict:
+    """Límites del rango número `rango` de los histogramas de facetas"""
+    return {
+        "desde": round(2 ** (rango / RANGOS_HISTOGRAMA_POR_OCTAVA), 2),
+        "hasta": round(2 ** ((rango + 1) / RANGOS_HISTOGRAMA_POR_OCTAVA), 2),
+        "cantidad": cantidad
+    }
+
+
+def iterar_bits(mascara: int) -> Iterator[int]:
+    """Itera en orden ascendente las posiciones de los bits activos"""
+    bits = bin(mascara)[:1:-1]
+    posicion = bits.find("1")
+    while posicion != -1:
+        yield posicion
+        posicion = bits.find("1", posicion + 1)
+
+
+def mascara_desde(slots: Iterable[int], total: int) -> int:
+    """Construye un bitmap a partir de una secuencia de slots"""
+    buffer = bytearray((total + 7) // 8)
+    for slot in slots:
+        buffer[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buffer, "little")
+
+
+class _ColumnaCategorica:
+    """Columna codificada por diccionario con un bitmap por valor distinto"""
+
+    def __init__(self, tipo_array: str = "B"):
+        self.codigos = array(tipo_array)
+        self.valores: List = []
+        self.bitmaps: List[int] = []
+        self._codigo_de: Dict = {}
+
+    def _codificar(self, valor) -> int:
+        codigo = self._codigo_de.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            self._codigo_de[valor] = codigo
+            self.valores.append(valor)
+            self.bitmaps.append(0)
+        return codigo
+
+    def agregar(self, slot: int, valor):
+        codigo = self._codificar(valor)
+        self.codigos.append(codigo)
+        self.bitmaps[codigo] |= 1 << slot
+
+    def extender(self, inicio: int, valores: List):
+        """Carga masiva: arma cada bitmap una sola vez en lugar de bit a bit"""
+        slots_por_codigo: Dict[int, List[int]] = {}
+        for slot, valor in enumerate(valores, inicio):
+            codigo = self._codificar(valor)
+            self.codigos.append(codigo)
+            slots_por_codigo.setdefault(codigo, []).append(slot)
+        total = inicio + len(valores)
+        for codigo, slots in slots_por_codigo.items():
+            self.bitmaps[codigo] |= mascara_desde(slots, total)
+
+    def actualizar(self, slot: int, valor):
+        anterior = self.codigos[slot]
+        codigo = self._codificar(valor)
+        if codigo != anterior:
+            self.bitmaps[anterior] &= ~(1 << slot)
+            self.bitmaps[codigo] |= 1 << slot
+            self.codigos[slot] = codigo
+
+    def valor(self, slot: int):
+        return self.valores[self.codigos[slot]]
+
+    def igual(self, valor) -> int:
+        codigo = self._codigo_de.get(valor)
+        return self.bitmaps[codigo] if codigo is not None else 0
+
+    def conteos(self, mascara: int) -> Dict:
+        """Cantidad de slots de la máscara por valor, sin los ceros"""
+        conteos = {}
+        for valor, bitmap in sorted(zip(self.valores, self.bitmaps)):
+            cantidad = (bitmap & mascara).bit_count()
+            if cantidad:
+                conteos[valor] = cantidad
+        return conteos
+
+    def donde(self, predicado: Callable) -> int:
+        """Une los bitmaps de todos los valores que cumplen el predicado"""
+        resultado = 0
+        for valor, bitmap in zip(self.valores, self.bitmaps):
+            if predicado(valor):
+                resultado |= bitmap
+        return resultado
+
+
+class _ColumnaDiscreta:
+    """Columna entera de dominio chico (habitaciones, baños)"""
+
+    def __init__(self):
+        self.valores = array("B")
+        self.bitmaps: Dict[int, int] = {}
+
+    def agregar(self, slot: int, valor: int):
+        self.valores.append(valor)
+        self.bitmaps[valor] = self.bitmaps.get(valor, 0) | (1 << slot)
+
+    def extender(self, inicio: int, valores: List[int]):
+        slots_por_valor: Dict[int, List[int]] = {}
+        for slot, valor in enumerate(valores, inicio):
+            slots_por_valor.setdefault(valor, []).append(slot)
+        self.valores.extend(valores)
+        total = inicio + len(valores)
+        for valor, slots in slots_por_valor.items():
+            self.bitmaps[valor] = self.bitmaps.get(valor, 0) | mascara_desde(slots, total)
+
+    def actualizar(self, slot: int, valor: int):
+        anterior = self.valores[slot]
+        if anterior != valor:
+            self.bitmaps[anterior] &= ~(1 << slot)
+            self.bitmaps[valor] = self.bitmaps.get(valor, 0) | (1 << slot)
+            self.valores[slot] = valor
+
+    def conteos(self, mascara: int) -> Dict[int, int]:
+        """Cantidad de slots de la máscara por valor, sin los ceros"""
+        conteos = {}
+        for valor in sorted(self.bitmaps):
+            cantidad = (self.bitmaps[valor] & mascara).bit_count()
+            if cantidad:
+                conteos[valor] = cantidad
+        return conteos
+
+    def al_menos(self, minimo: int) -> int:
+        resultado = 0
+        for valor, bitmap in self.bitmaps.items():
+            if valor >= minimo:
+                resultado |= bitmap
+        return resultado
+
+
+class _ColumnaContinua:
+    """
+    Columna de punto flotante con un bitmap por bin logarítmico.
+
+    Los bins completamente dentro de un rango se aceptan sin mirar los valores;
+    sólo los slots de los bins de borde se comparan contra el array.
+    """
+
+    def __init__(self):
+        self.valores = array("d")
+        self.bins: Dict[int, int] = {}
+
+    @staticmethod
+    def _bin(valor: float) -> int:
+        return math.floor(math.log2(valor) * BINS_POR_OCTAVA)
+
+    def agregar(self, slot: int, valor: float):
+        self.valores.append(valor)
+        b = self._bin(valor)
+        self.bins[b] = self.bins.get(b, 0) | (1 << slot)
+
+    def extender(self, inicio: int, valores: List[float]):
+        slots_por_bin: Dict[int, List[int]] = {}
+        for slot, valor in enumerate(valores, inicio):
+            slots_por_bin.setdefault(self._bin(valor), []).append(slot)
+        self.valores.extend(valores)
+        total = inicio + len(valores)
+        for b, slots in slots_por_bin.items():
+            self.bins[b] = self.bins.get(b, 0) | mascara_desde(slots, total)
+
+    def actualizar(self, slot: int, valor: float):
+        anterior = self._bin(self.valores[slot])
+        nuevo = self._bin(valor)
+        if anterior != nuevo:
+            self.bins[anterior] &= ~(1 << slot)
+            self.bins[nuevo] = self.bins.get(nuevo, 0) | (1 << slot)
+        self.valores[slot] = valor
+
+    def histograma(self, mascara: int) -> List[dict]:
+        """Conteos de la máscara por rango de media octava, contando bins enteros"""
+        paso = BINS_POR_OCTAVA // RANGOS_HISTOGRAMA_POR_OCTAVA
+        cantidades: Dict[int, int] = {}
+        for b, bitmap in self.bins.items():
+            cantidad = (bitmap & mascara).bit_count()
+            if cantidad:
+                cantidades[b // paso] = cantidades.get(b // paso, 0) + cantidad
+        return [rango_histograma(rango, cantidades[rango]) for rango in sorted(cantidades)]
+
+    def rango(self, candidatos: int, minimo: Optional[float], maximo: Optional[float]) -> int:
+        """Restringe los candidatos a los slots con minimo <= valor <= maximo"""
+        bin_min = self._bin(minimo) if minimo else None
+        bin_max = self._bin(maximo) if maximo else None
+
+        completos = 0
+        bordes = 0
+        for b, bitmap in self.bins.items():
+            if (bin_min is not None and b < bin_min) or (bin_max is not None and b > bin_max):
+                continue
+            if b == bin_min or b == bin_max:
+                bordes |= bitmap
+            else:
+                completos |= bitmap
+
+        resultado = candidatos & completos
+        bordes &= candidatos
+        if bordes:
+            valores = self.valores
+            minimo = minimo or -math.inf
+            maximo = maximo or math.inf
+            resultado |= mascara_desde(
+                (slot for slot in iterar_bits(bordes) if minimo <= valores[slot] <= maximo),
+                len(valores)
+            )
+        return resultado
+
+
+class IndiceColumnar:
+    """
+    Almacena los campos filtrables de cada propiedad como columnas tipadas
+    y resuelve los filtros del listado intersectando bitmaps.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.todos = 0
+        self.precio = _ColumnaContinua()
+        self.metros = _ColumnaContinua()
+        self.habitaciones = _ColumnaDiscreta()
+        self.banos = _ColumnaDiscreta()
+        self.tipo = _ColumnaCategorica()
+        self.operacion = _ColumnaCategorica()
+        self.estado = _ColumnaCategorica()
+        self.destacada = _ColumnaCategorica()
+        self.ubicacion = _ColumnaCategorica("I")
+        self.coordenadas = GrillaEspacial()
+
+    def cargar(self, registros: List[dict]):
+        """Carga masiva de propiedades a continuación de las existentes"""
+        inicio = self.total
+        self.precio.extender(inicio, [r["precio"] for r in registros])
+        self.metros.extender(inicio, [r["metros"] for r in registros])
+        self.habitaciones.extender(inicio, [r["habitaciones"] for r in registros])
+        self.banos.extender(inicio, [r["banos"] for r in registros])
+        self.tipo.extender(inicio, [valor_clave(r["tipo"]) for r in registros])
+        self.operacion.extender(inicio, [valor_clave(r["operacion"]) for r in registros])
+        self.estado.extender(inicio, [valor_clave(r["estado"]) for r in registros])
+        self.destacada.extender(inicio, [bool(r["destacada"]) for r in registros])
+        self.ubicacion.extender(inicio, [r["ubicacion"] for r in registros])
+        self.coordenadas.cargar(registros)
+        self.total += len(registros)
+        self.todos = (1 << self.total) - 1
+
+    def agregar(self, registro: dict) -> int:
+        """Agrega una propiedad al final del índice y devuelve su slot"""
+        slot = self.total
+        self.precio.agregar(slot, registro["precio"])
+        self.metros.agregar(slot, registro["metros"])
+        self.habitaciones.agregar(slot, registro["habitaciones"])
+        self.banos.agregar(slot, registro["banos"])
+        self.tipo.agregar(slot, valor_clave(registro["tipo"]))
+        self.operacion.agregar(slot, valor_clave(registro["operacion"]))
+        self.estado.agregar(slot, valor_clave(registro["estado"]))
+        self.destacada.agregar(slot, bool(registro["destacada"]))
+        self.ubicacion.agregar(slot, registro["ubicacion"])
+        self.coordenadas.agregar(slot, registro)
+        self.total += 1
+        self.todos |= 1 << slot
+        return slot
+
+    def actualizar(self, slot: int, registro: dict):
+        """Refleja en el índice los cambios de una propiedad existente"""
+        self.precio.actualizar(slot, registro["precio"])
+        self.metros.actualizar(slot, registro["metros"])
+        self.habitaciones.actualizar(slot, registro["habitaciones"])
+        self.banos.actualizar(slot, registro["banos"])
+        self.tipo.actualizar(slot, valor_clave(registro["tipo"]))
+        self.operacion.actualizar(slot, valor_clave(registro["operacion"]))
+        self.estado.actualizar(slot, valor_clave(registro["estado"]))
+        self.destacada.actualizar(slot, bool(registro["destacada"]))
+        self.ubicacion.actualizar(slot, registro["ubicacion"])
+        self.coordenadas.actualizar(slot, registro)
+
+    def filtrar(self, filtros) -> int:
+        """Devuelve el bitmap de slots que cumplen todos los filtros"""
+        mascara = self.todos
+
+        # Igualdades: un AND por filtro
+        if filtros.tipo:
+            mascara &= self.tipo.igual(valor_clave(filtros.tipo))
+        if filtros.operacion:
+            mascara &= self.operacion.igual(valor_clave(filtros.operacion))
+        if filtros.featured is not None:
+            mascara &= self.destacada.igual(filtros.featured)
+
+        # Mínimos sobre columnas discretas
+        if filtros.habitaciones:
+            mascara &= self.habitaciones.al_menos(filtros.habitaciones)
+        if filtros.banos:
+            mascara &= self.banos.al_menos(filtros.banos)
+
+        # Búsqueda por ubicación sobre los valores distintos, no sobre las filas
+        if filtros.ubicacion:
+            buscado = filtros.ubicacion.lower()
+            mascara &= self.ubicacion.donde(lambda valor: buscado in valor.lower())
+
+        # Rangos: los bins de borde sólo se revisan sobre lo que quedó
+        if mascara and (filtros.precio_min or filtros.precio_max):
+            mascara = self.precio.rango(mascara, filtros.precio_min, filtros.precio_max)
+        if mascara and (filtros.metros_min or filtros.metros_max):
+            mascara = self.metros.rango(mascara, filtros.metros_min, filtros.metros_max)
+
+        # Zona geográfica: la grilla sólo revisa las celdas que la tocan
+        if mascara and filtros.lat_min is not None:
+            slots = self.coordenadas.caja(filtros.lat_min, filtros.lat_max, filtros.lng_min, filtros.lng_max)
+            mascara &= mascara_desde(slots, self.total)
+        if mascara and filtros.radio_km is not None:
+            slots = self.coordenadas.radio(filtros.lat, filtros.lng, filtros.radio_km)
+            mascara &= mascara_desde(slots, self.total)
+
+        return mascara
+
+    def _mascaras_por_faceta(self, filtros) -> Dict[str, int]:
+        """Bitmap de cada grupo de filtros activo, resuelto por separado"""
+        mascaras: Dict[str, int] = {}
+        if filtros.tipo:
+            mascaras["tipo"] = self.tipo.igual(valor_clave(filtros.tipo))
+        if filtros.operacion:
+            mascaras["operacion"] = self.operacion.igual(valor_clave(filtros.operacion))
+        if filtros.habitaciones:
+            mascaras["habitaciones"] = self.habitaciones.al_menos(filtros.habitaciones)
+        if filtros.banos:
+            mascaras["banos"] = self.banos.al_menos(filtros.banos)
+        if filtros.precio_min or filtros.precio_max:
+            mascaras["precio"] = self.precio.rango(self.todos, filtros.precio_min, filtros.precio_max)
+        if filtros.metros_min or filtros.metros_max:
+            mascaras["metros"] = self.metros.rango(self.todos, filtros.metros_min, filtros.metros_max)
+
+        # Lo que no es faceta se aplica a todas: va junto en un solo bitmap
+        comunes = self.todos
+        if filtros.featured is not None:
+            comunes &= self.destacada.igual(filtros.featured)
+        if filtros.ubicacion:
+            buscado = filtros.ubicacion.lower()
+            comunes &= self.ubicacion.donde(lambda valor: buscado in valor.lower())
+        if filtros.lat_min is not None:
+            comunes &= mascara_desde(
+                self.coordenadas.caja(filtros.lat_min, filtros.lat_max, filtros.lng_min, filtros.lng_max),
+                self.total
+            )
+        if filtros.radio_km is not None:
+            comunes &= mascara_desde(self.coordenadas.radio(filtros.lat, filtros.lng, filtros.radio_km), self.total)
+        mascaras[""] = comunes
+        return mascaras
+
+    def facetas(self, filtros) -> dict:
+        """
+        Conteos por valor de cada faceta aplicando todos los filtros menos el
+        de la propia faceta. No recorre filas: cada conteo es el popcount del
+        AND entre la máscara de la faceta y el bitmap del valor.
+        """
+        mascaras = self._mascaras_por_faceta(filtros)
+
+        def sin(faceta: Optional[str]) -> int:
+            mascara = self.todos
+            for nombre, bitmap in mascaras.items():
+                if nombre != faceta:
+                    mascara &= bitmap
+            return mascara
+
+        return {
+            "total": sin(None).bit_count(),
+            "tipo": self.tipo.conteos(sin("tipo")),
+            "operacion": self.operacion.conteos(sin("operacion")),
+            "habitaciones": self.habitaciones.conteos(sin("habitaciones")),
+            "banos": self.banos.conteos(sin("banos")),
+            "precio": self.precio.histograma(sin("precio")),
+            "metros": self.metros.histograma(sin("metros"))
+        }
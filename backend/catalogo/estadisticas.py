@@ -0,0 +1,74 @@
+"""
+Estadísticas del catálogo mantenidas como contadores.
+
+Sólo cuentan las propiedades disponibles. Cada alta o modificación aplica la
+diferencia entre lo que la propiedad aportaba antes y lo que aporta ahora, así
+que un cambio de estado (reserva, venta, baja) sale de los totales sin volver
+a recorrer el listado y la consulta de estadísticas es O(1).
+"""
+from typing import Dict, List, Optional, Tuple
+
+from catalogo.columnas import valor_clave
+
+# (tipo, operacion, precio en centavos, destacada) de una propiedad disponible
+Aporte = Tuple[str, str, int, bool]
+
+
+def _aporte(registro: dict) -> Optional[Aporte]:
+    if valor_clave(registro["estado"]) != "disponible":
+        return None
+    return (valor_clave(registro["tipo"]), valor_clave(registro["operacion"]),
+            round(registro["precio"] * 100), bool(registro["destacada"]))
+
+
+def _sumar(contador: Dict[str, int], clave: str, delta: int):
+    valor = contador.get(clave, 0) + delta
+    if valor:
+        contador[clave] = valor
+    else:
+        del contador[clave]
+
+
+class EstadisticasMantenidas:
+    def __init__(self):
+        self.total = 0
+        self.por_tipo: Dict[str, int] = {}
+        self.por_operacion: Dict[str, int] = {}
+        # En centavos enteros: sumas y restas sin error acumulado
+        self.suma_precios = 0
+        self.destacadas = 0
+        self._aportes: Dict[int, Aporte] = {}
+
+    def _aplicar(self, aporte: Aporte, signo: int):
+        tipo, operacion, precio, destacada = aporte
+        self.total += signo
+        _sumar(self.por_tipo, tipo, signo)
+        _sumar(self.por_operacion, operacion, signo)
+        self.suma_precios += signo * precio
+        self.destacadas += signo * destacada
+
+    def cargar(self, registros: List[dict]):
+        """Carga inicial: los slots son las posiciones en `registros`"""
+        for slot, registro in enumerate(registros):
+            self.agregar(slot, registro)
+
+    def agregar(self, slot: int, registro: dict):
+        aporte = _aporte(registro)
+        if aporte is not None:
+            self._aportes[slot] = aporte
+            self._aplicar(aporte, 1)
+
+    def actualizar(self, slot: int, registro: dict):
+        anterior = self._aportes.pop(slot, None)
+        if anterior is not None:
+            self._aplicar(anterior, -1)
+        self.agregar(slot, registro)
+
+    def resumen(self) -> dict:
+        return {
+            "total_propiedades": self.total,
+            "por_tipo": dict(self.por_tipo),
+            "por_operacion": dict(self.por_operacion),
+            "precio_promedio": self.suma_precios / self.total / 100 if self.total else 0,
+            "propiedades_destacadas": self.destacadas
+        }
@@ -0,0 +1,146 @@
+"""
+Utilidades geográficas del catálogo: distancias y la grilla espacial que
+resuelve las búsquedas por radio y por caja sin recorrer todo el listado.
+"""
+from array import array
+import heapq
+import math
+from math import asin, cos, radians, sin, sqrt
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from catalogo.registros import RegistroPropiedad
+
+RADIO_TIERRA_KM = 6371.0
+KM_POR_GRADO = 111.32
+# Lado de la celda de la grilla en grados (~1,1 km de latitud)
+TAMANO_CELDA = 0.01
+
+
+def distancia_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distancia de gran círculo (haversine) en kilómetros"""
+    dlat = radians(lat2 - lat1)
+    dlng = radians(lng2 - lng1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlng / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * asin(sqrt(a))
+
+
+def coordenadas_de(registro: dict) -> Optional[Tuple[float, float]]:
+    """(lat, lng) del registro, o None si no tiene coordenadas"""
+    if type(registro) is RegistroPropiedad:
+        # El registro compacto ya guarda los floats; no hace falta armar el dict
+        return None if registro.lat is None else (registro.lat, registro.lng)
+    coordenadas = registro.get("coordenadas")
+    if not coordenadas:
+        return None
+    if isinstance(coordenadas, dict):
+        return coordenadas["lat"], coordenadas["lng"]
+    return coordenadas.lat, coordenadas.lng
+
+
+def caja_de_radio(lat: float, lng: float, radio_km: float) -> Tuple[float, float, float, float]:
+    """(lat_min, lat_max, lng_min, lng_max) que contiene el círculo pedido"""
+    delta_lat = radio_km / KM_POR_GRADO
+    delta_lng = radio_km / (KM_POR_GRADO * max(cos(radians(lat)), 1e-6))
+    return lat - delta_lat, lat + delta_lat, lng - delta_lng, lng + delta_lng
+
+
+class GrillaEspacial:
+    """
+    Índice espacial de grilla regular en grados. Cada celda guarda los slots
+    de las propiedades que caen en ella; una consulta toma completas las
+    celdas interiores a la zona y revisa punto por punto sólo las del borde.
+    """
+
+    def __init__(self, tamano_celda: float = TAMANO_CELDA):
+        self.tamano = tamano_celda
+        # Coordenadas por slot; NaN si la propiedad no tiene
+        self.lat = array("d")
+        self.lng = array("d")
+        self._celdas: Dict[Tuple[int, int], Set[int]] = {}
+
+    def _celda(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.tamano), math.floor(lng / self.tamano)
+
+    def cargar(self, registros: List[dict]):
+        for registro in registros:
+            self.agregar(len(self.lat), registro)
+
+    def agregar(self, slot: int, registro: dict):
+        punto = coordenadas_de(registro)
+        self.lat.append(punto[0] if punto else math.nan)
+        self.lng.append(punto[1] if punto else math.nan)
+        if punto:
+            self._celdas.setdefault(self._celda(*punto), set()).add(slot)
+
+    def actualizar(self, slot: int, registro: dict):
+        punto = coordenadas_de(registro)
+        lat, lng = self.lat[slot], self.lng[slot]
+        anterior = None if math.isnan(lat) else (lat, lng)
+        if punto == anterior:
+            return
+        if anterior is not None:
+            celda = self._celda(*anterior)
+            self._celdas[celda].discard(slot)
+            if not self._celdas[celda]:
+                del self._celdas[celda]
+        if punto:
+            self._celdas.setdefault(self._celda(*punto), set()).add(slot)
+        self.lat[slot] = punto[0] if punto else math.nan
+        self.lng[slot] = punto[1] if punto else math.nan
+
+    def _celdas_en(self, lat_min: float, lat_max: float,
+                   lng_min: float, lng_max: float) -> Iterator[Tuple[Tuple[int, int], bool]]:
+        """Celdas ocupadas que tocan la caja, indicando si quedan enteras adentro"""
+        i0, j0 = self._celda(lat_min, lng_min)
+        i1, j1 = self._celda(lat_max, lng_max)
+        # Una caja enorme se resuelve recorriendo las celdas ocupadas, no la caja
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._celdas):
+            candidatas = [c for c in self._celdas if i0 <= c[0] <= i1 and j0 <= c[1] <= j1]
+        else:
+            candidatas = [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in self._celdas]
+        for celda in candidatas:
+            yield celda, i0 < celda[0] < i1 and j0 < celda[1] < j1
+
+    def caja(self, lat_min: float, lat_max: float, lng_min: float, lng_max: float) -> List[int]:
+        """Slots con coordenadas dentro de la caja (bordes incluidos)"""
+        lat, lng = self.lat, self.lng
+        slots = []
+        for celda, completa in self._celdas_en(lat_min, lat_max, lng_min, lng_max):
+            contenido = self._celdas[celda]
+            if completa:
+                slots.extend(contenido)
+            else:
+                slots.extend(s for s in contenido
+                             if lat_min <= lat[s] <= lat_max and lng_min <= lng[s] <= lng_max)
+        return slots
+
+    def _celda_en_radio(self, celda: Tuple[int, int], lat: float, lng: float, radio_km: float) -> bool:
+        # A escala de celda el círculo es convexo: si las cuatro esquinas
+        # están adentro, la celda entera también
+        i, j = celda
+        return all(
+            distancia_km(lat, lng, (i + di) * self.tamano, (j + dj) * self.tamano) <= radio_km
+            for di in (0, 1) for dj in (0, 1)
+        )
+
+    def radio(self, lat: float, lng: float, radio_km: float) -> List[int]:
+        """Slots a no más de `radio_km` del punto"""
+        slots = []
+        for celda, completa in self._celdas_en(*caja_de_radio(lat, lng, radio_km)):
+            contenido = self._celdas[celda]
+            if completa and self._celda_en_radio(celda, lat, lng, radio_km):
+                slots.extend(contenido)
+            else:
+                slots.extend(s for s in contenido
+                             if distancia_km(lat, lng, self.lat[s], self.lng[s]) <= radio_km)
+        return slots
+
+    def distancia(self, slot: int, lat: float, lng: float) -> float:
+        """Distancia en km al punto; infinita si la propiedad no tiene coordenadas"""
+        if math.isnan(self.lat[slot]):
+            return math.inf
+        return distancia_km(lat, lng, self.lat[slot], self.lng[slot])
+
+    def mas_cercanos(self, slots: Iterable[int], lat: float, lng: float, cantidad: int) -> List[int]:
+        """Los `cantidad` slots más cercanos al punto; los empates, por slot"""
+        return [slot for _, slot in heapq.nsmallest(cantidad, ((self.distancia(s, lat, lng), s) for s in slots))]
@@ -0,0 +1,112 @@
+"""
+Órdenes mantenidos para paginar el listado sin ordenar en cada consulta.
+
+Para cada criterio de `orden` se conserva la lista de (clave, slot) ordenada,
+actualizada en cada alta o modificación. Una página se obtiene recorriendo esa
+lista contra el bitmap de filtros o, si el filtro es muy selectivo, con un
+top-k por heap sobre los slots que lo cumplen. Con un punto de partida
+(paginación por cursor) el recorrido arranca en una búsqueda binaria, así que
+el costo no depende de la profundidad de la página.
+"""
+from array import array
+from bisect import bisect_left, bisect_right, insort
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from catalogo.columnas import iterar_bits
+
+# criterio -> (campo, descendente)
+CRITERIOS = {
+    "recientes": ("fecha_publicacion", True),
+    "precio-asc": ("precio", False),
+    "precio-desc": ("precio", True),
+    "metros-desc": ("metros", True),
+}
+
+
+def clave_orden(criterio: str, valor) -> float:
+    """Convierte el valor de la columna de orden en la clave ascendente interna"""
+    campo, descendente = CRITERIOS[criterio]
+    if campo == "fecha_publicacion":
+        valor = valor.timestamp()
+    return -valor if descendente else valor
+
+
+def _clave(registro: dict, criterio: str) -> float:
+    return clave_orden(criterio, registro[CRITERIOS[criterio][0]])
+
+
+class OrdenesMantenidos:
+    """
+    Listas ordenadas por criterio. Los empates se resuelven por slot, igual
+    que el `sorted()` estable sobre el orden de carga.
+    """
+
+    def __init__(self):
+        self._ordenados: Dict[str, List[Tuple[float, int]]] = {c: [] for c in CRITERIOS}
+        self._claves: Dict[str, array] = {c: array("d") for c in CRITERIOS}
+
+    def cargar(self, registros: List[dict]):
+        inicio = len(self._claves["recientes"])
+        for criterio in CRITERIOS:
+            claves = [_clave(r, criterio) for r in registros]
+            self._claves[criterio].extend(claves)
+            ordenados = self._ordenados[criterio]
+            ordenados.extend(zip(claves, range(inicio, inicio + len(claves))))
+            ordenados.sort()
+
+    def agregar(self, slot: int, registro: dict):
+        for criterio in CRITERIOS:
+            clave = _clave(registro, criterio)
+            self._claves[criterio].append(clave)
+            insort(self._ordenados[criterio], (clave, slot))
+
+    def actualizar(self, slot: int, registro: dict):
+        for criterio in CRITERIOS:
+            claves = self._claves[criterio]
+            clave = _clave(registro, criterio)
+            if clave == claves[slot]:
+                continue
+            ordenados = self._ordenados[criterio]
+            del ordenados[bisect_left(ordenados, (claves[slot], slot))]
+            insort(ordenados, (clave, slot))
+            claves[slot] = clave
+
+    def pagina(self, criterio: str, mascara: int, inicio: int, cantidad: int,
+               desde: Optional[Tuple[float, int]] = None) -> List[int]:
+        """
+        Devuelve los slots de la página pedida dentro del bitmap filtrado.
+        Con `desde` (clave, slot) sólo se consideran los posteriores a ese par.
+        """
+        ordenados = self._ordenados[criterio]
+        total = len(ordenados)
+        coincidencias = mascara.bit_count()
+        fin = inicio + cantidad
+        comienzo = bisect_right(ordenados, desde) if desde is not None else 0
+
+        if inicio >= coincidencias:
+            return []
+
+        # Sin filtros efectivos la página es un slice directo del orden
+        if coincidencias == total:
+            return [slot for _, slot in ordenados[comienzo + inicio:comienzo + fin]]
+
+        # Recorrer el orden cuesta ~fin * total / coincidencias pasos; el heap,
+        # ~coincidencias. Se elige el más barato.
+        if fin * total < coincidencias * coincidencias:
+            bits = mascara.to_bytes((total + 7) // 8, "little")
+            slots = []
+            for i in range(comienzo, total):
+                slot = ordenados[i][1]
+                if bits[slot >> 3] >> (slot & 7) & 1:
+                    slots.append(slot)
+                    if len(slots) == fin:
+                        break
+            return slots[inicio:]
+
+        claves = self._claves[criterio]
+        candidatos = ((claves[slot], slot) for slot in iterar_bits(mascara))
+        if desde is not None:
+            candidatos = (par for par in candidatos if par > desde)
+        mejores = heapq.nsmallest(fin, candidatos)
+        return [slot for _, slot in mejores[inicio:]]
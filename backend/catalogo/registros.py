@@ -0,0 +1,128 @@
+"""
+Registro compacto de una propiedad para el almacén en memoria.
+
+Un dict por propiedad repite en cada una sus claves y sus propias copias de
+textos que se repiten en todo el catálogo (ubicación, características,
+servicios) y del dict de coordenadas. Acá cada propiedad es un objeto con
+`__slots__`: los textos repetidos se codifican contra un vocabulario
+compartido (cada valor distinto se guarda una vez y los registros lo
+referencian), las listas quedan como tuplas, el agente es una referencia
+compartida por id, tipo/operación/estado son los miembros del enum y las
+coordenadas dos floats.
+
+El registro se lee como un dict (`registro["precio"]`, `.get`, `**registro`),
+así que índices, cursores y exportación no cambian; el modelo `Propiedad` se
+arma recién al responder, en el cache de serialización.
+"""
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from models import Agente, EstadoPropiedad, TipoOperacion, TipoPropiedad
+
+CAMPOS = (
+    "id", "titulo", "descripcion", "precio", "ubicacion", "direccion", "tipo", "operacion",
+    "habitaciones", "banos", "metros", "metros_terreno", "antiguedad", "expensas",
+    "caracteristicas", "servicios", "imagenes", "coordenadas", "estado", "destacada",
+    "fecha_publicacion", "fecha_actualizacion", "agente", "vistas", "clave_externa",
+)
+ENUMS = {"tipo": TipoPropiedad, "operacion": TipoOperacion, "estado": EstadoPropiedad}
+# Textos que se repiten entre propiedades y se codifican contra el vocabulario
+TEXTOS_REPETIDOS = ("ubicacion",)
+LISTAS_REPETIDAS = ("caracteristicas", "servicios")
+
+
+class Vocabulario:
+    """Valores compartidos por los registros: cada texto distinto y cada agente una sola vez"""
+
+    def __init__(self):
+        self._textos: Dict[str, str] = {}
+        self._agentes: Dict[int, Agente] = {}
+
+    def __len__(self) -> int:
+        return len(self._textos)
+
+    def texto(self, valor: Optional[str]) -> Optional[str]:
+        if valor is None:
+            return None
+        return self._textos.setdefault(valor, valor)
+
+    def textos(self, valores: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        return tuple(self._textos.setdefault(valor, valor) for valor in valores or ())
+
+    def agente(self, agente) -> Agente:
+        if isinstance(agente, dict):
+            agente = Agente(**agente)
+        compartido = self._agentes.get(agente.id)
+        if compartido is None or compartido != agente:
+            # Un agente que cambió reemplaza al anterior para los registros nuevos
+            self._agentes[agente.id] = compartido = agente
+        return compartido
+
+
+class RegistroPropiedad(Mapping):
+    """Propiedad del almacén; se accede como un dict de sólo esos campos"""
+
+    __slots__ = tuple(campo for campo in CAMPOS if campo != "coordenadas") + ("lat", "lng", "_vocabulario")
+
+    def __init__(self, datos: Mapping, vocabulario: Vocabulario):
+        self._vocabulario = vocabulario
+        for campo in CAMPOS:
+            self[campo] = datos.get(campo)
+
+    def __getitem__(self, campo: str):
+        if campo in _ATRIBUTOS:
+            return getattr(self, campo)
+        if campo == "coordenadas":
+            return None if self.lat is None else {"lat": self.lat, "lng": self.lng}
+        raise KeyError(campo)
+
+    def get(self, campo: str, defecto=None):
+        # Mapping.get pasa por __getitem__ y captura KeyError: es el acceso más usado
+        if campo in _ATRIBUTOS:
+            return getattr(self, campo)
+        return self[campo] if campo == "coordenadas" else defecto
+
+    def __setitem__(self, campo: str, valor):
+        if campo not in _CAMPOS:
+            raise KeyError(campo)
+        vocabulario = self._vocabulario
+        if campo == "coordenadas":
+            if valor is None:
+                self.lat = self.lng = None
+            elif isinstance(valor, Mapping):
+                self.lat, self.lng = valor["lat"], valor["lng"]
+            else:
+                self.lat, self.lng = valor.lat, valor.lng
+            return
+        if valor is not None:
+            if campo in ENUMS:
+                valor = ENUMS[campo](valor)
+            elif campo in TEXTOS_REPETIDOS:
+                valor = vocabulario.texto(valor)
+            elif campo in LISTAS_REPETIDAS:
+                valor = vocabulario.textos(valor)
+            elif campo == "imagenes":
+                valor = tuple(valor)
+            elif campo == "agente":
+                valor = vocabulario.agente(valor)
+        elif campo in LISTAS_REPETIDAS or campo == "imagenes":
+            valor = ()
+        setattr(self, campo, valor)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(CAMPOS)
+
+    def __len__(self) -> int:
+        return len(CAMPOS)
+
+    def __repr__(self) -> str:
+        return f"RegistroPropiedad(id={self.id!r}, titulo={self.titulo!r})"
+
+    def update(self, cambios: Mapping):
+        for campo, valor in cambios.items():
+            self[campo] = valor
+
+
+_CAMPOS = frozenset(CAMPOS)
+# Campos que se guardan tal cual en un atributo del mismo nombre
+_ATRIBUTOS = _CAMPOS - {"coordenadas"}
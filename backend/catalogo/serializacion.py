@@ -0,0 +1,130 @@
+"""
+Cache por propiedad del modelo `Propiedad` ya validado y de su JSON.
+
+Los registros del almacén se validaron al guardarse; reconstruir el modelo en
+cada respuesta vuelve a correr toda la validación de pydantic. Acá se guarda el
+modelo y sus bytes JSON hasta que la propiedad cambie, y los endpoints arman la
+respuesta concatenando esos fragmentos.
+
+Con un subconjunto de campos (`campos=` del listado o la vista resumida) el
+JSON se arma directo desde el registro, sin construir el modelo ni tocar los
+campos que no se piden.
+"""
+from collections import OrderedDict
+from datetime import datetime
+import json
+from typing import Iterable, Optional, Sequence
+
+from pydantic import BaseModel
+
+from miniaturas import urls_imagen
+from models import Propiedad, PropiedadResumen
+
+# Entradas máximas antes de descartar las menos usadas
+MAXIMO_ENTRADAS = 50_000
+
+
+# Campos que se pueden pedir con `campos=`: los que se envían del modelo completo
+# (incluidos los calculados) y los del resumen
+CAMPOS_DISPONIBLES = tuple(dict.fromkeys([
+    "id", *Propiedad.model_json_schema(mode="serialization")["properties"], *PropiedadResumen.model_fields
+]))
+CAMPOS_RESUMEN = tuple(PropiedadResumen.model_fields)
+
+
+def _valor_json(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, BaseModel):
+        return valor.model_dump(mode="json")
+    raise TypeError(f"{type(valor).__name__} no es serializable")
+
+
+def json_campos(registro: dict, campos: Sequence[str]) -> bytes:
+    """
+    JSON con sólo `campos` del registro. Los registros se validaron al
+    guardarse, así que los valores se copian tal cual; `imagen` e
+    `imagen_tamanos` salen de la primera de las imágenes
+    """
+    datos = {}
+    imagenes = registro.get("imagenes") or ()
+    for campo in campos:
+        if campo == "imagen":
+            datos[campo] = urls_imagen(imagenes[0])["mediana"] if imagenes else None
+        elif campo == "imagen_tamanos":
+            datos[campo] = urls_imagen(imagenes[0]) if imagenes else None
+        elif campo == "imagenes_tamanos":
+            datos[campo] = [urls_imagen(url) for url in imagenes]
+        else:
+            datos[campo] = registro.get(campo)
+    return json.dumps(datos, ensure_ascii=False, separators=(",", ":"), default=_valor_json).encode("utf-8")
+
+
+class CacheSerializacion:
+    def __init__(self, maximo: int = MAXIMO_ENTRADAS):
+        self.maximo = maximo
+        # id -> [modelo, json, json del resumen], cada uno None hasta que se pide
+        self._entradas: "OrderedDict[int, list]" = OrderedDict()
+
+    def _entrada(self, registro: dict) -> list:
+        propiedad_id = registro["id"]
+        entrada = self._entradas.get(propiedad_id)
+        if entrada is None:
+            entrada = [None, None, None]
+            self._entradas[propiedad_id] = entrada
+            if len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+        else:
+            self._entradas.move_to_end(propiedad_id)
+        return entrada
+
+    def modelo(self, registro: dict) -> Propiedad:
+        entrada = self._entrada(registro)
+        if entrada[0] is None:
+            entrada[0] = Propiedad(**registro)
+        return entrada[0]
+
+    def json(self, registro: dict, guardar: bool = True) -> bytes:
+        """
+        Con guardar=False (recorridos de todo el catálogo, como la exportación)
+        se usa lo que ya esté en cache pero no se agrega nada, para no
+        desplazar las propiedades que se consultan seguido
+        """
+        if not guardar and registro["id"] not in self._entradas:
+            return Propiedad(**registro).model_dump_json().encode("utf-8")
+        entrada = self._entrada(registro)
+        if entrada[1] is None:
+            entrada[1] = self.modelo(registro).model_dump_json().encode("utf-8")
+        return entrada[1]
+
+    def resumen(self, registro: dict) -> bytes:
+        """JSON de la vista resumida; no depende de las vistas, así que sobrevive a actualizar_vistas"""
+        entrada = self._entrada(registro)
+        if entrada[2] is None:
+            entrada[2] = json_campos(registro, CAMPOS_RESUMEN)
+        return entrada[2]
+
+    def invalidar(self, propiedad_id: int):
+        self._entradas.pop(propiedad_id, None)
+
+    def actualizar_vistas(self, propiedad_id: int, vistas: int):
+        """Un cambio de vistas no requiere revalidar: se copia el modelo y se descarta el JSON"""
+        entrada = self._entradas.get(propiedad_id)
+        if entrada is not None and entrada[0] is not None:
+            entrada[0] = entrada[0].model_copy(update={"vistas": vistas})
+            entrada[1] = None
+
+
+def componer_json(fragmentos: Iterable[bytes], clave: Optional[str] = None, **campos) -> bytes:
+    """
+    Arma un documento JSON a partir de fragmentos ya serializados.
+
+    Sin `clave` devuelve un array; con `clave` devuelve un objeto cuyo campo
+    `clave` es el array y el resto de los campos se serializan normalmente.
+    """
+    lista = b"[" + b",".join(fragmentos) + b"]"
+    if clave is None:
+        return lista
+    resto = json.dumps(campos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    inicio = b'{"' + clave.encode("utf-8") + b'":' + lista
+    return inicio + (b"," + resto[1:] if campos else b"}")
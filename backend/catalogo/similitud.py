@@ -0,0 +1,149 @@
+"""
+Índice de propiedades similares.
+
+Las propiedades disponibles se agrupan por (tipo, operación) y, dentro de cada
+grupo, se mantienen ordenadas por precio. Para una propiedad base la ventana
+de ±30% del precio se ubica con búsqueda binaria y se recorre desde el precio
+base hacia afuera. Los candidatos se ordenan por un puntaje que combina
+diferencia de precio, metros, habitaciones y distancia entre coordenadas, y a
+igual puntaje por id, igual que RepositorioPostgres.similares.
+
+El resultado es exacto: se puntúa toda la ventana salvo lo que ya no puede
+entrar. Como el recorrido avanza por diferencia de precio creciente, el
+término de precio de cada candidato es una cota inferior de su puntaje y de
+los que siguen; cuando supera al peor de los `limite` mejores, el resto de la
+ventana no puede mejorar el resultado y se deja de recorrer.
+"""
+from bisect import bisect_left, insort
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from catalogo.columnas import valor_clave
+from catalogo.geo import coordenadas_de, distancia_km
+
+VENTANA_PRECIO = 0.3
+
+# Peso de cada diferencia (normalizada a [0, 1]) en la distancia total
+PESO_PRECIO = 0.35
+PESO_METROS = 0.25
+PESO_HABITACIONES = 0.15
+PESO_UBICACION = 0.25
+HABITACIONES_ESCALA = 3
+KM_ESCALA = 10.0
+# Sin coordenadas de alguno de los dos no se premia ni se castiga
+DIFERENCIA_UBICACION_DESCONOCIDA = 0.5
+
+ClaveGrupo = Tuple[str, str]
+
+
+def _clave_grupo(registro: dict) -> ClaveGrupo:
+    return valor_clave(registro["tipo"]), valor_clave(registro["operacion"])
+
+
+Rasgos = Tuple[float, float, int, Optional[Tuple[float, float]]]
+
+
+def rasgos(registro: dict) -> Rasgos:
+    """Lo que compara `diferencia`: precio, metros, habitaciones y coordenadas"""
+    return registro["precio"], registro["metros"], registro["habitaciones"], coordenadas_de(registro)
+
+
+def diferencia_rasgos(base: Rasgos, otro: Rasgos) -> float:
+    precio_base, metros_base, habitaciones_base, punto_base = base
+    precio_otro, metros_otro, habitaciones_otro, punto_otro = otro
+    precio = min(1.0, abs(precio_otro - precio_base) / max(precio_base * VENTANA_PRECIO, 1.0))
+    metros = min(1.0, abs(metros_otro - metros_base) / max(metros_base, 1.0))
+    habitaciones = min(1.0, abs(habitaciones_otro - habitaciones_base) / HABITACIONES_ESCALA)
+
+    if punto_base is None or punto_otro is None:
+        ubicacion = DIFERENCIA_UBICACION_DESCONOCIDA
+    else:
+        ubicacion = min(1.0, distancia_km(*punto_base, *punto_otro) / KM_ESCALA)
+
+    return (PESO_PRECIO * precio + PESO_METROS * metros
+            + PESO_HABITACIONES * habitaciones + PESO_UBICACION * ubicacion)
+
+
+def diferencia(base: dict, otro: dict) -> float:
+    """Distancia ponderada entre dos propiedades: 0 es idéntica, 1 la máxima"""
+    return diferencia_rasgos(rasgos(base), rasgos(otro))
+
+
+class IndiceSimilitud:
+    def __init__(self):
+        self._grupos: Dict[ClaveGrupo, List[Tuple[float, int]]] = {}
+        # slot -> (grupo, precio) de lo indexado, para poder quitarlo
+        self._entradas: Dict[int, Tuple[ClaveGrupo, float]] = {}
+
+    def cargar(self, registros: List[dict]):
+        """Carga inicial: los slots son las posiciones en `registros`"""
+        for slot, registro in enumerate(registros):
+            if registro["estado"] == "disponible":
+                clave = _clave_grupo(registro)
+                self._grupos.setdefault(clave, []).append((registro["precio"], slot))
+                self._entradas[slot] = (clave, registro["precio"])
+        for lista in self._grupos.values():
+            lista.sort()
+
+    def agregar(self, slot: int, registro: dict):
+        if registro["estado"] == "disponible":
+            clave = _clave_grupo(registro)
+            insort(self._grupos.setdefault(clave, []), (registro["precio"], slot))
+            self._entradas[slot] = (clave, registro["precio"])
+
+    def actualizar(self, slot: int, registro: dict):
+        entrada = self._entradas.get(slot)
+        nueva = (_clave_grupo(registro), registro["precio"]) if registro["estado"] == "disponible" else None
+        if entrada == nueva:
+            return
+        if entrada is not None:
+            clave, precio = entrada
+            lista = self._grupos[clave]
+            del lista[bisect_left(lista, (precio, slot))]
+            del self._entradas[slot]
+        self.agregar(slot, registro)
+
+    def similares(self, base: dict, slot_base: Optional[int], registros: List[dict], limite: int) -> List[int]:
+        """Slots de las `limite` propiedades disponibles más parecidas a `base`"""
+        lista = self._grupos.get(_clave_grupo(base))
+        if not lista:
+            return []
+
+        # Los rasgos de la base se leen una vez para todos los candidatos
+        rasgos_base = rasgos(base)
+        precio = rasgos_base[0]
+        # Mismos límites que el BETWEEN de Postgres
+        minimo = precio - precio * VENTANA_PRECIO
+        maximo = precio + precio * VENTANA_PRECIO
+        escala_precio = max(precio * VENTANA_PRECIO, 1.0)
+
+        # Los `limite` mejores como heap del peor: (-puntaje, -slot)
+        mejores: List[Tuple[float, int]] = []
+        # Desde el precio base hacia los dos lados, primero el más cercano
+        izquierda = bisect_left(lista, (precio, -1))
+        derecha = izquierda
+        while limite > 0:
+            puede_izquierda = izquierda > 0 and lista[izquierda - 1][0] >= minimo
+            puede_derecha = derecha < len(lista) and lista[derecha][0] <= maximo
+            if puede_izquierda and (not puede_derecha or precio - lista[izquierda - 1][0] <= lista[derecha][0] - precio):
+                izquierda -= 1
+                precio_otro, slot = lista[izquierda]
+            elif puede_derecha:
+                precio_otro, slot = lista[derecha]
+                derecha += 1
+            else:
+                break
+            if slot == slot_base:
+                continue
+            if len(mejores) == limite:
+                # Estrictamente mayor: a igual puntaje todavía puede ganar por id
+                cota = PESO_PRECIO * min(1.0, abs(precio_otro - precio) / escala_precio)
+                if cota > -mejores[0][0]:
+                    break
+            puntaje = diferencia_rasgos(rasgos_base, rasgos(registros[slot]))
+            if len(mejores) < limite:
+                heapq.heappush(mejores, (-puntaje, -slot))
+            elif (puntaje, slot) < (-mejores[0][0], -mejores[0][1]):
+                heapq.heapreplace(mejores, (-puntaje, -slot))
+
+        return [-slot for _, slot in sorted(mejores, reverse=True)]
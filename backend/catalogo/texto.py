@@ -0,0 +1,163 @@
+"""
+Índice invertido para la búsqueda de texto libre.
+
+Título, descripción, ubicación y características se normalizan (minúsculas,
+sin acentos), se descartan las palabras vacías y se reducen con un stemmer
+liviano de español (plurales y género). Cada término guarda su lista de
+slots con la frecuencia ponderada por campo, y los resultados se ordenan por
+BM25. El índice se actualiza en cada alta o modificación; una búsqueda sólo
+recorre las listas de los términos consultados.
+"""
+from collections import Counter
+from functools import lru_cache
+import heapq
+import math
+import re
+import unicodedata
+from typing import Dict, List, Tuple
+
+# Peso de una aparición según el campo donde está
+PESOS_CAMPO = {
+    "titulo": 3.0,
+    "ubicacion": 2.0,
+    "caracteristicas": 1.5,
+    "descripcion": 1.0,
+}
+
+# Parámetros de BM25
+K1 = 1.2
+B = 0.75
+# La normalización por largo de cada documento se recalcula entera recién
+# cuando el largo medio del índice se corre más que esto
+TOLERANCIA_LARGO_MEDIO = 0.05
+
+PALABRAS_VACIAS = frozenset("""
+    a al algo ante como con contra cual de del desde donde e el ella ellos en
+    entre es esta este esto hay la las le les lo los mas me mi muy ni no nos
+    o para pero por que se sin sobre su sus tambien te tiene tu un una uno
+    unos unas y ya
+""".split())
+
+_PALABRA = re.compile(r"[a-z0-9]+")
+# Los diacríticos del español se quitan con una tabla; NFKD sólo si queda otro
+_SIN_ACENTOS = str.maketrans("áéíóúüñàèìòùâêîôûäëïö", "aeiouunaeiouaeiouaeio")
+
+
+def plegar(texto: str) -> str:
+    """Minúsculas y sin acentos ni diacríticos"""
+    texto = texto.lower().translate(_SIN_ACENTOS)
+    if texto.isascii():
+        return texto
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=65536)
+def raiz(palabra: str) -> str:
+    """Stemmer liviano: quita plural y género, que es lo que más varía en los avisos"""
+    if len(palabra) > 4:
+        if palabra.endswith("ces"):
+            return palabra[:-3] + "z"
+        if palabra.endswith(("os", "as", "es")):
+            palabra = palabra[:-2]
+        elif palabra.endswith(("o", "a", "e")):
+            palabra = palabra[:-1]
+    elif len(palabra) > 3 and palabra.endswith(("o", "a", "e", "s")):
+        palabra = palabra[:-1]
+    return palabra
+
+
+def analizar(texto: str) -> List[str]:
+    """Términos indexables de un texto"""
+    return [raiz(p) for p in _PALABRA.findall(plegar(texto)) if p not in PALABRAS_VACIAS]
+
+
+def _frecuencias(registro: dict) -> Dict[str, float]:
+    frecuencias: Dict[str, float] = {}
+    for campo, peso in PESOS_CAMPO.items():
+        valor = registro.get(campo) or ""
+        if isinstance(valor, (list, tuple)):
+            valor = " ".join(valor)
+        for termino, veces in Counter(analizar(valor)).items():
+            frecuencias[termino] = frecuencias.get(termino, 0.0) + peso * veces
+    return frecuencias
+
+
+class IndiceTexto:
+    def __init__(self):
+        self._listas: Dict[str, Dict[int, float]] = {}
+        # slot -> frecuencias de sus términos, para poder quitarlo
+        self._documentos: Dict[int, Dict[str, float]] = {}
+        self._largos: Dict[int, float] = {}
+        self._largo_total = 0.0
+        # slot -> K1 * (1 - B + B * largo / largo_medio), según `_largo_medio`
+        self._normalizaciones: Dict[int, float] = {}
+        self._largo_medio = 0.0
+
+    def cargar(self, registros: List[dict]):
+        inicio = len(self._documentos)
+        for slot, registro in enumerate(registros, start=inicio):
+            self.agregar(slot, registro)
+
+    def agregar(self, slot: int, registro: dict):
+        frecuencias = _frecuencias(registro)
+        for termino, frecuencia in frecuencias.items():
+            self._listas.setdefault(termino, {})[slot] = frecuencia
+        self._documentos[slot] = frecuencias
+        largo = sum(frecuencias.values())
+        self._largos[slot] = largo
+        self._largo_total += largo
+        if self._largo_medio:
+            self._normalizaciones[slot] = self._normalizacion(largo)
+
+    def actualizar(self, slot: int, registro: dict):
+        frecuencias = _frecuencias(registro)
+        anteriores = self._documentos.get(slot)
+        if frecuencias == anteriores:
+            return
+        if anteriores is not None:
+            for termino in anteriores:
+                lista = self._listas[termino]
+                del lista[slot]
+                if not lista:
+                    del self._listas[termino]
+            self._largo_total -= self._largos[slot]
+        self.agregar(slot, registro)
+
+    def _normalizacion(self, largo: float) -> float:
+        return K1 * (1 - B + B * largo / self._largo_medio)
+
+    def _recalibrar(self, documentos: int):
+        largo_medio = self._largo_total / documentos or 1.0
+        if abs(largo_medio - self._largo_medio) > TOLERANCIA_LARGO_MEDIO * largo_medio:
+            self._largo_medio = largo_medio
+            self._normalizaciones = {slot: self._normalizacion(largo) for slot, largo in self._largos.items()}
+
+    def buscar(self, consulta: str, candidatos: int, total_slots: int,
+               cantidad: int) -> Tuple[List[Tuple[float, int]], int]:
+        """
+        Puntúa con BM25 los slots del bitmap `candidatos` que contienen algún
+        término de la consulta. Devuelve los `cantidad` mejores como
+        (puntaje, slot) y cuántos coincidieron en total.
+        """
+        documentos = len(self._documentos)
+        if not documentos or not candidatos:
+            return [], 0
+        self._recalibrar(documentos)
+        normalizaciones = self._normalizaciones
+        todos = candidatos.bit_count() == total_slots
+        bits = candidatos.to_bytes((total_slots + 7) // 8, "little")
+
+        puntajes: Dict[int, float] = {}
+        for termino in set(analizar(consulta)):
+            lista = self._listas.get(termino)
+            if not lista:
+                continue
+            peso = (K1 + 1) * math.log(1 + (documentos - len(lista) + 0.5) / (len(lista) + 0.5))
+            for slot, frecuencia in lista.items():
+                if todos or bits[slot >> 3] >> (slot & 7) & 1:
+                    puntajes[slot] = puntajes.get(slot, 0.0) + peso * frecuencia / (frecuencia + normalizaciones[slot])
+
+        # Mayor puntaje primero; a igualdad, el slot más antiguo
+        mejores = heapq.nsmallest(cantidad, ((-puntaje, slot) for slot, puntaje in puntajes.items()))
+        return [(-puntaje, slot) for puntaje, slot in mejores], len(puntajes)
@@ -0,0 +1,164 @@
+"""
+Clasificador de intenciones del chatbot en una sola pasada.
+
+Los patrones de PATRONES_INTENCION usan un subconjunto chico de regex
+(literales, clases como [ií] y el cuantificador ?), así que se expanden a
+palabras clave literales y se compilan en una única regex con forma de trie:
+en cada posición del mensaje el motor sigue una sola rama por carácter, y el
+costo depende del largo del mensaje y no de la cantidad de patrones. La regex
+va dentro de un lookahead, así que se prueba en cada posición y las palabras
+superpuestas también cuentan; en cada posición da la palabra más larga, y las
+palabras clave que son prefijos de ella salen de una tabla armada al
+compilar. Los patrones que no se pueden expandir se buscan aparte, cada uno
+con su propio lookahead.
+
+Cada patrón suma a lo sumo un punto por posición, aunque varias de sus
+palabras empiecen ahí ("casa" y "casas" de casas?), a cada intención que lo
+declara, y gana la de mayor puntaje. La confianza sale de la proporción de
+los puntos que se lleva la ganadora:
+
+    confianza = CONFIANZA_DEFAULT
+                + (CONFIANZA_MAXIMA - CONFIANZA_DEFAULT) * puntaje_ganadora / puntaje_total
+
+Sin coincidencias es CONFIANZA_DEFAULT (0.3); si sólo coincide una intención,
+CONFIANZA_MAXIMA (0.9), y baja a medida que otras intenciones compiten.
+"""
+from functools import lru_cache
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+INTENCION_DEFAULT = "default"
+CONFIANZA_DEFAULT = 0.3
+CONFIANZA_MAXIMA = 0.9
+TAMANO_CACHE = 4096
+
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_mensaje(mensaje: str) -> str:
+    return _ESPACIOS.sub(" ", mensaje.lower()).strip()
+
+
+def expandir_patron(patron: str) -> Optional[List[str]]:
+    """
+    Expande un patrón simple a todas las palabras literales que reconoce.
+    Devuelve None si usa sintaxis fuera del subconjunto soportado.
+    """
+    # En una búsqueda, un ".*" final no cambia qué mensajes coinciden
+    if patron.endswith(".*"):
+        patron = patron[:-2]
+
+    atomos: List[List[str]] = []
+    i = 0
+    while i < len(patron):
+        c = patron[i]
+        if c == "[":
+            cierre = patron.find("]", i)
+            if cierre == -1:
+                return None
+            clase = patron[i + 1:cierre]
+            if not clase or any(x in clase for x in "^-\\"):
+                return None
+            atomos.append(list(clase))
+            i = cierre + 1
+        elif c == "?":
+            if not atomos or "" in atomos[-1]:
+                return None
+            atomos[-1] = atomos[-1] + [""]
+            i += 1
+        elif c in ".*+()|{}\\^$":
+            return None
+        else:
+            atomos.append([c])
+            i += 1
+
+    palabras = [""]
+    for opciones in atomos:
+        palabras = [p + o for p in palabras for o in opciones]
+    return [p for p in palabras if p]
+
+
+def _regex_trie(palabras: Set[str]) -> str:
+    """Regex de un trie: ante prefijos comunes se prueba primero la palabra más larga"""
+    trie: Dict = {}
+    for palabra in palabras:
+        nodo = trie
+        for c in palabra:
+            nodo = nodo.setdefault(c, {})
+        nodo[""] = {}
+
+    def armar(nodo: Dict) -> str:
+        termina = "" in nodo
+        ramas = [re.escape(c) + armar(hijo) for c, hijo in sorted(nodo.items()) if c]
+        if not ramas:
+            return ""
+        if len(ramas) == 1 and not termina:
+            return ramas[0]
+        return "(?:" + "|".join(ramas) + ")" + ("?" if termina else "")
+
+    return armar(trie)
+
+
+class ClasificadorIntenciones:
+    def __init__(self, patrones: Dict[str, List[str]]):
+        self.intenciones = list(patrones)
+        por_palabra: Dict[str, Set[str]] = {}
+        crudos: Dict[str, List[str]] = {}
+        intenciones_patron: Dict[str, List[str]] = {}
+
+        for intencion, lista in patrones.items():
+            for patron in lista:
+                intenciones_patron.setdefault(patron, []).append(intencion)
+                palabras = expandir_patron(patron)
+                if palabras is None:
+                    crudos[patron] = intenciones_patron[patron]
+                    continue
+                for palabra in palabras:
+                    por_palabra.setdefault(palabra, set()).add(patron)
+
+        # Palabra más larga en una posición -> un punto por intención de cada patrón
+        # con alguna palabra clave que empieza ahí (ella y las que son prefijos suyos)
+        self._por_palabra: Dict[str, List[str]] = {}
+        for palabra in por_palabra:
+            coincidentes = set().union(*(
+                por_palabra[palabra[:n]] for n in range(1, len(palabra) + 1) if palabra[:n] in por_palabra
+            ))
+            self._por_palabra[palabra] = [
+                intencion for patron in sorted(coincidentes) for intencion in intenciones_patron[patron]
+            ]
+        self._regex = re.compile(f"(?=({_regex_trie(set(por_palabra))}))") if por_palabra else None
+        self._crudos: List[Tuple[re.Pattern, List[str]]] = [
+            (re.compile(f"(?=({patron}))"), intenciones) for patron, intenciones in crudos.items()
+        ]
+        self.clasificar_normalizado = lru_cache(maxsize=TAMANO_CACHE)(self._clasificar)
+
+    def puntajes(self, mensaje_normalizado: str) -> Dict[str, int]:
+        """Coincidencias por intención: una por patrón y posición, también superpuestas"""
+        puntajes: Dict[str, int] = {}
+        if self._regex is not None:
+            for m in self._regex.finditer(mensaje_normalizado):
+                for intencion in self._por_palabra[m.group(1)]:
+                    puntajes[intencion] = puntajes.get(intencion, 0) + 1
+        for regex, intenciones in self._crudos:
+            coincidencias = sum(1 for _ in regex.finditer(mensaje_normalizado))
+            if coincidencias:
+                for intencion in intenciones:
+                    puntajes[intencion] = puntajes.get(intencion, 0) + coincidencias
+        return puntajes
+
+    def _clasificar(self, mensaje_normalizado: str) -> Tuple[str, float]:
+        puntajes = self.puntajes(mensaje_normalizado)
+        if not puntajes:
+            return INTENCION_DEFAULT, CONFIANZA_DEFAULT
+
+        # Mayor puntaje; a igualdad, la intención declarada primero
+        ganadora, puntaje = INTENCION_DEFAULT, 0
+        for intencion in self.intenciones:
+            if puntajes.get(intencion, 0) > puntaje:
+                ganadora, puntaje = intencion, puntajes[intencion]
+        proporcion = puntaje / sum(puntajes.values())
+        return ganadora, round(CONFIANZA_DEFAULT + (CONFIANZA_MAXIMA - CONFIANZA_DEFAULT) * proporcion, 3)
+
+    def clasificar(self, mensaje: str) -> Tuple[str, float]:
+        """Devuelve (intención, confianza) del mensaje"""
+        return self.clasificar_normalizado(normalizar_mensaje(mensaje))
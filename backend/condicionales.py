@@ -0,0 +1,83 @@
+"""
+Peticiones condicionales HTTP (ETag / Last-Modified).
+
+Los GET del catálogo responden con validadores derivados de la versión del
+catálogo o de la propiedad pedida. Si el cliente ya tiene esa versión
+(If-None-Match / If-Modified-Since) se contesta 304 antes de filtrar o
+serializar nada. Los ETag son débiles: las vistas cambian el cuerpo pero no
+la versión, y la respuesta sigue siendo equivalente.
+"""
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+import hashlib
+from typing import Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Se puede guardar (navegador o CDN) pero hay que revalidar en cada uso
+REVALIDAR = "no-cache"
+
+
+def _marca(fecha: datetime) -> str:
+    return format(int(fecha.timestamp() * 1_000_000), "x")
+
+
+def _sin_debil(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+class Validadores:
+    def __init__(self, etag: str, modificado: Optional[datetime] = None, cache_control: str = REVALIDAR):
+        self.etag = etag
+        self.modificado = modificado
+        self.cache_control = cache_control
+
+    @classmethod
+    def de_catalogo(cls, version: Tuple[int, datetime]) -> "Validadores":
+        """Para respuestas que dependen de todo el catálogo (listados, similares, estadísticas)"""
+        numero, modificado = version
+        return cls(f'W/"c{numero}-{_marca(modificado)}"', modificado)
+
+    @classmethod
+    def de_propiedad(cls, modificado: datetime) -> "Validadores":
+        return cls(f'W/"p{_marca(modificado)}"', modificado)
+
+    @classmethod
+    def de_contenido(cls, contenido: bytes, cache_control: str = REVALIDAR) -> "Validadores":
+        """ETag fuerte a partir del cuerpo, para respuestas fijas"""
+        return cls(f'"{hashlib.sha1(contenido).hexdigest()[:16]}"', cache_control=cache_control)
+
+    def vigente(self, request: Request) -> bool:
+        """Si la copia del cliente corresponde a esta versión"""
+        si_no_coincide = request.headers.get("if-none-match")
+        # Con If-None-Match se ignora If-Modified-Since (RFC 7232, 3.3)
+        if si_no_coincide is not None:
+            if si_no_coincide.strip() == "*":
+                return True
+            propio = _sin_debil(self.etag)
+            return any(_sin_debil(etag) == propio for etag in si_no_coincide.split(","))
+
+        si_modificado = request.headers.get("if-modified-since")
+        if si_modificado is None or self.modificado is None:
+            return False
+        try:
+            fecha = parsedate_to_datetime(si_modificado)
+        except (TypeError, ValueError):
+            return False
+        # Last-Modified tiene resolución de segundos
+        return int(self.modificado.timestamp()) <= fecha.timestamp()
+
+    def cabeceras(self) -> dict:
+        cabeceras = {"ETag": self.etag, "Cache-Control": self.cache_control}
+        if self.modificado is not None:
+            cabeceras["Last-Modified"] = formatdate(self.modificado.timestamp(), usegmt=True)
+        return cabeceras
+
+    def no_modificado(self) -> Response:
+        return Response(status_code=304, headers=self.cabeceras())
+
+    def aplicar(self, respuesta: Response) -> Response:
+        respuesta.headers.update(self.cabeceras())
+        return respuesta
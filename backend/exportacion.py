@@ -0,0 +1,80 @@
+"""
+Exportación del catálogo para portales asociados (NDJSON o CSV).
+
+El repositorio entrega las propiedades en lotes a medida que se consumen y
+acá cada lote se serializa y se envía antes de pedir el siguiente, así que
+nunca está el resultado completo en memoria. El CSV usa las mismas columnas
+que acepta la importación (coordenadas en lat/lng, listas separadas por
+"|"), más las de estado y fechas.
+"""
+from contextlib import aclosing
+import csv
+from datetime import datetime
+import io
+from typing import AsyncGenerator, AsyncIterator, Callable, List
+
+from catalogo.columnas import valor_clave
+from importacion import SEPARADOR_LISTAS
+
+COLUMNAS_CSV = (
+    "id", "clave_externa", "titulo", "descripcion", "precio", "ubicacion", "direccion",
+    "tipo", "operacion", "habitaciones", "banos", "metros", "metros_terreno", "antiguedad",
+    "expensas", "lat", "lng", "caracteristicas", "servicios", "imagenes", "estado",
+    "destacada", "agente_id", "fecha_publicacion", "fecha_actualizacion", "vistas",
+)
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, bool):
+        return "true" if valor else "false"
+    return valor_clave(valor)
+
+
+def fila_csv(registro: dict) -> list:
+    coordenadas = registro.get("coordenadas")
+    agente = registro.get("agente")
+    datos = {
+        **registro,
+        "lat": coordenadas["lat"] if coordenadas else None,
+        "lng": coordenadas["lng"] if coordenadas else None,
+        # En memoria el agente es un modelo; desde la base, un dict
+        "agente_id": agente["id"] if isinstance(agente, dict) else getattr(agente, "id", None),
+    }
+    for campo in ("caracteristicas", "servicios", "imagenes"):
+        datos[campo] = SEPARADOR_LISTAS.join(registro.get(campo) or [])
+    return [_valor_csv(datos.get(columna)) for columna in COLUMNAS_CSV]
+
+
+async def exportar_ndjson(lotes: AsyncIterator[List[dict]],
+                          a_json: Callable[[dict], bytes]) -> AsyncIterator[bytes]:
+    # Al cerrar la salida se cierran los lotes, y con ellos la conexión de la base
+    async with aclosing(lotes):
+        async for lote in lotes:
+            yield b"".join(a_json(registro) + b"\n" for registro in lote)
+
+
+async def exportar_csv(lotes: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    salida = io.StringIO()
+    escritor = csv.writer(salida, lineterminator="\r\n")
+    escritor.writerow(COLUMNAS_CSV)
+    async with aclosing(lotes):
+        async for lote in lotes:
+            escritor.writerows(fila_csv(registro) for registro in lote)
+            yield salida.getvalue().encode("utf-8")
+            salida.seek(0)
+            salida.truncate()
+    if salida.tell():
+        # Catálogo vacío: sólo el encabezado
+        yield salida.getvalue().encode("utf-8")
+
+
+async def cerrar(flujo: AsyncGenerator) -> None:
+    """
+    Tarea de fondo de la respuesta: corre aunque el cliente se desconecte a
+    mitad y libera los lotes (y la conexión de la base) sin esperar al GC
+    """
+    await flujo.aclose()
@@ -0,0 +1,72 @@
+"""
+Cuerpos de solicitud y respuesta procesados en streaming (NDJSON, CSV).
+"""
+import json
+import os
+from typing import AsyncIterator, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+# Una línea sin salto no puede acumularse sin límite: un cuerpo sin "\n" sería todo una línea
+MAX_LINEA = int(os.getenv("MAX_LINEA_BYTES", str(1024 * 1024)))
+ERROR_LINEA_LARGA = f"La línea supera los {MAX_LINEA} bytes"
+
+
+def codificar_ndjson(objetos: List[dict]) -> bytes:
+    return "".join(json.dumps(objeto, ensure_ascii=False, default=str) + "\n" for objeto in objetos).encode("utf-8")
+
+
+async def lineas(cuerpo: AsyncIterator[bytes], max_linea: int = MAX_LINEA) -> AsyncIterator[List[Optional[bytes]]]:
+    """
+    Agrupa el cuerpo en las líneas completas de cada bloque recibido. Se corta
+    por bytes: un salto de línea nunca forma parte de un carácter UTF-8 multibyte.
+    Una línea de más de `max_linea` bytes sale como None apenas se pasa del
+    límite, y el resto de esa línea se descarta hasta el próximo salto
+    """
+    # Partes de la línea en curso: se unen una sola vez, cuando llega su salto
+    pendiente: List[bytes] = []
+    largo = 0
+    descartando = False
+    async for bloque in cuerpo:
+        partes = bloque.split(b"\n")
+        ultima = partes.pop()
+        completas: List[Optional[bytes]] = []
+        for parte in partes:
+            if descartando:
+                # Ya salió como None al pasarse del límite
+                descartando = False
+            elif largo + len(parte) > max_linea:
+                completas.append(None)
+            elif pendiente:
+                pendiente.append(parte)
+                completas.append(b"".join(pendiente))
+            else:
+                completas.append(parte)
+            pendiente = []
+            largo = 0
+        if ultima and not descartando:
+            pendiente.append(ultima)
+            largo += len(ultima)
+            if largo > max_linea:
+                completas.append(None)
+                pendiente = []
+                largo = 0
+                descartando = True
+        if completas:
+            yield completas
+    if pendiente:
+        yield [b"".join(pendiente)]
+
+
+class RespuestaNDJSON(StreamingResponse):
+    """
+    StreamingResponse sin el listener de desconexión: ese listener también
+    consume `receive` y competiría con la lectura del cuerpo que se está procesando
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        async for bloque in self.body_iterator:
+            await send({"type": "http.response.body", "body": bloque, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
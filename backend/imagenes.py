@@ -0,0 +1,206 @@
+"""
+Imágenes subidas por los agentes: originales direccionados por contenido y
+miniaturas en varios tamaños.
+
+El cuerpo de la subida se escribe a disco a medida que llega, sin tenerlo
+entero en memoria, mientras se calcula su SHA-256. El hash es el nombre del
+archivo, así que una imagen repetida se guarda una sola vez. Las miniaturas
+se generan con Pillow en un pool de procesos, fuera del event loop. Cada
+archivo se escribe en un temporal y se renombra, de modo que dos subidas
+simultáneas de la misma imagen nunca dejan un archivo a medio escribir.
+
+Estructura en disco, servida en /uploads:
+    originales/ab/abcd…ef.jpg   (o .png, .webp, según el formato subido)
+    chica/ab/abcd…ef.jpg        (y mediana, grande: siempre JPEG)
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import logging
+import multiprocessing
+import os
+from typing import AsyncIterator, Dict, Optional, Tuple
+import uuid
+
+import aiofiles
+from fastapi.staticfiles import StaticFiles
+
+from miniaturas import TAMANOS, URL_BASE, urls_imagen
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO = os.getenv("UPLOADS_DIR", "uploads")
+TIPOS_PERMITIDOS = ("image/jpeg", "image/png", "image/webp")
+EXTENSIONES = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+TAMANO_MAXIMO = int(os.getenv("UPLOADS_MAX_BYTES", str(15 * 1024 * 1024)))
+# Una imagen chica en bytes puede descomprimirse a un tamaño enorme
+PIXELES_MAXIMOS = 50_000_000
+CALIDAD_JPEG = 82
+
+
+class ImagenInvalida(Exception):
+    pass
+
+
+class ImagenDemasiadoGrande(Exception):
+    pass
+
+
+def _ruta(directorio: str, carpeta: str, hash_imagen: str, extension: str) -> str:
+    return os.path.join(directorio, carpeta, hash_imagen[:2], f"{hash_imagen}.{extension}")
+
+
+def _guardar_jpeg(imagen, destino: str):
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporal = f"{destino}.{uuid.uuid4().hex}.tmp"
+    try:
+        imagen.save(temporal, "JPEG", quality=CALIDAD_JPEG, optimize=True, progressive=True)
+        os.replace(temporal, destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def procesar_imagen(ruta: str, hash_imagen: str, directorio: str) -> str:
+    """
+    Valida la imagen, genera las miniaturas que falten y devuelve la
+    extensión del original. Corre en el pool de procesos
+    """
+    # Import diferido: Pillow sólo hace falta en los procesos del pool
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = PIXELES_MAXIMOS
+    try:
+        with Image.open(ruta) as archivo:
+            formato = archivo.format
+            if formato not in EXTENSIONES:
+                raise ImagenInvalida(f"Formato no soportado: {formato}")
+            ancho, alto = archivo.size
+            if ancho * alto > PIXELES_MAXIMOS:
+                raise ImagenInvalida(f"La imagen supera los {PIXELES_MAXIMOS} píxeles")
+            # De mayor a menor: cada miniatura se reduce de la anterior
+            pendientes = [
+                (tamano, lado) for tamano, lado in reversed(TAMANOS.items())
+                if not os.path.exists(_ruta(directorio, tamano, hash_imagen, "jpg"))
+            ]
+            if not pendientes:
+                archivo.verify()
+                return EXTENSIONES[formato]
+            # En JPEG decodifica directamente a una escala reducida cercana a la mayor pendiente
+            lado_mayor = pendientes[0][1]
+            archivo.draft("RGB", (lado_mayor, lado_mayor))
+            imagen = ImageOps.exif_transpose(archivo)
+            if imagen.mode in ("RGBA", "LA") or (imagen.mode == "P" and "transparency" in imagen.info):
+                imagen = imagen.convert("RGBA")
+                fondo = Image.new("RGB", imagen.size, "white")
+                fondo.paste(imagen, mask=imagen.getchannel("A"))
+                imagen = fondo
+            elif imagen.mode != "RGB":
+                imagen = imagen.convert("RGB")
+            for tamano, lado in pendientes:
+                imagen.thumbnail((lado, lado), Image.LANCZOS)
+                _guardar_jpeg(imagen, _ruta(directorio, tamano, hash_imagen, "jpg"))
+            return EXTENSIONES[formato]
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ImagenInvalida(f"El archivo no es una imagen válida: {e}") from None
+
+
+class AlmacenImagenes:
+    def __init__(self, directorio: str = DIRECTORIO, procesos: Optional[int] = None):
+        self.directorio = directorio
+        self.procesos = procesos
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # hash -> procesamiento en curso, para no reducir dos veces la misma imagen a la vez
+        self._en_curso: Dict[str, asyncio.Future] = {}
+
+    def iniciar(self):
+        os.makedirs(os.path.join(self.directorio, "tmp"), exist_ok=True)
+
+    def cerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _ejecutor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: el proceso del servidor tiene hilos y hacer fork con hilos no es seguro
+            self._pool = ProcessPoolExecutor(self.procesos, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def guardar(self, cuerpo: AsyncIterator[bytes]) -> dict:
+        """Guarda la imagen y sus miniaturas; devuelve hash, URLs y si ya existía"""
+        temporal, hash_imagen = await self._recibir(cuerpo)
+        tarea = self._en_curso.get(hash_imagen)
+        duplicada = tarea is not None
+        if tarea is None:
+            # La tarea es dueña del temporal y lo borra al terminar
+            tarea = asyncio.ensure_future(self._procesar(temporal, hash_imagen))
+            self._en_curso[hash_imagen] = tarea
+            tarea.add_done_callback(lambda _: self._en_curso.pop(hash_imagen, None))
+        else:
+            os.remove(temporal)
+        # shield: si el cliente que la inició se desconecta, la tarea termina igual para los demás
+        extension, existia = await asyncio.shield(tarea)
+        url = f"{URL_BASE}/originales/{hash_imagen[:2]}/{hash_imagen}.{extension}"
+        return {"hash": hash_imagen, "duplicada": duplicada or existia, **urls_imagen(url)}
+
+    async def _recibir(self, cuerpo: AsyncIterator[bytes]) -> Tuple[str, str]:
+        """Escribe el cuerpo en un temporal (en el mismo disco, para renombrarlo) y calcula su hash"""
+        temporal = os.path.join(self.directorio, "tmp", f"{uuid.uuid4().hex}.subida")
+        resumen = hashlib.sha256()
+        tamano = 0
+        try:
+            async with aiofiles.open(temporal, "wb") as archivo:
+                async for bloque in cuerpo:
+                    tamano += len(bloque)
+                    if tamano > TAMANO_MAXIMO:
+                        raise ImagenDemasiadoGrande(f"La imagen supera los {TAMANO_MAXIMO} bytes")
+                    resumen.update(bloque)
+                    await archivo.write(bloque)
+            if not tamano:
+                raise ImagenInvalida("El cuerpo está vacío")
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        return temporal, resumen.hexdigest()
+
+    def _original(self, hash_imagen: str) -> Optional[str]:
+        """Extensión del original ya guardado con ese hash, si existe"""
+        for extension in EXTENSIONES.values():
+            if os.path.exists(_ruta(self.directorio, "originales", hash_imagen, extension)):
+                return extension
+        return None
+
+    async def _procesar(self, temporal: str, hash_imagen: str) -> Tuple[str, bool]:
+        try:
+            extension = self._original(hash_imagen)
+            miniaturas = all(
+                os.path.exists(_ruta(self.directorio, tamano, hash_imagen, "jpg")) for tamano in TAMANOS
+            )
+            if extension is not None and miniaturas:
+                return extension, True
+
+            loop = asyncio.get_running_loop()
+            extension = await loop.run_in_executor(
+                self._ejecutor(), procesar_imagen, temporal, hash_imagen, self.directorio
+            )
+            original = _ruta(self.directorio, "originales", hash_imagen, extension)
+            existia = os.path.exists(original)
+            if not existia:
+                os.makedirs(os.path.dirname(original), exist_ok=True)
+                os.replace(temporal, original)
+                logger.info("Imagen %s guardada", hash_imagen)
+            return extension, existia
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+
+class ArchivosInmutables(StaticFiles):
+    """Archivos estáticos direccionados por contenido: nunca cambian, se cachean un año"""
+
+    def file_response(self, *args, **kwargs):
+        respuesta = super().file_response(*args, **kwargs)
+        respuesta.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return respuesta
@@ -0,0 +1,207 @@
+"""
+Importación masiva de propiedades desde feeds de portales (NDJSON o CSV).
+
+El cuerpo se procesa a medida que llega: cada registro se valida por separado
+y los válidos se acumulan en lotes que el repositorio guarda de una vez
+(alta o actualización según la clave externa del agente). Por cada registro
+se responde una línea NDJSON con el id y la acción, o con el error de ese
+registro, y al final un resumen. Un registro inválido no corta el feed.
+Los errores de validación salen enseguida y los guardados cuando se escribe
+su lote, así que cada línea de la respuesta indica su número de registro.
+
+En memoria sólo viven el bloque recibido y el lote en curso, así que el
+consumo no depende del tamaño del archivo.
+
+En CSV la primera fila es el encabezado, con los nombres de los campos de
+PropiedadImportada; las coordenadas van en las columnas `lat` y `lng` y las
+listas (características, servicios, imágenes) separadas por "|".
+"""
+import csv
+import logging
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Set, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from flujos import ERROR_LINEA_LARGA, codificar_ndjson, lineas
+from models import PropiedadImportada
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 500
+SEPARADOR_LISTAS = "|"
+CAMPOS_LISTA = ("caracteristicas", "servicios", "imagenes")
+# Un registro CSV con comillas sin cerrar no puede acumular líneas sin límite
+MAX_LINEAS_REGISTRO = 200
+
+EscritorImportacion = Callable[[List[PropiedadImportada]], Awaitable[List[dict]]]
+
+_validador = TypeAdapter(PropiedadImportada)
+
+
+class Importacion:
+    """Lote en curso y totales de una importación"""
+
+    def __init__(self, escritor: EscritorImportacion, al_guardar: Callable[[], Awaitable[None]],
+                 tamano_lote: int = TAMANO_LOTE):
+        self.escritor = escritor
+        self.al_guardar = al_guardar
+        self.tamano_lote = tamano_lote
+        self._lote: List[Tuple[int, PropiedadImportada]] = []
+        self._claves: Set[Tuple[int, str]] = set()
+        self.registros = 0
+        self.creadas = 0
+        self.actualizadas = 0
+        self.errores = 0
+
+    def error(self, numero: int, detalle, clave_externa: Optional[str] = None) -> dict:
+        self.errores += 1
+        resultado = {"linea": numero, "error": detalle}
+        if clave_externa is not None:
+            resultado["clave_externa"] = clave_externa
+        return resultado
+
+    def rechazar(self, numero: int, detalle) -> dict:
+        """Registro que no llegó a validarse (CSV mal formado, codificación)"""
+        self.registros += 1
+        return self.error(numero, detalle)
+
+    async def agregar(self, numero: int, validar: Callable[[], PropiedadImportada]) -> List[dict]:
+        """Valida un registro y lo suma al lote; devuelve los resultados que ya estén listos"""
+        self.registros += 1
+        try:
+            propiedad = validar()
+        except ValidationError as e:
+            return [self.error(numero, e.errors(include_url=False))]
+
+        resultados = []
+        clave = (propiedad.agente_id, propiedad.clave_externa)
+        # Una clave repetida en el mismo lote se aplica después de la anterior, en orden
+        if clave in self._claves:
+            resultados.extend(await self.guardar())
+        self._lote.append((numero, propiedad))
+        self._claves.add(clave)
+        if len(self._lote) >= self.tamano_lote:
+            resultados.extend(await self.guardar())
+        return resultados
+
+    async def guardar(self) -> List[dict]:
+        if not self._lote:
+            return []
+        lote, self._lote = self._lote, []
+        self._claves = set()
+        try:
+            guardados = await self.escritor([propiedad for _, propiedad in lote])
+        except Exception:
+            logger.exception("No se pudo guardar un lote de %d propiedades importadas", len(lote))
+            return [self.error(numero, "No se pudo guardar el lote", propiedad.clave_externa)
+                    for numero, propiedad in lote]
+
+        resultados = []
+        escritas = 0
+        for (numero, propiedad), guardado in zip(lote, guardados):
+            if "error" in guardado:
+                resultados.append(self.error(numero, guardado["error"], propiedad.clave_externa))
+                continue
+            escritas += 1
+            if guardado["accion"] == "creada":
+                self.creadas += 1
+            else:
+                self.actualizadas += 1
+            resultados.append({"linea": numero, "clave_externa": propiedad.clave_externa, **guardado})
+        if escritas:
+            await self.al_guardar()
+        return resultados
+
+    def resumen(self) -> dict:
+        return {"resumen": {
+            "registros": self.registros,
+            "creadas": self.creadas,
+            "actualizadas": self.actualizadas,
+            "errores": self.errores,
+        }}
+
+
+async def importar_ndjson(cuerpo: AsyncIterator[bytes], importacion: Importacion) -> AsyncIterator[bytes]:
+    numero = 0
+    async for bloque in lineas(cuerpo):
+        salida = []
+        for linea in bloque:
+            numero += 1
+            if linea is None:
+                salida.append(importacion.rechazar(numero, ERROR_LINEA_LARGA))
+            elif linea.strip():
+                salida.extend(await importacion.agregar(numero, lambda: _validador.validate_json(linea)))
+        if salida:
+            yield codificar_ndjson(salida)
+    yield codificar_ndjson([*await importacion.guardar(), importacion.resumen()])
+
+
+def _datos_csv(encabezado: List[str], valores: List[str]) -> dict:
+    datos = {}
+    for campo, valor in zip(encabezado, valores):
+        valor = valor.strip()
+        if not valor:
+            continue
+        if campo in CAMPOS_LISTA:
+            datos[campo] = [elemento.strip() for elemento in valor.split(SEPARADOR_LISTAS) if elemento.strip()]
+        else:
+            datos[campo] = valor
+    if "lat" in datos or "lng" in datos:
+        datos["coordenadas"] = {"lat": datos.pop("lat", None), "lng": datos.pop("lng", None)}
+    return datos
+
+
+async def importar_csv(cuerpo: AsyncIterator[bytes], importacion: Importacion) -> AsyncIterator[bytes]:
+    encabezado: Optional[List[str]] = None
+    numero = 0
+    # Un campo entre comillas puede tener saltos de línea: el registro sigue
+    # abierto mientras la cantidad de comillas sea impar
+    pendiente: List[str] = []
+    inicio = 0
+
+    async for bloque in lineas(cuerpo):
+        salida = []
+        for linea in bloque:
+            numero += 1
+            if linea is None:
+                # Corta también el registro entre comillas que estuviera abierto
+                salida.append(importacion.rechazar(inicio if pendiente else numero, ERROR_LINEA_LARGA))
+                pendiente = []
+                continue
+            try:
+                texto = linea.decode("utf-8-sig")
+            except UnicodeDecodeError:
+                salida.append(importacion.rechazar(numero, "El registro no está en UTF-8"))
+                continue
+            if not pendiente:
+                inicio = numero
+            pendiente.append(texto)
+            completo = "\n".join(pendiente)
+            if completo.count('"') % 2:
+                if len(pendiente) < MAX_LINEAS_REGISTRO:
+                    continue
+                pendiente = []
+                salida.append(importacion.rechazar(inicio, "Comillas sin cerrar"))
+                continue
+            pendiente = []
+            if not completo.strip():
+                continue
+            valores = next(csv.reader([completo.rstrip("\r")]))
+
+            if encabezado is None:
+                encabezado = [campo.strip() for campo in valores]
+                continue
+            if len(valores) != len(encabezado):
+                salida.append(importacion.rechazar(
+                    inicio, f"Se esperaban {len(encabezado)} columnas y hay {len(valores)}"
+                ))
+                continue
+            datos = _datos_csv(encabezado, valores)
+            salida.extend(await importacion.agregar(inicio, lambda: _validador.validate_python(datos)))
+        if salida:
+            yield codificar_ndjson(salida)
+
+    final = await importacion.guardar()
+    if pendiente:
+        final.append(importacion.rechazar(inicio, "Comillas sin cerrar al final del archivo"))
+    yield codificar_ndjson([*final, importacion.resumen()])
@@ -1,12 +1,17 @@
 from fastapi import FastAPI, HTTPException, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from typing import Optional, List
 import uvicorn
 from datetime import datetime
 
 # Importar rutas
-from routes.propiedades import router as propiedades_router
-from routes.chatbot import router as chatbot_router
+from routes.propiedades import router as propiedades_router, repositorio, cache
+from routes.chatbot import router as chatbot_router, conversaciones
+from routes.imagenes import router as imagenes_router, almacen as almacen_imagenes
+from imagenes import ArchivosInmutables
+from miniaturas import URL_BASE as URL_UPLOADS
+from metricas import MiddlewareMetricas, registro as registro_metricas
 
 # Crear la aplicación FastAPI
 app = FastAPI(
@@ -24,9 +29,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latencia, cantidad y tamaño de las solicitudes por ruta, expuestos en /metrics
+app.add_middleware(MiddlewareMetricas)
+
 # Incluir routers
 app.include_router(propiedades_router, prefix="/api/propiedades", tags=["propiedades"])
 app.include_router(chatbot_router, prefix="/api/chatbot", tags=["chatbot"])
+app.include_router(imagenes_router, prefix="/api/imagenes", tags=["imagenes"])
+
+# Imágenes subidas y sus miniaturas (en producción conviene servirlas desde Nginx)
+app.mount(URL_UPLOADS, ArchivosInmutables(directory=almacen_imagenes.directorio, check_dir=False), name="uploads")
+
+# Ciclo de vida: abrir y cerrar el pool de conexiones del repositorio y el cache
+@app.on_event("startup")
+async def iniciar_servicios():
+    await repositorio.iniciar()
+    conversaciones.iniciar()
+    almacen_imagenes.iniciar()
+
+@app.on_event("shutdown")
+async def detener_servicios():
+    # Primero se guardan las conversaciones encoladas, con el pool todavía abierto
+    await conversaciones.detener()
+    await repositorio.cerrar()
+    await cache.cerrar()
+    almacen_imagenes.cerrar()
 
 # Endpoint de salud
 @app.get("/")
@@ -49,6 +76,21 @@ async def health_check():
         }
     }
 
+# Estado del cache y del registro de conversaciones, leído al exponer
+registro_metricas.funcion("inmomax_cache_aciertos_total", "Listados servidos desde el cache",
+                          lambda: cache.aciertos, "counter")
+registro_metricas.funcion("inmomax_cache_fallos_total", "Listados que no estaban en el cache",
+                          lambda: cache.fallos, "counter")
+registro_metricas.funcion("inmomax_conversaciones_pendientes", "Conversaciones encoladas sin guardar",
+                          lambda: conversaciones.pendientes)
+registro_metricas.funcion("inmomax_conversaciones_descartadas_total", "Conversaciones descartadas por cola llena",
+                          lambda: conversaciones.descartadas, "counter")
+
+@app.get("/metrics", include_in_schema=False)
+async def metricas():
+    """Métricas en formato de texto de Prometheus"""
+    return PlainTextResponse(registro_metricas.exponer(), media_type="text/plain; version=0.0.4")
+
 # Manejo de errores globales
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
@@ -0,0 +1,225 @@
+"""
+Métricas de la API en formato Prometheus.
+
+Un middleware ASGI registra por ruta (la plantilla, no la URL) la cantidad de
+solicitudes por estado, el histograma de latencia y los tamaños de solicitud
+y respuesta, más las solicitudes en curso. `medir` cronometra fases internas
+(filtrar, ordenar, serializar, detectar intención...) en un histograma por
+fase. Todo se acumula en memoria del proceso con sumas y una búsqueda binaria
+por observación; el texto para /metrics recién se arma cuando se pide.
+"""
+from bisect import bisect_left
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+BUCKETS_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_FASE = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+BUCKETS_TAMANO = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Etiqueta de las solicitudes que no coinciden con ninguna ruta (404, estáticos)
+SIN_RUTA = "sin_ruta"
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    partes = [f'{nombre}="{_escapar(str(valor))}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for valores, serie in sorted(self._series.items()):
+            lineas.extend(self._lineas(valores, serie))
+        return lineas
+
+    def _lineas(self, valores, serie) -> List[str]:
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(serie[0])}"]
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, valores: Tuple[str, ...] = (), cantidad: float = 1):
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [0]
+        serie[0] += cantidad
+
+
+class Medidor(Contador):
+    tipo = "gauge"
+
+    def dec(self, valores: Tuple[str, ...] = (), cantidad: float = 1):
+        self.inc(valores, -cantidad)
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (),
+                 buckets: Sequence[float] = BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valores: Tuple[str, ...], valor: float):
+        serie = self._series.get(valores)
+        if serie is None:
+            # Conteo por bucket (no acumulado; se acumula al exponer), suma y total
+            serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        serie[0][bisect_left(self.buckets, valor)] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+    def _lineas(self, valores, serie) -> List[str]:
+        conteos, suma, total = serie
+        lineas = []
+        acumulado = 0
+        for limite, conteo in zip((*self.buckets, "+Inf"), conteos):
+            acumulado += conteo
+            le = f'le="{limite}"'
+            lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}")
+        lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {_numero(suma)}")
+        lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {total}")
+        return lineas
+
+
+class _Funcion(_Metrica):
+    """Valor que se lee recién al exponer (contadores que ya lleva otro componente)"""
+
+    def __init__(self, nombre: str, ayuda: str, tipo: str, funcion: Callable[[], float]):
+        super().__init__(nombre, ayuda)
+        self.tipo = tipo
+        self.funcion = funcion
+
+    def exponer(self) -> List[str]:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}",
+                f"{self.nombre} {_numero(self.funcion())}"]
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas: List[_Metrica] = []
+
+    def _agregar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()) -> Contador:
+        return self._agregar(Contador(nombre, ayuda, etiquetas))
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()) -> Medidor:
+        return self._agregar(Medidor(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (),
+                   buckets: Sequence[float] = BUCKETS_LATENCIA) -> Histograma:
+        return self._agregar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def funcion(self, nombre: str, ayuda: str, funcion: Callable[[], float], tipo: str = "gauge"):
+        self._agregar(_Funcion(nombre, ayuda, tipo, funcion))
+
+    def exponer(self) -> str:
+        lineas = []
+        for metrica in self._metricas:
+            lineas.extend(metrica.exponer())
+        return "\n".join(lineas) + "\n"
+
+
+registro = RegistroMetricas()
+
+SOLICITUDES = registro.contador(
+    "inmomax_http_solicitudes_total", "Solicitudes HTTP respondidas", ("metodo", "ruta", "estado"))
+LATENCIA = registro.histograma(
+    "inmomax_http_duracion_segundos", "Latencia de las solicitudes HTTP", ("metodo", "ruta"))
+EN_CURSO = registro.medidor(
+    "inmomax_http_solicitudes_en_curso", "Solicitudes HTTP en proceso", ("metodo",))
+TAMANO_SOLICITUD = registro.histograma(
+    "inmomax_http_solicitud_bytes", "Tamaño del cuerpo de las solicitudes", ("metodo", "ruta"), BUCKETS_TAMANO)
+TAMANO_RESPUESTA = registro.histograma(
+    "inmomax_http_respuesta_bytes", "Tamaño del cuerpo de las respuestas", ("metodo", "ruta"), BUCKETS_TAMANO)
+FASES = registro.histograma(
+    "inmomax_fase_duracion_segundos", "Duración de fases internas del procesamiento", ("fase",), BUCKETS_FASE)
+
+
+class medir:
+    """
+    Span liviano: `with medir("filtrar"): ...` suma la duración del bloque al
+    histograma de la fase. Se puede usar alrededor de código con await.
+    """
+    __slots__ = ("clave", "inicio")
+
+    def __init__(self, fase: str):
+        self.clave = (fase,)
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        FASES.observar(self.clave, time.perf_counter() - self.inicio)
+        return False
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI puro (sin BaseHTTPMiddleware, que agrega una tarea por
+    solicitud y rompe el streaming). La ruta se toma de scope["route"], que
+    FastAPI completa al enrutar, así que la cardinalidad queda acotada.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        inicio = time.perf_counter()
+        estado = 500
+        recibidos = 0
+        enviados = 0
+
+        async def recibir():
+            nonlocal recibidos
+            mensaje = await receive()
+            recibidos += len(mensaje.get("body", b""))
+            return mensaje
+
+        async def enviar(mensaje):
+            nonlocal estado, enviados
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                enviados += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        EN_CURSO.inc((metodo,))
+        try:
+            await self.app(scope, recibir, enviar)
+        finally:
+            EN_CURSO.dec((metodo,))
+            ruta = scope.get("route")
+            valores = (metodo, ruta.path if ruta is not None else SIN_RUTA)
+            SOLICITUDES.inc((*valores, str(estado)))
+            LATENCIA.observar(valores, time.perf_counter() - inicio)
+            TAMANO_SOLICITUD.observar(valores, recibidos)
+            TAMANO_RESPUESTA.observar(valores, enviados)
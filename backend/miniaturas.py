@@ -0,0 +1,28 @@
+"""
+Tamaños de las miniaturas y URLs de cada imagen por tamaño.
+
+Sin dependencias: lo usan tanto los modelos como la subida de imágenes.
+"""
+import re
+from typing import Dict
+
+URL_BASE = "/uploads"
+# Lado mayor de cada miniatura en píxeles
+TAMANOS = {"chica": 320, "mediana": 640, "grande": 1280}
+
+_URL_ORIGINAL = re.compile(r"^/uploads/originales/([0-9a-f]{2})/([0-9a-f]{64})\.[a-z]+$")
+
+
+def urls_imagen(url: str) -> Dict[str, str]:
+    """
+    URL del original y de cada miniatura. Las imágenes que no se subieron
+    acá (URLs externas o de ejemplo) no tienen miniaturas y repiten la original
+    """
+    coincidencia = _URL_ORIGINAL.match(url)
+    if coincidencia is None:
+        return {"original": url, **{tamano: url for tamano in TAMANOS}}
+    prefijo, hash_imagen = coincidencia.groups()
+    return {
+        "original": url,
+        **{tamano: f"{URL_BASE}/{tamano}/{prefijo}/{hash_imagen}.jpg" for tamano in TAMANOS}
+    }
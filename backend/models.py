@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, computed_field, validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
+from miniaturas import urls_imagen
+
 class TipoPropiedad(str, Enum):
     CASA = "casa"
     DEPARTAMENTO = "departamento"
@@ -21,12 +23,25 @@ class EstadoPropiedad(str, Enum):
     RESERVADA = "reservada"
     VENDIDA = "vendida"
     ALQUILADA = "alquilada"
+    INACTIVA = "inactiva"
 
 # Modelo para coordenadas geográficas
 class Coordenadas(BaseModel):
     lat: float = Field(..., ge=-90, le=90, description="Latitud")
     lng: float = Field(..., ge=-180, le=180, description="Longitud")
 
+# URLs de una imagen: el original y sus miniaturas
+class UrlsImagen(BaseModel):
+    original: str
+    chica: str = Field(..., description="Lado mayor de 320 px")
+    mediana: str = Field(..., description="Lado mayor de 640 px")
+    grande: str = Field(..., description="Lado mayor de 1280 px")
+
+# Respuesta de la subida de una imagen
+class ImagenSubida(UrlsImagen):
+    hash: str = Field(..., description="SHA-256 del original")
+    duplicada: bool = Field(False, description="La misma imagen ya estaba guardada")
+
 # Modelo para el agente inmobiliario
 class Agente(BaseModel):
     id: int
@@ -71,6 +86,11 @@ class PropiedadCreate(PropiedadBase):
     coordenadas: Optional[Coordenadas] = None
     agente_id: int
 
+# Propiedad de un feed de importación: la clave externa identifica la
+# publicación en el portal de origen (única por agente)
+class PropiedadImportada(PropiedadCreate):
+    clave_externa: str = Field(..., min_length=1, max_length=100)
+
 # Modelo completo de propiedad (respuesta)
 class Propiedad(PropiedadBase):
     id: int
@@ -84,10 +104,34 @@ class Propiedad(PropiedadBase):
     fecha_actualizacion: Optional[datetime] = None
     agente: Agente
     vistas: int = 0
+    clave_externa: Optional[str] = None
+
+    @computed_field
+    @property
+    def imagenes_tamanos(self) -> List[UrlsImagen]:
+        """URLs por tamaño de cada imagen, en el mismo orden que `imagenes`"""
+        return [UrlsImagen(**urls_imagen(url)) for url in self.imagenes]
 
     class Config:
         from_attributes = True
 
+# Propiedad reducida a lo que muestra la tarjeta del listado (campos=resumen)
+class PropiedadResumen(BaseModel):
+    id: int
+    titulo: str
+    precio: float
+    ubicacion: str
+    tipo: TipoPropiedad
+    operacion: TipoOperacion
+    habitaciones: int
+    banos: int
+    metros: float
+    imagen: Optional[str] = Field(None, description="Primera imagen, en el tamaño de las tarjetas (mediana)")
+    imagen_tamanos: Optional[UrlsImagen] = None
+    coordenadas: Optional[Coordenadas] = None
+    estado: EstadoPropiedad = EstadoPropiedad.DISPONIBLE
+    destacada: bool = False
+
 # Modelo para filtros de búsqueda
 class FiltrosPropiedad(BaseModel):
     tipo: Optional[TipoPropiedad] = None
@@ -100,9 +144,17 @@ class FiltrosPropiedad(BaseModel):
     metros_min: Optional[float] = Field(None, ge=0)
     metros_max: Optional[float] = Field(None, ge=0)
     featured: Optional[bool] = None
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
+    radio_km: Optional[float] = Field(None, gt=0)
+    lat_min: Optional[float] = Field(None, ge=-90, le=90)
+    lat_max: Optional[float] = Field(None, ge=-90, le=90)
+    lng_min: Optional[float] = Field(None, ge=-180, le=180)
+    lng_max: Optional[float] = Field(None, ge=-180, le=180)
     pagina: int = Field(1, ge=1)
     limite: int = Field(10, ge=1, le=100)
-    orden: str = Field("recientes", regex="^(recientes|precio-asc|precio-desc|metros-desc)$")
+    orden: str = Field("recientes", pattern="^(recientes|precio-asc|precio-desc|metros-desc|distancia)$")
+    cursor: Optional[str] = None
 
 # Modelo de respuesta para listado
 class PropiedadListResponse(BaseModel):
@@ -111,6 +163,7 @@ class PropiedadListResponse(BaseModel):
     pagina: int
     limite: int
     total_paginas: int
+    siguiente_cursor: Optional[str] = None
 
 # Modelo para el chatbot
 class MensajeChatbot(BaseModel):
@@ -124,14 +177,17 @@ class RespuestaChatbot(BaseModel):
     confianza: Optional[float] = None
     sugerencias: Optional[List[str]] = []
 
+class RespuestaChatbotLote(RespuestaChatbot):
+    intencion: Optional[str] = None
+
 # Modelo para contacto/consulta
 class Consulta(BaseModel):
     nombre: str = Field(..., min_length=2, max_length=100)
-    email: str = Field(..., regex=r'^[^@]+@[^@]+\.[^@]+$')
-    telefono: Optional[str] = Field(None, regex=r'^\+?[\d\s-()]+$')
+    email: str = Field(..., pattern=r'^[^@]+@[^@]+\.[^@]+$')
+    telefono: Optional[str] = Field(None, pattern=r'^\+?[\d\s()-]+$')
     mensaje: str = Field(..., min_length=10, max_length=1000)
     propiedad_id: Optional[int] = None
-    tipo_consulta: str = Field("general", regex="^(general|propiedad|visita|financiacion)$")
+    tipo_consulta: str = Field("general", pattern="^(general|propiedad|visita|financiacion)$")
 
 class ConsultaResponse(BaseModel):
     id: int
@@ -146,13 +202,28 @@ class EstadisticasPropiedad(BaseModel):
     precio_promedio: float
     propiedades_destacadas: int
 
+# Modelos para los conteos de la barra de filtros
+class RangoHistograma(BaseModel):
+    desde: float
+    hasta: float
+    cantidad: int
+
+class FacetasPropiedad(BaseModel):
+    total: int
+    tipo: dict
+    operacion: dict
+    habitaciones: dict
+    banos: dict
+    precio: List[RangoHistograma]
+    metros: List[RangoHistograma]
+
 # Modelo de usuario (para futuras implementaciones)
 class Usuario(BaseModel):
     id: int
     nombre: str
     email: str
     telefono: Optional[str] = None
-    tipo: str = Field("cliente", regex="^(cliente|agente|admin)$")
+    tipo: str = Field("cliente", pattern="^(cliente|agente|admin)$")
     fecha_registro: datetime
     activo: bool = True
 
@@ -163,7 +234,7 @@ class UsuarioLogin(BaseModel):
 
 class UsuarioCreate(BaseModel):
     nombre: str = Field(..., min_length=2, max_length=100)
-    email: str = Field(..., regex=r'^[^@]+@[^@]+\.[^@]+$')
+    email: str = Field(..., pattern=r'^[^@]+@[^@]+\.[^@]+$')
     password: str = Field(..., min_length=6)
     telefono: Optional[str] = None
 
@@ -0,0 +1,32 @@
+"""
+Repositorios de propiedades. Las rutas trabajan contra esta interfaz y el
+backend concreto se elige con la variable de entorno REPOSITORIO:
+
+- "memoria" (por defecto): almacén indexado en memoria con los datos de ejemplo
+- "postgres": PostgreSQL vía asyncpg, usando DATABASE_URL
+"""
+import os
+from typing import List
+
+from models import Agente
+from repositorios.cursores import Cursor, codificar_cursor, decodificar_cursor
+from repositorios.errores import AgenteInexistente, CursorInvalido
+from repositorios.memoria import RepositorioMemoria
+
+
+def crear_repositorio(registros: List[dict], agente: Agente):
+    if os.getenv("REPOSITORIO", "memoria") == "postgres":
+        # Import diferido: asyncpg sólo hace falta con base de datos
+        from repositorios.postgres import RepositorioPostgres
+        return RepositorioPostgres(
+            os.environ["DATABASE_URL"],
+            min_conexiones=int(os.getenv("DB_POOL_MIN", "2")),
+            max_conexiones=int(os.getenv("DB_POOL_MAX", "10"))
+        )
+    return RepositorioMemoria(registros, agente)
+
+
+__all__ = [
+    "AgenteInexistente", "Cursor", "CursorInvalido", "RepositorioMemoria",
+    "codificar_cursor", "crear_repositorio", "decodificar_cursor",
+]
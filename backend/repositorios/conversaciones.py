@@ -0,0 +1,83 @@
+"""
+Registro de conversaciones del chatbot con escritura diferida por lotes.
+
+Cada mensaje respondido se encola sin esperar (cola acotada); una tarea de
+fondo las inserta en lotes de hasta `tamano_lote`, apenas se junta un lote
+completo o cada `intervalo` segundos. Si la cola está llena la conversación
+se descarta y se cuenta: el chatbot nunca espera al registro. Al detener se
+vuelca lo que quede en la cola.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EscritorConversaciones = Callable[[List[dict]], Awaitable[None]]
+
+
+class RegistroConversaciones:
+    def __init__(self, escritor: EscritorConversaciones, capacidad: int = 10000,
+                 tamano_lote: int = 500, intervalo: float = 2.0):
+        self.escritor = escritor
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self._cola: asyncio.Queue = asyncio.Queue(maxsize=capacidad)
+        self._lote_listo = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._tarea: Optional[asyncio.Task] = None
+        self.guardadas = 0
+        self.descartadas = 0
+        self.fallidas = 0
+
+    def iniciar(self):
+        if self._tarea is None:
+            # El evento se crea acá para que quede en el loop que corre el ciclo
+            self._lote_listo = asyncio.Event()
+            self._tarea = asyncio.create_task(self._ciclo())
+
+    async def detener(self):
+        """Cancela el ciclo y vuelca todo lo encolado"""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        await self.vaciar()
+
+    def registrar(self, conversacion: dict) -> bool:
+        try:
+            self._cola.put_nowait(conversacion)
+        except asyncio.QueueFull:
+            self.descartadas += 1
+            return False
+        if self._cola.qsize() >= self.tamano_lote:
+            self._lote_listo.set()
+        return True
+
+    @property
+    def pendientes(self) -> int:
+        return self._cola.qsize()
+
+    async def vaciar(self):
+        async with self._lock:
+            while not self._cola.empty():
+                lote = [self._cola.get_nowait() for _ in range(min(self.tamano_lote, self._cola.qsize()))]
+                try:
+                    await self.escritor(lote)
+                    self.guardadas += len(lote)
+                except Exception:
+                    # Son registros de análisis: no se reintentan para no acumular sin límite
+                    self.fallidas += len(lote)
+                    logger.exception("No se pudieron guardar %d conversaciones", len(lote))
+
+    async def _ciclo(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._lote_listo.wait(), self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._lote_listo.clear()
+            await self.vaciar()
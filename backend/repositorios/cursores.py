@@ -0,0 +1,51 @@
+"""
+Cursores opacos para la paginación por keyset del listado.
+
+Un cursor guarda el criterio de orden, el valor de la columna de orden de la
+última propiedad entregada y su id; la página siguiente empieza justo después
+de ese par, sin importar cuántas páginas se recorrieron antes.
+"""
+import base64
+from datetime import datetime
+import json
+from typing import NamedTuple, Union
+
+from repositorios.errores import CursorInvalido
+
+CAMPO_ORDEN = {
+    "recientes": "fecha_publicacion",
+    "precio-asc": "precio",
+    "precio-desc": "precio",
+    "metros-desc": "metros",
+}
+
+
+class Cursor(NamedTuple):
+    orden: str
+    valor: Union[datetime, float]
+    id: int
+
+
+def codificar_cursor(orden: str, registro: dict) -> str:
+    valor = registro[CAMPO_ORDEN[orden]]
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    contenido = json.dumps({"o": orden, "v": valor, "id": registro["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(contenido.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(texto: str, orden: str) -> Cursor:
+    try:
+        relleno = "=" * (-len(texto) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(texto + relleno))
+        valor = datos["v"]
+        if CAMPO_ORDEN[datos["o"]] == "fecha_publicacion":
+            valor = datetime.fromisoformat(valor)
+        else:
+            valor = float(valor)
+        cursor = Cursor(datos["o"], valor, int(datos["id"]))
+    except (ValueError, KeyError, TypeError):
+        raise CursorInvalido("Cursor inválido")
+    if cursor.orden != orden:
+        raise CursorInvalido("El cursor corresponde a otro criterio de orden")
+    return cursor
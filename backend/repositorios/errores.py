@@ -0,0 +1,6 @@
+class AgenteInexistente(ValueError):
+    """El agente_id indicado no existe en la tabla de usuarios"""
+
+
+class CursorInvalido(ValueError):
+    """El cursor de paginación no se pudo decodificar o no corresponde a la consulta"""
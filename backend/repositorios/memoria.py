@@ -0,0 +1,201 @@
+"""
+Repositorio de propiedades en memoria sobre el almacén indexado del catálogo.
+Se usa con los datos de ejemplo y cuando no hay base de datos configurada.
+"""
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from catalogo import CAMPOS_RESUMEN, AlmacenPropiedades, clave_orden, iterar_bits, json_campos
+from metricas import medir
+from models import Agente, FiltrosPropiedad, Propiedad, PropiedadCreate, PropiedadImportada
+from repositorios.cursores import Cursor
+from repositorios.errores import CursorInvalido
+
+
+class RepositorioMemoria:
+    def __init__(self, registros: List[dict], agente: Agente):
+        self.almacen = AlmacenPropiedades(registros)
+        # Sin autenticación todas las altas quedan asignadas a este agente
+        self.agente = agente
+        # Agentes conocidos, para validar el agente_id de las importaciones
+        self.agentes: Dict[int, Agente] = {registro["agente"].id: registro["agente"] for registro in registros}
+        self.agentes[agente.id] = agente
+        # (agente, clave externa) -> id, para las importaciones desde portales
+        self._id_por_clave: Dict[Tuple[int, str], int] = {
+            (registro["agente"].id, registro["clave_externa"]): registro["id"]
+            for registro in registros if registro.get("clave_externa")
+        }
+        # Conversaciones del chatbot: sólo los agregados que usan las estadísticas
+        self._conversaciones = 0
+        self._conversaciones_por_intencion: Dict[str, int] = {}
+        self._tiempo_respuesta_total = 0.0
+
+    async def iniciar(self):
+        pass
+
+    async def cerrar(self):
+        pass
+
+    def modelo(self, registro: dict) -> Propiedad:
+        return self.almacen.serializados.modelo(registro)
+
+    def json(self, registro: dict, guardar: bool = True) -> bytes:
+        return self.almacen.serializados.json(registro, guardar)
+
+    def json_campos(self, registro: dict, campos: Sequence[str]) -> bytes:
+        """JSON con sólo esos campos; el de la vista resumida queda en el cache de serialización"""
+        if campos == CAMPOS_RESUMEN:
+            return self.almacen.serializados.resumen(registro)
+        return json_campos(registro, campos)
+
+    async def listar(self, filtros: FiltrosPropiedad,
+                     desde: Optional[Cursor] = None) -> Tuple[List[dict], int, bool]:
+        """
+        Devuelve la página pedida, el total de propiedades que cumplen los
+        filtros y si quedan más después de la página
+        """
+        with medir("filtrar"):
+            mascara = self.almacen.filtrar(filtros)
+            total = mascara.bit_count()
+
+        if desde is None:
+            inicio = (filtros.pagina - 1) * filtros.limite
+            origen = (filtros.lat, filtros.lng) if filtros.orden == "distancia" else None
+            with medir("ordenar"):
+                pagina = self.almacen.pagina(mascara, filtros.orden, inicio, filtros.limite, origen=origen)
+            return pagina, total, inicio + len(pagina) < total
+
+        # Los slots crecen con el id, así que (clave, slot) ordena igual que (valor, id)
+        slot = self.almacen.slot(desde.id)
+        if slot is None:
+            raise CursorInvalido("Cursor inválido")
+        clave = (clave_orden(filtros.orden, desde.valor), slot)
+        with medir("ordenar"):
+            pagina = self.almacen.pagina(mascara, filtros.orden, 0, filtros.limite + 1, clave)
+        return pagina[:filtros.limite], total, len(pagina) > filtros.limite
+
+    async def buscar(self, texto: str, filtros: FiltrosPropiedad) -> Tuple[List[dict], int]:
+        """Propiedades disponibles que cumplen los filtros, por relevancia"""
+        mascara = self.almacen.filtrar(filtros) & self.almacen.indice.estado.igual("disponible")
+        inicio = (filtros.pagina - 1) * filtros.limite
+        return self.almacen.buscar(texto, mascara, inicio, filtros.limite)
+
+    async def exportar(self, filtros: FiltrosPropiedad, desde: Optional[datetime] = None,
+                       tamano_lote: int = 500) -> Tuple[datetime, AsyncIterator[List[dict]]]:
+        """
+        Todas las propiedades que cumplen los filtros, por id, en lotes; con
+        `desde`, sólo las modificadas después. Entre lote y lote se cede el
+        loop, y los lotes se arman a medida que se consumen. Devuelve también
+        el `desde` de la próxima exportación incremental
+        """
+        # Las escrituras se fechan con este mismo reloj al aplicarse: las que
+        # pasen durante el recorrido quedan después de la marca
+        return datetime.now(), self._exportar(filtros, desde, tamano_lote)
+
+    async def _exportar(self, filtros: FiltrosPropiedad, desde: Optional[datetime],
+                        tamano_lote: int) -> AsyncIterator[List[dict]]:
+        mascara = self.almacen.filtrar(filtros)
+        lote = []
+        for slot in iterar_bits(mascara):
+            registro = self.almacen.registros[slot]
+            if desde is not None and (registro.get("fecha_actualizacion") or registro["fecha_publicacion"]) <= desde:
+                continue
+            lote.append(registro)
+            if len(lote) >= tamano_lote:
+                yield lote
+                lote = []
+                await asyncio.sleep(0)
+        if lote:
+            yield lote
+
+    async def obtener(self, propiedad_id: int) -> Optional[dict]:
+        return self.almacen.obtener(propiedad_id)
+
+    async def registrar_vista(self, propiedad_id: int) -> Optional[dict]:
+        return self.almacen.registrar_vista(propiedad_id)
+
+    async def contar_vista(self, propiedad_id: int):
+        self.almacen.registrar_vista(propiedad_id)
+
+    async def version(self) -> Tuple[int, datetime]:
+        """Versión del catálogo y fecha de la última escritura"""
+        return self.almacen.version, self.almacen.modificado
+
+    async def version_propiedad(self, propiedad_id: int) -> Optional[datetime]:
+        """Fecha de la última modificación de la propiedad, o None si no existe"""
+        registro = self.almacen.obtener(propiedad_id)
+        if registro is None:
+            return None
+        return registro.get("fecha_actualizacion") or registro["fecha_publicacion"]
+
+    async def crear(self, propiedad: PropiedadCreate) -> dict:
+        return self._alta(propiedad, self.agente)
+
+    def _alta(self, propiedad: PropiedadCreate, agente: Agente) -> dict:
+        return self.almacen.crear({
+            **propiedad.model_dump(exclude={"agente_id"}),
+            "estado": "disponible",
+            "destacada": False,
+            "fecha_publicacion": datetime.now(),
+            "agente": agente,
+            "vistas": 0
+        })
+
+    async def actualizar(self, propiedad_id: int, propiedad: PropiedadCreate) -> Optional[dict]:
+        return self.almacen.actualizar(propiedad_id, {
+            **propiedad.model_dump(exclude={"agente_id"}),
+            "fecha_actualizacion": datetime.now()
+        })
+
+    async def eliminar(self, propiedad_id: int) -> bool:
+        return self.almacen.eliminar(propiedad_id)
+
+    async def importar(self, lote: List[PropiedadImportada]) -> List[dict]:
+        """
+        Alta o actualización de cada propiedad según su clave externa, en orden.
+        Las de agentes inexistentes vuelven con error, igual que en Postgres
+        """
+        resultados = []
+        for propiedad in lote:
+            agente = self.agentes.get(propiedad.agente_id)
+            if agente is None:
+                resultados.append({"error": f"No existe el agente {propiedad.agente_id}"})
+                continue
+            clave = (propiedad.agente_id, propiedad.clave_externa)
+            propiedad_id = self._id_por_clave.get(clave)
+            if propiedad_id is not None and await self.actualizar(propiedad_id, propiedad) is not None:
+                resultados.append({"id": propiedad_id, "accion": "actualizada"})
+                continue
+            registro = self._alta(propiedad, agente)
+            self._id_por_clave[clave] = registro["id"]
+            resultados.append({"id": registro["id"], "accion": "creada"})
+        return resultados
+
+    async def similares(self, base: dict, limite: int) -> List[dict]:
+        """Mismo tipo y operación, precio dentro de ±30% y disponibles, por similitud"""
+        return self.almacen.similares(base, limite)
+
+    async def estadisticas(self) -> dict:
+        return self.almacen.estadisticas.resumen()
+
+    async def facetas(self, filtros: FiltrosPropiedad) -> dict:
+        """Conteos por faceta con los mismos filtros que el listado"""
+        return self.almacen.facetas(filtros)
+
+    async def guardar_conversaciones(self, lote: List[dict]):
+        for conversacion in lote:
+            intencion = conversacion["intencion"]
+            self._conversaciones += 1
+            self._conversaciones_por_intencion[intencion] = self._conversaciones_por_intencion.get(intencion, 0) + 1
+            self._tiempo_respuesta_total += conversacion["tiempo_respuesta"]
+
+    async def estadisticas_conversaciones(self) -> dict:
+        return {
+            "mensajes_procesados": self._conversaciones,
+            "por_intencion": dict(self._conversaciones_por_intencion),
+            "satisfaccion_promedio": None,
+            "tiempo_promedio_respuesta": (
+                self._tiempo_respuesta_total / self._conversaciones if self._conversaciones else 0
+            )
+        }
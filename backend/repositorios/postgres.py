@@ -0,0 +1,765 @@
+"""
+Repositorio de propiedades sobre PostgreSQL usando asyncpg.
+
+Todas las consultas corren sobre un pool de conexiones asíncronas, así que no
+bloquean el event loop. Filtros, orden y límites se resuelven en SQL para que
+apliquen los índices de db/schema.sql (idx_propiedades_tipo_operacion,
+idx_propiedades_precio, idx_propiedades_fecha_publicacion, ...), y las
+características, servicios e imágenes de una página se cargan con una consulta
+por tabla en lugar de una por propiedad.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+from catalogo.columnas import RANGOS_HISTOGRAMA_POR_OCTAVA, rango_histograma, valor_clave
+from catalogo.geo import RADIO_TIERRA_KM, caja_de_radio, coordenadas_de
+from catalogo.serializacion import json_campos
+from catalogo.similitud import (
+    DIFERENCIA_UBICACION_DESCONOCIDA, HABITACIONES_ESCALA, KM_ESCALA, PESO_HABITACIONES,
+    PESO_METROS, PESO_PRECIO, PESO_UBICACION, VENTANA_PRECIO
+)
+from metricas import medir
+from models import FiltrosPropiedad, Propiedad, PropiedadCreate, PropiedadImportada
+from repositorios.cursores import CAMPO_ORDEN, Cursor
+from repositorios.errores import AgenteInexistente
+from repositorios.vistas import ContadorVistas
+
+# Columnas de orden; `p.id` desempata igual que el orden de carga en memoria
+ORDEN_SQL = {
+    "recientes": "p.fecha_publicacion DESC, p.id",
+    "precio-asc": "p.precio ASC, p.id",
+    "precio-desc": "p.precio DESC, p.id",
+    "metros-desc": "p.metros DESC, p.id",
+}
+
+SELECT_PROPIEDADES = """
+    SELECT p.id, p.titulo, p.descripcion, p.precio, p.ubicacion, p.direccion,
+           p.tipo, p.operacion, p.habitaciones, p.banos, p.metros,
+           p.metros_terreno, p.antiguedad, p.expensas, p.estado, p.destacada,
+           p.coordenadas, p.fecha_publicacion, p.fecha_actualizacion, p.vistas, p.clave_externa,
+           u.id AS agente_id, u.nombre AS agente_nombre, u.email AS agente_email,
+           u.telefono AS agente_telefono, u.avatar AS agente_avatar
+    FROM propiedades p
+    LEFT JOIN usuarios u ON u.id = p.agente_id
+"""
+
+CONSULTAS_HIJOS = {
+    "caracteristicas": """
+        SELECT propiedad_id, caracteristica AS valor FROM caracteristicas_propiedad
+        WHERE propiedad_id = ANY($1::int[]) ORDER BY propiedad_id, id
+    """,
+    "servicios": """
+        SELECT propiedad_id, servicio AS valor FROM servicios_propiedad
+        WHERE propiedad_id = ANY($1::int[]) ORDER BY propiedad_id, id
+    """,
+    "imagenes": """
+        SELECT propiedad_id, url AS valor FROM imagenes_propiedad
+        WHERE propiedad_id = ANY($1::int[]) ORDER BY propiedad_id, orden, id
+    """,
+}
+
+INSERTS_HIJOS = {
+    "caracteristicas": """
+        INSERT INTO caracteristicas_propiedad (propiedad_id, caracteristica)
+        SELECT $1, unnest($2::text[])
+    """,
+    "servicios": """
+        INSERT INTO servicios_propiedad (propiedad_id, servicio)
+        SELECT $1, unnest($2::text[])
+    """,
+    "imagenes": """
+        INSERT INTO imagenes_propiedad (propiedad_id, url, orden)
+        SELECT $1, t.url, t.orden FROM unnest($2::text[]) WITH ORDINALITY AS t(url, orden)
+    """,
+}
+
+# Vuelco por lote de las vistas acumuladas: $1 ids, $2 cantidades
+ACTUALIZAR_VISTAS = """
+    UPDATE propiedades p SET vistas = p.vistas + v.cantidad
+    FROM unnest($1::int[], $2::int[]) AS v(id, cantidad)
+    WHERE p.id = v.id
+"""
+REGISTRAR_METRICAS_VISTAS = """
+    INSERT INTO metricas_propiedades (propiedad_id, vistas_diarias)
+    SELECT v.id, v.cantidad FROM unnest($1::int[], $2::int[]) AS v(id, cantidad)
+    ON CONFLICT (propiedad_id, fecha)
+    DO UPDATE SET vistas_diarias = metricas_propiedades.vistas_diarias + EXCLUDED.vistas_diarias
+"""
+
+# Inserción por lote de conversaciones del chatbot, una columna por parámetro
+INSERTAR_CONVERSACIONES = """
+    INSERT INTO conversaciones_chatbot
+        (usuario_id, mensaje_usuario, respuesta_bot, intencion_detectada, confianza, timestamp, tiempo_respuesta)
+    SELECT * FROM unnest($1::varchar[], $2::text[], $3::text[], $4::varchar[],
+                         $5::numeric[], $6::timestamp[], $7::real[])
+"""
+
+COLUMNAS_ESCRITURA = (
+    "titulo", "descripcion", "precio", "ubicacion", "direccion", "tipo",
+    "operacion", "habitaciones", "banos", "metros", "metros_terreno",
+    "antiguedad", "expensas", "coordenadas", "agente_id"
+)
+
+# Importación por lote: una fila por propiedad con un arreglo por columna (las
+# coordenadas van como lat/lng separados). Si el agente ya tiene esa clave
+# externa se actualiza; `xmax = 0` distingue las filas recién insertadas
+UPSERT_IMPORTACION = f"""
+    INSERT INTO propiedades ({", ".join(COLUMNAS_ESCRITURA)}, clave_externa)
+    SELECT v.titulo, v.descripcion, v.precio, v.ubicacion, v.direccion, v.tipo, v.operacion,
+           v.habitaciones, v.banos, v.metros, v.metros_terreno, v.antiguedad, v.expensas,
+           CASE WHEN v.lat IS NULL THEN NULL ELSE point(v.lng, v.lat) END, v.agente_id, v.clave_externa
+    FROM unnest($1::varchar[], $2::text[], $3::numeric[], $4::varchar[], $5::varchar[],
+                $6::varchar[], $7::varchar[], $8::int[], $9::int[], $10::numeric[],
+                $11::numeric[], $12::int[], $13::numeric[], $14::float8[], $15::float8[],
+                $16::int[], $17::varchar[])
+         AS v(titulo, descripcion, precio, ubicacion, direccion, tipo, operacion,
+              habitaciones, banos, metros, metros_terreno, antiguedad, expensas,
+              lat, lng, agente_id, clave_externa)
+    ON CONFLICT (agente_id, clave_externa) DO UPDATE SET
+        {", ".join(f"{columna} = EXCLUDED.{columna}" for columna in COLUMNAS_ESCRITURA if columna != "agente_id")}
+    RETURNING id, agente_id, clave_externa, xmax = 0 AS creada
+"""
+
+# Tabla y columnas de cada lista hija, para COPY
+TABLAS_HIJOS = {
+    "caracteristicas": ("caracteristicas_propiedad", ["propiedad_id", "caracteristica"]),
+    "servicios": ("servicios_propiedad", ["propiedad_id", "servicio"]),
+    "imagenes": ("imagenes_propiedad", ["propiedad_id", "url", "orden"]),
+}
+
+# Agente que se informa cuando la propiedad quedó sin agente asignado
+AGENTE_SIN_ASIGNAR = {
+    "id": 0,
+    "nombre": "InmoMax",
+    "email": "info@inmomax.com",
+    "telefono": "+54 341 123-4567",
+    "avatar": None
+}
+
+
+def _decimal(valor) -> Optional[Decimal]:
+    """Los parámetros numéricos van como Decimal para no perder el índice sobre DECIMAL"""
+    return Decimal(str(valor)) if valor is not None else None
+
+
+def _float(valor) -> Optional[float]:
+    return float(valor) if valor is not None else None
+
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# Valor por el que se agrupa cada faceta; precio y metros por rango de
+# media octava, igual que el histograma del índice en memoria
+_RANGO_SQL = f"floor(ln({{0}}::float8) / ln(2) * {RANGOS_HISTOGRAMA_POR_OCTAVA})::int"
+COLUMNAS_FACETA = {
+    "tipo": "p.tipo",
+    "operacion": "p.operacion",
+    "habitaciones": "p.habitaciones",
+    "banos": "p.banos",
+    "precio": _RANGO_SQL.format("p.precio"),
+    "metros": _RANGO_SQL.format("p.metros"),
+}
+
+ACTUALIZAR_BUSQUEDA = "SELECT actualizar_busqueda_propiedad($1)"
+
+# Consulta de texto con los términos unidos por OR: BM25 en memoria tampoco
+# exige que estén todos, sólo puntúa más a quien tiene más
+CONSULTA_TEXTO = "replace(plainto_tsquery('spanish', unaccent({0}))::text, '&', '|')::tsquery"
+
+
+# `desde` de la próxima exportación incremental, con el reloj de la base. Las
+# filas se fechan con el inicio de la transacción que las escribe, así que una
+# transacción abierta antes de la exportación puede confirmar después con una
+# fecha anterior. La marca queda MARGEN_EXPORTACION antes del inicio de la
+# consulta: sólo se pierde una fila si su transacción dura más que el margen,
+# y las escritas dentro del margen se vuelven a exportar la próxima vez (los
+# portales las aplican por id, así que repetirlas no cambia nada)
+MARGEN_EXPORTACION = timedelta(minutes=5)
+MARCA_EXPORTACION = "SELECT (transaction_timestamp() - $1::interval)::timestamp"
+
+
+def distancia_sql(lat: str, lng: str) -> str:
+    """Haversine en km desde p.coordenadas (x = lng, y = lat) hasta el punto dado"""
+    return (
+        f"2 * {RADIO_TIERRA_KM} * asin(sqrt(LEAST(1, "
+        f"power(sin(radians(p.coordenadas[1] - {lat}) / 2), 2) + "
+        f"cos(radians({lat})) * cos(radians(p.coordenadas[1])) * "
+        f"power(sin(radians(p.coordenadas[0] - {lng}) / 2), 2))))"
+    )
+
+
+def construir_condiciones(filtros: FiltrosPropiedad,
+                          desde: Optional[Cursor] = None) -> Tuple[List[Tuple[str, str]], list]:
+    """
+    Condiciones parametrizadas de los filtros (y del cursor, si hay), cada una
+    con la faceta a la que pertenece; "" para las que no son de ninguna
+    """
+    condiciones = []
+    parametros = []
+
+    def agregar(condicion: str, valor, faceta: str = ""):
+        parametros.append(valor)
+        condiciones.append((faceta, condicion.replace("?", f"${len(parametros)}")))
+
+    def agregar_varios(condicion: str, *valores):
+        inicio = len(parametros) + 1
+        parametros.extend(valores)
+        condiciones.append(("", condicion.format(*(f"${inicio + i}::float8" for i in range(len(valores))))))
+
+    if filtros.tipo:
+        agregar("p.tipo = ?", valor_clave(filtros.tipo), "tipo")
+    if filtros.operacion:
+        agregar("p.operacion = ?", valor_clave(filtros.operacion), "operacion")
+    if filtros.ubicacion:
+        agregar("p.ubicacion ILIKE ? ESCAPE '\\'", f"%{_escapar_like(filtros.ubicacion)}%")
+    if filtros.precio_min:
+        agregar("p.precio >= ?", _decimal(filtros.precio_min), "precio")
+    if filtros.precio_max:
+        agregar("p.precio <= ?", _decimal(filtros.precio_max), "precio")
+    if filtros.habitaciones:
+        agregar("p.habitaciones >= ?", filtros.habitaciones, "habitaciones")
+    if filtros.banos:
+        agregar("p.banos >= ?", filtros.banos, "banos")
+    if filtros.metros_min:
+        agregar("p.metros >= ?", _decimal(filtros.metros_min), "metros")
+    if filtros.metros_max:
+        agregar("p.metros <= ?", _decimal(filtros.metros_max), "metros")
+    if filtros.featured is not None:
+        agregar("p.destacada = ?", filtros.featured)
+
+    # Zona y radio: la caja usa idx_propiedades_coordenadas (GIST) y el radio
+    # se afina con la distancia exacta sobre lo que queda dentro de su caja
+    caja_sql = "p.coordenadas <@ box(point({2}, {0}), point({3}, {1}))"
+    if filtros.lat_min is not None:
+        agregar_varios(caja_sql, filtros.lat_min, filtros.lat_max, filtros.lng_min, filtros.lng_max)
+    if filtros.radio_km is not None:
+        agregar_varios(caja_sql, *caja_de_radio(filtros.lat, filtros.lng, filtros.radio_km))
+        agregar_varios(f"{distancia_sql('{0}', '{1}')} <= {{2}}", filtros.lat, filtros.lng, filtros.radio_km)
+
+    # Keyset: posteriores a (valor, id) del cursor. La primera condición acota
+    # el rango sobre el índice de la columna de orden; la segunda desempata.
+    if desde is not None:
+        columna = f"p.{CAMPO_ORDEN[filtros.orden]}"
+        comparacion = "<" if ORDEN_SQL[filtros.orden].split(",")[0].endswith("DESC") else ">"
+        valor = desde.valor if isinstance(desde.valor, datetime) else _decimal(desde.valor)
+        parametros.extend([valor, desde.id])
+        n = len(parametros)
+        condiciones.append((
+            "", f"{columna} {comparacion}= ${n - 1} AND ({columna} {comparacion} ${n - 1} OR p.id > ${n})"
+        ))
+
+    return condiciones, parametros
+
+
+def _where(condiciones: List[str]) -> str:
+    return "WHERE " + " AND ".join(condiciones) if condiciones else ""
+
+
+def construir_where(filtros: FiltrosPropiedad, desde: Optional[Cursor] = None) -> Tuple[str, list]:
+    """Traduce los filtros del listado (y el cursor, si hay) a una cláusula WHERE parametrizada"""
+    condiciones, parametros = construir_condiciones(filtros, desde)
+    return _where([condicion for _, condicion in condiciones]), parametros
+
+
+def consulta_facetas(filtros: FiltrosPropiedad) -> Tuple[str, list]:
+    """
+    Una sola sentencia para todas las facetas: las condiciones que no son de
+    ninguna faceta se aplican una vez al armar `base` y cada conteo agrupa
+    esas filas aplicando los filtros de las demás facetas
+    """
+    condiciones, parametros = construir_condiciones(filtros)
+    comunes = [condicion for faceta, condicion in condiciones if not faceta]
+
+    def de_las_demas(excluida: Optional[str]) -> str:
+        return _where([condicion for faceta, condicion in condiciones if faceta and faceta != excluida])
+
+    subconsultas = [f"SELECT '' AS faceta, NULL AS valor, count(*) AS cantidad FROM base p {de_las_demas(None)}"]
+    for faceta, expresion in COLUMNAS_FACETA.items():
+        subconsultas.append(
+            f"SELECT '{faceta}', ({expresion})::text, count(*) FROM base p "
+            f"{de_las_demas(faceta)} GROUP BY 2"
+        )
+    consulta = (
+        "WITH base AS MATERIALIZED ("
+        f"SELECT p.tipo, p.operacion, p.habitaciones, p.banos, p.precio, p.metros "
+        f"FROM propiedades p {_where(comunes)}) "
+        + " UNION ALL ".join(subconsultas)
+    )
+    return consulta, parametros
+
+
+def _valores_escritura(propiedad: PropiedadCreate) -> list:
+    coordenadas = propiedad.coordenadas
+    return [
+        propiedad.titulo,
+        propiedad.descripcion,
+        _decimal(propiedad.precio),
+        propiedad.ubicacion,
+        propiedad.direccion,
+        valor_clave(propiedad.tipo),
+        valor_clave(propiedad.operacion),
+        propiedad.habitaciones,
+        propiedad.banos,
+        _decimal(propiedad.metros),
+        _decimal(propiedad.metros_terreno),
+        propiedad.antiguedad,
+        _decimal(propiedad.expensas),
+        # POINT guarda (x, y) = (lng, lat), igual que los datos del schema
+        asyncpg.Point(coordenadas.lng, coordenadas.lat) if coordenadas else None,
+        propiedad.agente_id,
+    ]
+
+
+def _registro(fila, hijos: dict) -> dict:
+    """Convierte una fila (más sus hijos) al mismo formato que el almacén en memoria"""
+    coordenadas = fila["coordenadas"]
+    if fila["agente_id"] is not None:
+        agente = {
+            "id": fila["agente_id"],
+            "nombre": fila["agente_nombre"],
+            "email": fila["agente_email"],
+            "telefono": fila["agente_telefono"] or "",
+            "avatar": fila["agente_avatar"],
+        }
+    else:
+        agente = AGENTE_SIN_ASIGNAR
+    return {
+        "id": fila["id"],
+        "titulo": fila["titulo"],
+        "descripcion": fila["descripcion"],
+        "precio": float(fila["precio"]),
+        "ubicacion": fila["ubicacion"],
+        "direccion": fila["direccion"],
+        "tipo": fila["tipo"],
+        "operacion": fila["operacion"],
+        "habitaciones": fila["habitaciones"],
+        "banos": fila["banos"],
+        "metros": float(fila["metros"]),
+        "metros_terreno": _float(fila["metros_terreno"]),
+        "antiguedad": fila["antiguedad"],
+        "expensas": _float(fila["expensas"]),
+        "caracteristicas": hijos["caracteristicas"],
+        "servicios": hijos["servicios"],
+        "imagenes": hijos["imagenes"],
+        "coordenadas": {"lat": coordenadas.y, "lng": coordenadas.x} if coordenadas else None,
+        "estado": fila["estado"],
+        "destacada": fila["destacada"],
+        "fecha_publicacion": fila["fecha_publicacion"],
+        "fecha_actualizacion": fila["fecha_actualizacion"],
+        "agente": agente,
+        "vistas": fila["vistas"],
+        "clave_externa": fila["clave_externa"],
+    }
+
+
+class RepositorioPostgres:
+    def __init__(self, dsn: str, min_conexiones: int = 2, max_conexiones: int = 10):
+        self.dsn = dsn
+        self.min_conexiones = min_conexiones
+        self.max_conexiones = max_conexiones
+        self._pool: Optional[asyncpg.Pool] = None
+        self.vistas = ContadorVistas(self._volcar_vistas)
+
+    async def iniciar(self):
+        self._pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_conexiones,
+            max_size=self.max_conexiones,
+            command_timeout=30
+        )
+        self.vistas.iniciar()
+
+    async def cerrar(self):
+        # Primero se vuelcan las vistas pendientes, mientras el pool sigue abierto
+        await self.vistas.detener()
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    def modelo(self, registro: dict) -> Propiedad:
+        return Propiedad(**registro)
+
+    def json(self, registro: dict, guardar: bool = True) -> bytes:
+        return self.modelo(registro).model_dump_json().encode("utf-8")
+
+    def json_campos(self, registro: dict, campos: Sequence[str]) -> bytes:
+        return json_campos(registro, campos)
+
+    async def _con_hijos(self, conexion, filas) -> List[dict]:
+        """Carga características, servicios e imágenes de todas las filas en lote"""
+        if not filas:
+            return []
+        ids = [fila["id"] for fila in filas]
+        hijos = {i: {campo: [] for campo in CONSULTAS_HIJOS} for i in ids}
+        for campo, consulta in CONSULTAS_HIJOS.items():
+            for fila in await conexion.fetch(consulta, ids):
+                hijos[fila["propiedad_id"]][campo].append(fila["valor"])
+        return [_registro(fila, hijos[fila["id"]]) for fila in filas]
+
+    async def _obtener(self, conexion, propiedad_id: int) -> Optional[dict]:
+        fila = await conexion.fetchrow(f"{SELECT_PROPIEDADES} WHERE p.id = $1", propiedad_id)
+        if fila is None:
+            return None
+        return (await self._con_hijos(conexion, [fila]))[0]
+
+    async def _guardar_hijos(self, conexion, propiedad_id: int, propiedad: PropiedadCreate):
+        for campo, consulta in INSERTS_HIJOS.items():
+            valores = getattr(propiedad, campo)
+            if valores:
+                await conexion.execute(consulta, propiedad_id, valores)
+
+    async def listar(self, filtros: FiltrosPropiedad,
+                     desde: Optional[Cursor] = None) -> Tuple[List[dict], int, bool]:
+        where_filtros, parametros_filtros = construir_where(filtros)
+        where, parametros = construir_where(filtros, desde) if desde else (where_filtros, parametros_filtros)
+        if filtros.orden == "distancia":
+            # Las propiedades sin coordenadas quedan al final (NULLS LAST)
+            parametros = [*parametros, filtros.lat, filtros.lng]
+            n = len(parametros)
+            orden = f"{distancia_sql(f'${n - 1}::float8', f'${n}::float8')}, p.id"
+        else:
+            n = len(parametros)
+            orden = ORDEN_SQL[filtros.orden]
+        # Con cursor no hay OFFSET: la página arranca en el keyset
+        inicio = (filtros.pagina - 1) * filtros.limite if desde is None else 0
+        consulta = (
+            f"{SELECT_PROPIEDADES} {where} ORDER BY {orden} "
+            f"LIMIT ${n + 1} OFFSET ${n + 2}"
+        )
+        async with self._pool.acquire() as conexion:
+            with medir("filtrar"):
+                total = await conexion.fetchval(
+                    f"SELECT count(*) FROM propiedades p {where_filtros}", *parametros_filtros
+                )
+            # Se pide una fila de más para saber si hay página siguiente
+            with medir("ordenar"):
+                filas = await conexion.fetch(consulta, *parametros, filtros.limite + 1, inicio)
+            hay_mas = len(filas) > filtros.limite
+            return await self._con_hijos(conexion, filas[:filtros.limite]), total, hay_mas
+
+    async def exportar(self, filtros: FiltrosPropiedad, desde: Optional[datetime] = None,
+                       tamano_lote: int = 500) -> Tuple[datetime, AsyncIterator[List[dict]]]:
+        """
+        Todas las propiedades que cumplen los filtros, por id, en lotes leídos
+        de un cursor del servidor: nunca se trae el resultado completo. Con
+        `desde`, sólo las modificadas después (idx_propiedades_fecha_actualizacion).
+        Devuelve también el `desde` de la próxima exportación incremental. La
+        conexión y la transacción se toman recién al pedir el primer lote
+        """
+        # Antes de la foto: lo confirmado después con fecha anterior a la marca
+        # tiene que venir de una transacción más larga que el margen
+        async with self._pool.acquire() as conexion:
+            marca = await conexion.fetchval(MARCA_EXPORTACION, MARGEN_EXPORTACION)
+        return marca, self._exportar(filtros, desde, tamano_lote)
+
+    async def _exportar(self, filtros: FiltrosPropiedad, desde: Optional[datetime],
+                        tamano_lote: int) -> AsyncIterator:
+        condiciones, parametros = construir_condiciones(filtros)
+        condiciones = [condicion for _, condicion in condiciones]
+        if desde is not None:
+            parametros.append(desde)
+            condiciones.append(f"p.fecha_actualizacion > ${len(parametros)}")
+        consulta = f"{SELECT_PROPIEDADES} {_where(condiciones)} ORDER BY p.id"
+        async with self._pool.acquire() as conexion:
+            # El cursor vive dentro de la transacción; repeatable read fija la foto
+            # del catálogo para toda la exportación aunque haya escrituras en el medio
+            async with conexion.transaction(isolation="repeatable_read", readonly=True):
+                cursor = await conexion.cursor(consulta, *parametros)
+                while True:
+                    filas = await cursor.fetch(tamano_lote)
+                    if not filas:
+                        break
+                    yield await self._con_hijos(conexion, filas)
+
+    async def buscar(self, texto: str, filtros: FiltrosPropiedad) -> Tuple[List[dict], int]:
+        """Sobre la columna busqueda (idx_propiedades_busqueda), ordenado por ts_rank_cd"""
+        where, parametros = construir_where(filtros)
+        parametros = [*parametros, texto]
+        n = len(parametros)
+        consulta_texto = CONSULTA_TEXTO.format(f"${n}")
+        condicion = f"p.estado = 'disponible' AND p.busqueda @@ {consulta_texto}"
+        where = f"{where} AND {condicion}" if where else f"WHERE {condicion}"
+        inicio = (filtros.pagina - 1) * filtros.limite
+        async with self._pool.acquire() as conexion:
+            total = await conexion.fetchval(f"SELECT count(*) FROM propiedades p {where}", *parametros)
+            filas = await conexion.fetch(
+                f"""{SELECT_PROPIEDADES} {where}
+                ORDER BY ts_rank_cd(p.busqueda, {consulta_texto}) DESC, p.id
+                LIMIT ${n + 1} OFFSET ${n + 2}""",
+                *parametros, filtros.limite, inicio
+            )
+            return await self._con_hijos(conexion, filas), total
+
+    async def obtener(self, propiedad_id: int) -> Optional[dict]:
+        async with self._pool.acquire() as conexion:
+            return await self._obtener(conexion, propiedad_id)
+
+    async def registrar_vista(self, propiedad_id: int) -> Optional[dict]:
+        """La vista se acumula en memoria; la respuesta ya incluye las pendientes"""
+        registro = await self.obtener(propiedad_id)
+        if registro is not None:
+            self.vistas.registrar(propiedad_id)
+            registro["vistas"] += self.vistas.pendientes(propiedad_id)
+        return registro
+
+    async def contar_vista(self, propiedad_id: int):
+        """Sólo se llama con una propiedad que existe, así que no se consulta"""
+        self.vistas.registrar(propiedad_id)
+
+    async def version(self) -> Tuple[int, datetime]:
+        """
+        La secuencia que avanza trigger_propiedades_version y la última
+        modificación, de idx_propiedades_fecha_actualizacion
+        """
+        async with self._pool.acquire() as conexion:
+            fila = await conexion.fetchrow("""
+                SELECT last_value AS version,
+                       COALESCE((SELECT max(fecha_actualizacion) FROM propiedades), 'epoch') AS modificado
+                FROM version_catalogo
+            """)
+        return fila["version"], fila["modificado"]
+
+    async def version_propiedad(self, propiedad_id: int) -> Optional[datetime]:
+        async with self._pool.acquire() as conexion:
+            return await conexion.fetchval(
+                "SELECT COALESCE(fecha_actualizacion, fecha_publicacion) FROM propiedades WHERE id = $1",
+                propiedad_id
+            )
+
+    async def _volcar_vistas(self, lote: Dict[int, int]):
+        """Equivale a incrementar_vistas() para todo el lote en dos sentencias"""
+        # Orden fijo de ids para que dos workers no se bloqueen mutuamente
+        ids = sorted(lote)
+        cantidades = [lote[i] for i in ids]
+        async with self._pool.acquire() as conexion:
+            async with conexion.transaction():
+                await conexion.execute(ACTUALIZAR_VISTAS, ids, cantidades)
+                await conexion.execute(REGISTRAR_METRICAS_VISTAS, ids, cantidades)
+
+    async def crear(self, propiedad: PropiedadCreate) -> dict:
+        columnas = ", ".join(COLUMNAS_ESCRITURA)
+        marcadores = ", ".join(f"${i}" for i in range(1, len(COLUMNAS_ESCRITURA) + 1))
+        async with self._pool.acquire() as conexion:
+            try:
+                async with conexion.transaction():
+                    propiedad_id = await conexion.fetchval(
+                        f"INSERT INTO propiedades ({columnas}) VALUES ({marcadores}) RETURNING id",
+                        *_valores_escritura(propiedad)
+                    )
+                    await self._guardar_hijos(conexion, propiedad_id, propiedad)
+                    await conexion.execute(ACTUALIZAR_BUSQUEDA, propiedad_id)
+            except asyncpg.ForeignKeyViolationError:
+                raise AgenteInexistente(f"No existe el agente {propiedad.agente_id}")
+            return await self._obtener(conexion, propiedad_id)
+
+    async def actualizar(self, propiedad_id: int, propiedad: PropiedadCreate) -> Optional[dict]:
+        asignaciones = ", ".join(f"{columna} = ${i}" for i, columna in enumerate(COLUMNAS_ESCRITURA, 2))
+        async with self._pool.acquire() as conexion:
+            try:
+                async with conexion.transaction():
+                    encontrada = await conexion.fetchval(
+                        f"UPDATE propiedades SET {asignaciones} WHERE id = $1 RETURNING id",
+                        propiedad_id, *_valores_escritura(propiedad)
+                    )
+                    if encontrada is None:
+                        return None
+                    for tabla in ("caracteristicas_propiedad", "servicios_propiedad", "imagenes_propiedad"):
+                        await conexion.execute(f"DELETE FROM {tabla} WHERE propiedad_id = $1", propiedad_id)
+                    await self._guardar_hijos(conexion, propiedad_id, propiedad)
+                    await conexion.execute(ACTUALIZAR_BUSQUEDA, propiedad_id)
+            except asyncpg.ForeignKeyViolationError:
+                raise AgenteInexistente(f"No existe el agente {propiedad.agente_id}")
+            return await self._obtener(conexion, propiedad_id)
+
+    async def importar(self, lote: List[PropiedadImportada]) -> List[dict]:
+        """
+        Alta o actualización por clave externa de todo el lote en una
+        transacción: un INSERT ... ON CONFLICT para las propiedades y COPY para
+        sus listas. Las propiedades de agentes inexistentes vuelven con error
+        sin afectar al resto. El lote no puede repetir (agente, clave externa).
+        """
+        async with self._pool.acquire() as conexion:
+            agentes = {fila["id"] for fila in await conexion.fetch(
+                "SELECT id FROM usuarios WHERE id = ANY($1::int[])",
+                list({propiedad.agente_id for propiedad in lote})
+            )}
+            validas = [propiedad for propiedad in lote if propiedad.agente_id in agentes]
+
+            guardadas = {}
+            if validas:
+                filas = []
+                for propiedad in validas:
+                    coordenadas = propiedad.coordenadas
+                    filas.append([
+                        *_valores_escritura(propiedad)[:-2],
+                        coordenadas.lat if coordenadas else None,
+                        coordenadas.lng if coordenadas else None,
+                        propiedad.agente_id,
+                        propiedad.clave_externa,
+                    ])
+                async with conexion.transaction():
+                    for fila in await conexion.fetch(UPSERT_IMPORTACION, *(list(columna) for columna in zip(*filas))):
+                        guardadas[(fila["agente_id"], fila["clave_externa"])] = (fila["id"], fila["creada"])
+
+                    actualizadas = [propiedad_id for propiedad_id, creada in guardadas.values() if not creada]
+                    if actualizadas:
+                        for tabla, _ in TABLAS_HIJOS.values():
+                            await conexion.execute(
+                                f"DELETE FROM {tabla} WHERE propiedad_id = ANY($1::int[])", actualizadas
+                            )
+                    for campo, (tabla, columnas) in TABLAS_HIJOS.items():
+                        registros = []
+                        for propiedad in validas:
+                            propiedad_id = guardadas[(propiedad.agente_id, propiedad.clave_externa)][0]
+                            for orden, valor in enumerate(getattr(propiedad, campo), 1):
+                                registros.append((propiedad_id, valor, orden) if campo == "imagenes"
+                                                 else (propiedad_id, valor))
+                        if registros:
+                            await conexion.copy_records_to_table(tabla, records=registros, columns=columnas)
+                    await conexion.execute(
+                        "SELECT actualizar_busqueda_propiedad(id) FROM unnest($1::int[]) AS id",
+                        [propiedad_id for propiedad_id, _ in guardadas.values()]
+                    )
+
+        resultados = []
+        for propiedad in lote:
+            guardada = guardadas.get((propiedad.agente_id, propiedad.clave_externa))
+            if guardada is None:
+                resultados.append({"error": f"No existe el agente {propiedad.agente_id}"})
+            else:
+                propiedad_id, creada = guardada
+                resultados.append({"id": propiedad_id, "accion": "creada" if creada else "actualizada"})
+        return resultados
+
+    async def eliminar(self, propiedad_id: int) -> bool:
+        async with self._pool.acquire() as conexion:
+            eliminada = await conexion.fetchval(
+                "UPDATE propiedades SET estado = 'inactiva' WHERE id = $1 RETURNING id",
+                propiedad_id
+            )
+            return eliminada is not None
+
+    async def similares(self, base: dict, limite: int) -> List[dict]:
+        """
+        Misma ventana que el índice en memoria (idx_propiedades_similares), el
+        mismo puntaje con la misma distancia haversine y el mismo desempate
+        por id: los dos repositorios devuelven las mismas propiedades
+        """
+        rango_precio = base["precio"] * VENTANA_PRECIO
+        punto = coordenadas_de(base)
+        async with self._pool.acquire() as conexion:
+            filas = await conexion.fetch(
+                f"""{SELECT_PROPIEDADES}
+                WHERE p.tipo = $1 AND p.operacion = $2
+                  AND p.precio BETWEEN $3 AND $4
+                  AND p.estado = 'disponible' AND p.id <> $5
+                ORDER BY
+                    {PESO_PRECIO} * LEAST(1, abs(p.precio::float8 - $6) / GREATEST($6 * {VENTANA_PRECIO}, 1))
+                  + {PESO_METROS} * LEAST(1, abs(p.metros::float8 - $7) / GREATEST($7, 1))
+                  + {PESO_HABITACIONES} * LEAST(1, abs(p.habitaciones - $8) / {HABITACIONES_ESCALA}.0)
+                  + {PESO_UBICACION} * COALESCE(LEAST(1, {distancia_sql('$9::float8', '$10::float8')} / {KM_ESCALA}),
+                                                {DIFERENCIA_UBICACION_DESCONOCIDA}),
+                  p.id
+                LIMIT $11""",
+                valor_clave(base["tipo"]), valor_clave(base["operacion"]),
+                _decimal(base["precio"] - rango_precio), _decimal(base["precio"] + rango_precio),
+                base["id"], float(base["precio"]), float(base["metros"]), base["habitaciones"],
+                punto[0] if punto else None, punto[1] if punto else None, limite
+            )
+            return await self._con_hijos(conexion, filas)
+
+    async def estadisticas(self) -> dict:
+        """Lee los totales que mantiene trigger_propiedades_estadisticas (a lo sumo una fila por tipo y operación)"""
+        async with self._pool.acquire() as conexion:
+            filas = await conexion.fetch("""
+                SELECT tipo, operacion, cantidad, suma_precios, destacadas
+                FROM estadisticas_propiedades
+                WHERE cantidad > 0
+            """)
+
+        por_tipo = {}
+        por_operacion = {}
+        total = 0
+        suma_precios = 0.0
+        destacadas = 0
+        for fila in filas:
+            por_tipo[fila["tipo"]] = por_tipo.get(fila["tipo"], 0) + fila["cantidad"]
+            por_operacion[fila["operacion"]] = por_operacion.get(fila["operacion"], 0) + fila["cantidad"]
+            total += fila["cantidad"]
+            suma_precios += float(fila["suma_precios"])
+            destacadas += fila["destacadas"]
+
+        return {
+            "total_propiedades": total,
+            "por_tipo": por_tipo,
+            "por_operacion": por_operacion,
+            "precio_promedio": suma_precios / total if total else 0,
+            "propiedades_destacadas": destacadas
+        }
+
+    async def facetas(self, filtros: FiltrosPropiedad) -> dict:
+        consulta, parametros = consulta_facetas(filtros)
+        async with self._pool.acquire() as conexion:
+            filas = await conexion.fetch(consulta, *parametros)
+
+        conteos = {faceta: {} for faceta in COLUMNAS_FACETA}
+        total = 0
+        for fila in filas:
+            if not fila["faceta"]:
+                total = fila["cantidad"]
+            elif fila["faceta"] in ("tipo", "operacion"):
+                conteos[fila["faceta"]][fila["valor"]] = fila["cantidad"]
+            else:
+                conteos[fila["faceta"]][int(fila["valor"])] = fila["cantidad"]
+
+        def histograma(faceta: str) -> List[dict]:
+            return [rango_histograma(rango, cantidad) for rango, cantidad in sorted(conteos[faceta].items())]
+
+        return {
+            "total": total,
+            "tipo": dict(sorted(conteos["tipo"].items())),
+            "operacion": dict(sorted(conteos["operacion"].items())),
+            "habitaciones": dict(sorted(conteos["habitaciones"].items())),
+            "banos": dict(sorted(conteos["banos"].items())),
+            "precio": histograma("precio"),
+            "metros": histograma("metros")
+        }
+
+    async def guardar_conversaciones(self, lote: List[dict]):
+        async with self._pool.acquire() as conexion:
+            await conexion.execute(
+                INSERTAR_CONVERSACIONES,
+                [c["usuario_id"] for c in lote],
+                [c["mensaje"] for c in lote],
+                [c["respuesta"] for c in lote],
+                [c["intencion"] for c in lote],
+                [_decimal(round(c["confianza"], 2)) for c in lote],
+                [c["timestamp"] for c in lote],
+                [c["tiempo_respuesta"] for c in lote]
+            )
+
+    async def estadisticas_conversaciones(self) -> dict:
+        async with self._pool.acquire() as conexion:
+            filas = await conexion.fetch("""
+                SELECT intencion_detectada AS intencion, count(*) AS cantidad,
+                       sum(tiempo_respuesta) AS tiempo_total,
+                       sum(satisfaccion) AS satisfaccion_total, count(satisfaccion) AS calificadas
+                FROM conversaciones_chatbot
+                GROUP BY intencion_detectada
+            """)
+
+        total = sum(fila["cantidad"] for fila in filas)
+        tiempo_total = sum(fila["tiempo_total"] or 0 for fila in filas)
+        calificadas = sum(fila["calificadas"] for fila in filas)
+        satisfaccion_total = sum(fila["satisfaccion_total"] or 0 for fila in filas)
+        return {
+            "mensajes_procesados": total,
+            "por_intencion": {fila["intencion"]: fila["cantidad"] for fila in filas if fila["intencion"]},
+            "satisfaccion_promedio": satisfaccion_total / calificadas if calificadas else None,
+            "tiempo_promedio_respuesta": tiempo_total / total if total else 0
+        }
@@ -0,0 +1,74 @@
+"""
+Contador de vistas con escritura diferida (write-behind).
+
+Cada vista suma en un diccionario en memoria por propiedad; un ciclo de fondo
+vuelca los acumulados en una sola escritura por lote cada `intervalo` segundos
+o apenas se juntan `max_pendientes` vistas. El endpoint de detalle nunca espera
+a la base de datos para contar una vista.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+EscritorVistas = Callable[[Dict[int, int]], Awaitable[None]]
+
+
+class ContadorVistas:
+    def __init__(self, escritor: EscritorVistas, intervalo: float = 5.0, max_pendientes: int = 1000):
+        self.escritor = escritor
+        self.intervalo = intervalo
+        self.max_pendientes = max_pendientes
+        self._pendientes: Dict[int, int] = {}
+        self._total_pendiente = 0
+        self._lock = asyncio.Lock()
+        self._tarea: Optional[asyncio.Task] = None
+        self._vaciado_en_curso: Optional[asyncio.Task] = None
+
+    def iniciar(self):
+        if self._tarea is None:
+            self._tarea = asyncio.create_task(self._ciclo())
+
+    async def detener(self):
+        """Cancela el ciclo y vuelca todo lo pendiente"""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        await self.vaciar()
+
+    def registrar(self, propiedad_id: int):
+        self._pendientes[propiedad_id] = self._pendientes.get(propiedad_id, 0) + 1
+        self._total_pendiente += 1
+        # Sólo al cruzar el umbral: si un volcado falló, reintenta el ciclo
+        if self._total_pendiente == self.max_pendientes and self._vaciado_en_curso is None:
+            self._vaciado_en_curso = asyncio.create_task(self.vaciar())
+
+    def pendientes(self, propiedad_id: int) -> int:
+        """Vistas todavía no volcadas de una propiedad"""
+        return self._pendientes.get(propiedad_id, 0)
+
+    async def vaciar(self):
+        async with self._lock:
+            lote, self._pendientes = self._pendientes, {}
+            self._total_pendiente = 0
+            self._vaciado_en_curso = None
+            if not lote:
+                return
+            try:
+                await self.escritor(lote)
+            except Exception:
+                # Se reintegran al próximo volcado en lugar de perderlas
+                logger.exception("No se pudieron volcar %d vistas", sum(lote.values()))
+                for propiedad_id, cantidad in lote.items():
+                    self._pendientes[propiedad_id] = self._pendientes.get(propiedad_id, 0) + cantidad
+                    self._total_pendiente += cantidad
+
+    async def _ciclo(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            await self.vaciar()
@@ -1,13 +1,27 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
 from datetime import datetime
-import re
+import json
 import random
-from typing import List, Optional
+import time
+from typing import AsyncIterator, List, Optional
 
-from models import MensajeChatbot, RespuestaChatbot
+from pydantic import TypeAdapter, ValidationError
+
+from clasificador_intenciones import ClasificadorIntenciones
+from condicionales import Validadores
+from flujos import ERROR_LINEA_LARGA, RespuestaNDJSON, codificar_ndjson, lineas
+from metricas import medir
+from models import MensajeChatbot, RespuestaChatbot, RespuestaChatbotLote
+from repositorios.conversaciones import RegistroConversaciones
+from routes.propiedades import repositorio
 
 router = APIRouter()
 
+# Las conversaciones se guardan en lotes, fuera del camino de la respuesta
+conversaciones = RegistroConversaciones(repositorio.guardar_conversaciones)
+
 # Base de conocimientos para el chatbot
 RESPUESTAS_BASE = {
     "saludo": [
@@ -131,28 +145,25 @@ PATRONES_INTENCION = {
     ]
 }
 
+# Todos los patrones compilados en una sola regex; se recorre el mensaje una vez
+clasificador = ClasificadorIntenciones(PATRONES_INTENCION)
+
 def detectar_intencion(mensaje: str) -> str:
     """
     Detecta la intención del usuario basándose en patrones de texto
     """
-    mensaje_lower = mensaje.lower()
-    
-    for intencion, patrones in PATRONES_INTENCION.items():
-        for patron in patrones:
-            if re.search(patron, mensaje_lower):
-                return intencion
-    
-    return "default"
+    return clasificador.clasificar(mensaje)[0]
 
-def generar_respuesta(intencion: str, mensaje: str) -> dict:
+def generar_respuesta(intencion: str, mensaje: str, confianza: Optional[float] = None) -> dict:
     """
     Genera una respuesta basada en la intención detectada
     """
     respuestas = RESPUESTAS_BASE.get(intencion, RESPUESTAS_BASE["default"])
     respuesta_texto = random.choice(respuestas)
     
-    # Calcular confianza basada en la coincidencia de patrones
-    confianza = 0.9 if intencion != "default" else 0.3
+    # Confianza basada en la coincidencia de patrones
+    if confianza is None:
+        confianza = clasificador.clasificar(mensaje)[1]
     
     # Generar sugerencias contextuales
     sugerencias = generar_sugerencias(intencion)
@@ -164,70 +175,75 @@ def generar_respuesta(intencion: str, mensaje: str) -> dict:
         "intencion_detectada": intencion
     }
 
+SUGERENCIAS_POR_INTENCION = {
+    "saludo": [
+        "¿Buscas alguna propiedad en particular?",
+        "¿Te interesa comprar o alquilar?",
+        "¿En qué zona estás buscando?"
+    ],
+    "propiedades": [
+        "¿Qué tipo de propiedad te interesa?",
+        "¿Tienes algún presupuesto en mente?",
+        "¿Hay alguna zona que prefieras?"
+    ],
+    "precios": [
+        "¿Qué tipo de propiedad te interesa?",
+        "¿En qué zona estás buscando?",
+        "¿Necesitas información sobre financiación?"
+    ],
+    "alquiler": [
+        "¿Para cuánto tiempo necesitas la propiedad?",
+        "¿Qué zona prefieres?",
+        "¿Tienes garantía propietaria?"
+    ],
+    "venta": [
+        "¿Ya tienes una propiedad en mente?",
+        "¿Necesitas asesoramiento para financiación?",
+        "¿Qué zona te interesa?"
+    ],
+    "ubicacion": [
+        "¿Qué tipo de propiedad buscas en esa zona?",
+        "¿Para compra o alquiler?",
+        "¿Tienes algún presupuesto definido?"
+    ],
+    "contacto": [
+        "¿Quieres agendar una visita?",
+        "¿Prefieres que te llamemos?",
+        "¿Hay alguna propiedad específica que te interese?"
+    ],
+    "default": [
+        "¿Puedes contarme más detalles?",
+        "¿Te interesa alguna zona en particular?",
+        "¿Prefieres hablar con uno de nuestros agentes?"
+    ]
+}
+
 def generar_sugerencias(intencion: str) -> List[str]:
     """
     Genera sugerencias de seguimiento basadas en la intención
     """
-    sugerencias_por_intencion = {
-        "saludo": [
-            "¿Buscas alguna propiedad en particular?",
-            "¿Te interesa comprar o alquilar?",
-            "¿En qué zona estás buscando?"
-        ],
-        "propiedades": [
-            "¿Qué tipo de propiedad te interesa?",
-            "¿Tienes algún presupuesto en mente?",
-            "¿Hay alguna zona que prefieras?"
-        ],
-        "precios": [
-            "¿Qué tipo de propiedad te interesa?",
-            "¿En qué zona estás buscando?",
-            "¿Necesitas información sobre financiación?"
-        ],
-        "alquiler": [
-            "¿Para cuánto tiempo necesitas la propiedad?",
-            "¿Qué zona prefieres?",
-            "¿Tienes garantía propietaria?"
-        ],
-        "venta": [
-            "¿Ya tienes una propiedad en mente?",
-            "¿Necesitas asesoramiento para financiación?",
-            "¿Qué zona te interesa?"
-        ],
-        "ubicacion": [
-            "¿Qué tipo de propiedad buscas en esa zona?",
-            "¿Para compra o alquiler?",
-            "¿Tienes algún presupuesto definido?"
-        ],
-        "contacto": [
-            "¿Quieres agendar una visita?",
-            "¿Prefieres que te llamemos?",
-            "¿Hay alguna propiedad específica que te interese?"
-        ],
-        "default": [
-            "¿Puedes contarme más detalles?",
-            "¿Te interesa alguna zona en particular?",
-            "¿Prefieres hablar con uno de nuestros agentes?"
-        ]
-    }
-    
-    return sugerencias_por_intencion.get(intencion, sugerencias_por_intencion["default"])
+    return SUGERENCIAS_POR_INTENCION.get(intencion, SUGERENCIAS_POR_INTENCION["default"])
+
+RESPUESTA_ERROR = "Disculpa, ha ocurrido un error. ¿Podrías reformular tu pregunta?"
+SUGERENCIAS_ERROR = ["¿Puedes intentar de otra manera?", "¿Te ayudo con otra consulta?"]
 
 @router.post("/mensaje", response_model=RespuestaChatbot)
 async def procesar_mensaje(mensaje_data: MensajeChatbot):
     """
     Procesa un mensaje del usuario y devuelve una respuesta del chatbot
     """
+    inicio = time.perf_counter()
     try:
         # Validar que el mensaje no esté vacío
         if not mensaje_data.mensaje.strip():
             raise HTTPException(status_code=400, detail="El mensaje no puede estar vacío")
         
         # Detectar intención
-        intencion = detectar_intencion(mensaje_data.mensaje)
+        with medir("detectar_intencion"):
+            intencion, confianza = clasificador.clasificar(mensaje_data.mensaje)
         
         # Generar respuesta
-        resultado = generar_respuesta(intencion, mensaje_data.mensaje)
+        resultado = generar_respuesta(intencion, mensaje_data.mensaje, confianza)
         
         # Crear respuesta
         respuesta = RespuestaChatbot(
@@ -237,54 +253,172 @@ async def procesar_mensaje(mensaje_data: MensajeChatbot):
             sugerencias=resultado["sugerencias"]
         )
         
-        # Log para análisis (en producción esto iría a un sistema de logging)
-        print(f"Usuario: {mensaje_data.mensaje}")
-        print(f"Intención detectada: {intencion}")
-        print(f"Respuesta: {respuesta.respuesta}")
-        print(f"Confianza: {respuesta.confianza}")
+        # Registro para análisis: se encola y se guarda en el próximo lote
+        conversaciones.registrar({
+            "usuario_id": mensaje_data.usuario_id,
+            "mensaje": mensaje_data.mensaje,
+            "respuesta": respuesta.respuesta,
+            "intencion": intencion,
+            "confianza": respuesta.confianza,
+            "timestamp": respuesta.timestamp,
+            "tiempo_respuesta": time.perf_counter() - inicio
+        })
         
         return respuesta
         
     except Exception as e:
         # En caso de error, devolver respuesta genérica
         return RespuestaChatbot(
-            respuesta="Disculpa, ha ocurrido un error. ¿Podrías reformular tu pregunta?",
+            respuesta=RESPUESTA_ERROR,
             timestamp=datetime.now(),
             confianza=0.1,
-            sugerencias=["¿Puedes intentar de otra manera?", "¿Te ayudo con otra consulta?"]
+            sugerencias=SUGERENCIAS_ERROR
         )
 
+# Lotes de mensajes (replays y evaluaciones de calidad de intenciones)
+MAX_MENSAJES_LOTE = 10000
+# El cuerpo JSON se lee entero antes de validar: se corta por bytes antes de
+# tenerlo en memoria (1 KiB de promedio por mensaje); lotes más grandes van por NDJSON
+MAX_BYTES_LOTE = MAX_MENSAJES_LOTE * 1024
+
+_validador_lote = TypeAdapter(List[MensajeChatbot])
+_validador_mensaje = TypeAdapter(MensajeChatbot)
+
+def _lote_demasiado_grande() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Máximo {MAX_MENSAJES_LOTE} mensajes y {MAX_BYTES_LOTE} bytes por lote; usar application/x-ndjson para más"
+    )
+
+async def _leer_lote(request: Request) -> bytes:
+    """Cuerpo JSON del lote, sin pasar de MAX_BYTES_LOTE aunque no venga Content-Length"""
+    longitud = request.headers.get("content-length", "")
+    if longitud.isdigit() and int(longitud) > MAX_BYTES_LOTE:
+        raise _lote_demasiado_grande()
+    partes = []
+    tamano = 0
+    async for bloque in request.stream():
+        tamano += len(bloque)
+        if tamano > MAX_BYTES_LOTE:
+            raise _lote_demasiado_grande()
+        partes.append(bloque)
+    return b"".join(partes)
+
+def responder_en_lote(texto: str, timestamp: str) -> dict:
+    """
+    Misma respuesta que /mensaje, armada como dict para serializar el lote entero de una vez
+    """
+    if not texto.strip():
+        return {"respuesta": RESPUESTA_ERROR, "timestamp": timestamp, "confianza": 0.1,
+                "sugerencias": SUGERENCIAS_ERROR, "intencion": None}
+    intencion, confianza = clasificador.clasificar(texto)
+    return {
+        "respuesta": random.choice(RESPUESTAS_BASE.get(intencion, RESPUESTAS_BASE["default"])),
+        "timestamp": timestamp,
+        "confianza": confianza,
+        "sugerencias": generar_sugerencias(intencion),
+        "intencion": intencion
+    }
+
+async def _procesar_ndjson(cuerpo: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Procesa un cuerpo NDJSON a medida que llega: cada bloque recibido se
+    responde con una línea por mensaje, o con el error de validación de esa línea
+    """
+    numero = 0
+    async for bloque in lineas(cuerpo):
+        timestamp = datetime.now().isoformat()
+        salida = []
+        for linea in bloque:
+            numero += 1
+            if linea is None:
+                salida.append({"linea": numero, "error": ERROR_LINEA_LARGA})
+                continue
+            if not linea.strip():
+                continue
+            try:
+                mensaje = _validador_mensaje.validate_json(linea)
+                resultado = responder_en_lote(mensaje.mensaje, timestamp)
+            except ValidationError as e:
+                resultado = {"linea": numero, "error": e.errors(include_url=False)}
+            salida.append(resultado)
+        if salida:
+            yield codificar_ndjson(salida)
+
+@router.post(
+    "/mensajes/lote",
+    response_model=List[RespuestaChatbotLote],
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/MensajeChatbot"}}},
+        "application/x-ndjson": {"schema": {"$ref": "#/components/schemas/MensajeChatbot"}}
+    }}}
+)
+async def procesar_lote(request: Request):
+    """
+    Procesa una lista de mensajes y devuelve la respuesta y la intención de cada uno.
+    Con Content-Type application/x-ndjson la entrada y la salida se procesan en streaming.
+    """
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        return RespuestaNDJSON(_procesar_ndjson(request.stream()))
+
+    try:
+        mensajes = _validador_lote.validate_json(await _leer_lote(request))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    if len(mensajes) > MAX_MENSAJES_LOTE:
+        raise _lote_demasiado_grande()
+
+    timestamp = datetime.now().isoformat()
+    resultados = [responder_en_lote(m.mensaje, timestamp) for m in mensajes]
+    return Response(
+        json.dumps(resultados, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        media_type="application/json"
+    )
+
+SUGERENCIAS_FRECUENTES = [
+    "¿Qué propiedades tienen disponibles?",
+    "¿Cuáles son sus horarios de atención?",
+    "¿Cómo puedo contactarlos?",
+    "¿En qué zonas trabajan?",
+    "¿Ofrecen financiación?",
+    "¿Hacen tasaciones?",
+    "¿Qué servicios brindan?",
+    "¿Tienen propiedades en alquiler temporal?"
+]
+# Lista fija: se serializa una vez y el ETag sale del propio contenido
+SUGERENCIAS_FRECUENTES_JSON = json.dumps(SUGERENCIAS_FRECUENTES, ensure_ascii=False).encode("utf-8")
+validadores_sugerencias = Validadores.de_contenido(SUGERENCIAS_FRECUENTES_JSON, "public, max-age=3600")
+
 @router.get("/sugerencias", response_model=List[str])
-async def obtener_sugerencias_frecuentes():
+async def obtener_sugerencias_frecuentes(request: Request):
     """
     Devuelve una lista de preguntas frecuentes para mostrar al usuario
     """
-    return [
-        "¿Qué propiedades tienen disponibles?",
-        "¿Cuáles son sus horarios de atención?",
-        "¿Cómo puedo contactarlos?",
-        "¿En qué zonas trabajan?",
-        "¿Ofrecen financiación?",
-        "¿Hacen tasaciones?",
-        "¿Qué servicios brindan?",
-        "¿Tienen propiedades en alquiler temporal?"
-    ]
+    if validadores_sugerencias.vigente(request):
+        return validadores_sugerencias.no_modificado()
+    return validadores_sugerencias.aplicar(
+        Response(content=SUGERENCIAS_FRECUENTES_JSON, media_type="application/json")
+    )
+
+INTENCIONES_MAS_FRECUENTES = 5
 
 @router.get("/estadisticas")
 async def obtener_estadisticas_chatbot():
     """
     Devuelve estadísticas del uso del chatbot (para análisis interno)
     """
-    # En producción esto vendría de una base de datos
+    # Lo guardado; lo que sigue en la cola entra en el próximo lote
+    estadisticas = await repositorio.estadisticas_conversaciones()
+    por_intencion = sorted(estadisticas["por_intencion"].items(), key=lambda item: (-item[1], item[0]))
     return {
-        "mensajes_procesados": 1247,
+        "mensajes_procesados": estadisticas["mensajes_procesados"],
         "intenciones_mas_frecuentes": [
-            {"intencion": "propiedades", "cantidad": 312},
-            {"intencion": "precios", "cantidad": 198},
-            {"intencion": "contacto", "cantidad": 156},
-            {"intencion": "ubicacion", "cantidad": 134},
-            {"intencion": "alquiler", "cantidad": 98}
+            {"intencion": intencion, "cantidad": cantidad}
+            for intencion, cantidad in por_intencion[:INTENCIONES_MAS_FRECUENTES]
         ],
-        "satisfaccion_promedio": 4.2,
-        "tiempo_promedio_respuesta": 0.8  # segundos
+        "satisfaccion_promedio": estadisticas["satisfaccion_promedio"],
+        "tiempo_promedio_respuesta": estadisticas["tiempo_promedio_respuesta"],  # segundos
+        "mensajes_pendientes": conversaciones.pendientes,
+        "mensajes_descartados": conversaciones.descartadas,
+        "mensajes_no_guardados": conversaciones.fallidas
     }
\ No newline at end of file
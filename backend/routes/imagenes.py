@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from imagenes import (
+    TAMANO_MAXIMO, TIPOS_PERMITIDOS, AlmacenImagenes, ImagenDemasiadoGrande, ImagenInvalida
+)
+from metricas import medir
+from models import ImagenSubida
+
+router = APIRouter()
+
+# Originales y miniaturas en disco (el volumen backend_uploads en Docker)
+almacen = AlmacenImagenes()
+
+@router.post(
+    "/",
+    response_model=ImagenSubida,
+    status_code=201,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        tipo: {"schema": {"type": "string", "format": "binary"}} for tipo in TIPOS_PERMITIDOS
+    }}}
+)
+async def subir_imagen(request: Request, response: Response):
+    """
+    Sube una imagen con el archivo como cuerpo (image/jpeg, image/png o
+    image/webp). Devuelve la URL del original, que es la que va en
+    `imagenes` de la propiedad, y las de sus miniaturas. Si la imagen ya
+    estaba guardada responde 200 con las mismas URLs.
+    """
+    tipo_contenido = request.headers.get("content-type", "").split(";")[0].strip()
+    if tipo_contenido not in TIPOS_PERMITIDOS:
+        raise HTTPException(status_code=415, detail=f"Se espera {', '.join(TIPOS_PERMITIDOS)}")
+    longitud = request.headers.get("content-length", "")
+    if longitud.isdigit() and int(longitud) > TAMANO_MAXIMO:
+        raise HTTPException(status_code=413, detail=f"La imagen supera los {TAMANO_MAXIMO} bytes")
+
+    # En producción: verificar autenticación de agente
+    try:
+        with medir("imagen"):
+            imagen = await almacen.guardar(request.stream())
+    except ImagenDemasiadoGrande as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ImagenInvalida as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if imagen["duplicada"]:
+        response.status_code = 200
+    return ImagenSubida(**imagen)
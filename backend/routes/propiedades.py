@@ -1,12 +1,25 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Optional, List, Tuple
 from datetime import datetime
 import math
 
 from models import (
     Propiedad, PropiedadCreate, PropiedadListResponse, 
     FiltrosPropiedad, TipoPropiedad, TipoOperacion, 
-    Agente, Coordenadas, EstadisticasPropiedad
+    Agente, Coordenadas, EstadisticasPropiedad, FacetasPropiedad, PropiedadImportada
+)
+from cache_consultas import crear_cache, particion_de
+from catalogo import CAMPOS_DISPONIBLES, CAMPOS_RESUMEN, componer_json
+from condicionales import Validadores
+from exportacion import cerrar, exportar_csv, exportar_ndjson
+from flujos import RespuestaNDJSON
+from importacion import Importacion, importar_csv, importar_ndjson
+from metricas import medir
+from repositorios import (
+    AgenteInexistente, CursorInvalido, codificar_cursor, crear_repositorio,
+    decodificar_cursor
 )
 
 router = APIRouter()
@@ -252,55 +265,18 @@ mock_propiedades = [
     }
 ]
 
-def filtrar_propiedades(propiedades: List[dict], filtros: FiltrosPropiedad) -> List[dict]:
-    """Aplica filtros a la lista de propiedades"""
-    resultado = propiedades.copy()
-    
-    if filtros.tipo:
-        resultado = [p for p in resultado if p["tipo"] == filtros.tipo]
-    
-    if filtros.operacion:
-        resultado = [p for p in resultado if p["operacion"] == filtros.operacion]
-    
-    if filtros.ubicacion:
-        resultado = [p for p in resultado if filtros.ubicacion.lower() in p["ubicacion"].lower()]
-    
-    if filtros.precio_min:
-        resultado = [p for p in resultado if p["precio"] >= filtros.precio_min]
-    
-    if filtros.precio_max:
-        resultado = [p for p in resultado if p["precio"] <= filtros.precio_max]
-    
-    if filtros.habitaciones:
-        resultado = [p for p in resultado if p["habitaciones"] >= filtros.habitaciones]
-    
-    if filtros.banos:
-        resultado = [p for p in resultado if p["banos"] >= filtros.banos]
-    
-    if filtros.metros_min:
-        resultado = [p for p in resultado if p["metros"] >= filtros.metros_min]
-    
-    if filtros.metros_max:
-        resultado = [p for p in resultado if p["metros"] <= filtros.metros_max]
-    
-    if filtros.featured is not None:
-        resultado = [p for p in resultado if p["destacada"] == filtros.featured]
-    
-    return resultado
-
-def ordenar_propiedades(propiedades: List[dict], orden: str) -> List[dict]:
-    """Ordena las propiedades según el criterio especificado"""
-    if orden == "precio-asc":
-        return sorted(propiedades, key=lambda x: x["precio"])
-    elif orden == "precio-desc":
-        return sorted(propiedades, key=lambda x: x["precio"], reverse=True)
-    elif orden == "metros-desc":
-        return sorted(propiedades, key=lambda x: x["metros"], reverse=True)
-    else:  # recientes (default)
-        return sorted(propiedades, key=lambda x: x["fecha_publicacion"], reverse=True)
+# Repositorio de propiedades: en memoria sobre mock_propiedades o PostgreSQL
+# según la variable de entorno REPOSITORIO
+repositorio = crear_repositorio(mock_propiedades, mock_agente)
 
-@router.get("/", response_model=PropiedadListResponse)
-async def listar_propiedades(
+# Cache de páginas del listado (local y, con REDIS_URL, compartido)
+cache = crear_cache()
+
+def respuesta_json(contenido: bytes) -> Response:
+    """Envía JSON ya serializado sin pasar por el encoder de FastAPI"""
+    return Response(content=contenido, media_type="application/json")
+
+async def parametros_filtro(
     tipo: Optional[TipoPropiedad] = Query(None, description="Tipo de propiedad"),
     operacion: Optional[TipoOperacion] = Query(None, description="Tipo de operación"),
     ubicacion: Optional[str] = Query(None, description="Ubicación o barrio"),
@@ -311,15 +287,29 @@ async def listar_propiedades(
     metros_min: Optional[float] = Query(None, ge=0, description="Superficie mínima"),
     metros_max: Optional[float] = Query(None, ge=0, description="Superficie máxima"),
     featured: Optional[bool] = Query(None, description="Solo propiedades destacadas"),
-    pagina: int = Query(1, ge=1, description="Número de página"),
-    limite: int = Query(10, ge=1, le=100, description="Elementos por página"),
-    orden: str = Query("recientes", regex="^(recientes|precio-asc|precio-desc|metros-desc)$", description="Criterio de ordenamiento")
-):
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitud del centro de búsqueda"),
+    lng: Optional[float] = Query(None, ge=-180, le=180, description="Longitud del centro de búsqueda"),
+    radio_km: Optional[float] = Query(None, gt=0, description="Radio en km alrededor de lat/lng"),
+    lat_min: Optional[float] = Query(None, ge=-90, le=90, description="Latitud mínima de la zona visible"),
+    lat_max: Optional[float] = Query(None, ge=-90, le=90, description="Latitud máxima de la zona visible"),
+    lng_min: Optional[float] = Query(None, ge=-180, le=180, description="Longitud mínima de la zona visible"),
+    lng_max: Optional[float] = Query(None, ge=-180, le=180, description="Longitud máxima de la zona visible")
+) -> dict:
     """
-    Obtiene la lista de propiedades con filtros opcionales
+    Filtros estructurados comunes al listado y a la búsqueda de texto. Es
+    async para que FastAPI no la ejecute en el threadpool
     """
-    # Crear objeto de filtros
-    filtros = FiltrosPropiedad(
+    # Validar la combinación de parámetros geográficos
+    caja = (lat_min, lat_max, lng_min, lng_max)
+    if any(v is not None for v in caja):
+        if any(v is None for v in caja):
+            raise HTTPException(status_code=400, detail="La zona requiere lat_min, lat_max, lng_min y lng_max")
+        if lat_min > lat_max or lng_min > lng_max:
+            raise HTTPException(status_code=400, detail="La zona tiene los mínimos mayores que los máximos")
+    if radio_km is not None and (lat is None or lng is None):
+        raise HTTPException(status_code=400, detail="El radio requiere lat y lng")
+
+    return dict(
         tipo=tipo,
         operacion=operacion,
         ubicacion=ubicacion,
@@ -330,58 +320,201 @@ async def listar_propiedades(
         metros_min=metros_min,
         metros_max=metros_max,
         featured=featured,
-        pagina=pagina,
-        limite=limite,
-        orden=orden
+        lat=lat,
+        lng=lng,
+        radio_km=radio_km,
+        lat_min=lat_min,
+        lat_max=lat_max,
+        lng_min=lng_min,
+        lng_max=lng_max
     )
-    
-    # Aplicar filtros
-    propiedades_filtradas = filtrar_propiedades(mock_propiedades, filtros)
-    
-    # Ordenar
-    propiedades_ordenadas = ordenar_propiedades(propiedades_filtradas, orden)
-    
-    # Paginación
-    total = len(propiedades_ordenadas)
-    inicio = (pagina - 1) * limite
-    fin = inicio + limite
-    propiedades_pagina = propiedades_ordenadas[inicio:fin]
-    
-    # Convertir a objetos Propiedad
-    propiedades_response = []
-    for prop_data in propiedades_pagina:
-        prop_data_copy = prop_data.copy()
-        prop_data_copy["coordenadas"] = Coordenadas(**prop_data_copy["coordenadas"]) if prop_data_copy["coordenadas"] else None
-        propiedades_response.append(Propiedad(**prop_data_copy))
-    
-    return PropiedadListResponse(
-        propiedades=propiedades_response,
+
+# Parámetro `campos` del listado, la búsqueda y los similares
+QUERY_CAMPOS = Query(None, description='"resumen" o lista de campos separados por coma (ej. id,titulo,precio)')
+
+def seleccion_campos(campos: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Campos a incluir de cada propiedad: None para la propiedad completa,
+    los de PropiedadResumen con "resumen", o sólo los pedidos (el id va siempre).
+    Se llama desde el endpoint y no como dependencia: una dependencia
+    sincrónica se ejecuta en el threadpool en cada solicitud
+    """
+    if campos is None:
+        return None
+    if campos.strip() == "resumen":
+        return CAMPOS_RESUMEN
+    pedidos = {campo.strip() for campo in campos.split(",") if campo.strip()}
+    desconocidos = pedidos.difference(CAMPOS_DISPONIBLES)
+    if desconocidos:
+        raise HTTPException(status_code=400, detail=f"Campos desconocidos: {', '.join(sorted(desconocidos))}")
+    return tuple(campo for campo in CAMPOS_DISPONIBLES if campo == "id" or campo in pedidos)
+
+def serializador(campos: Optional[Tuple[str, ...]]):
+    """JSON de cada propiedad, completa o con sólo los campos pedidos"""
+    if campos is None:
+        return repositorio.json
+    return lambda registro: repositorio.json_campos(registro, campos)
+
+@router.get("/", response_model=PropiedadListResponse)
+async def listar_propiedades(
+    request: Request,
+    parametros: dict = Depends(parametros_filtro),
+    pagina: int = Query(1, ge=1, description="Número de página"),
+    limite: int = Query(10, ge=1, le=100, description="Elementos por página"),
+    orden: str = Query("recientes", regex="^(recientes|precio-asc|precio-desc|metros-desc|distancia)$", description="Criterio de ordenamiento"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior (siguiente_cursor); reemplaza a pagina"),
+    campos: Optional[str] = QUERY_CAMPOS
+):
+    """
+    Obtiene la lista de propiedades con filtros opcionales. Con `campos`
+    cada propiedad trae sólo esos campos; `campos=resumen` devuelve
+    PropiedadResumen, lo que muestran las tarjetas del listado.
+    """
+    seleccion = seleccion_campos(campos)
+    if orden == "distancia":
+        if parametros["lat"] is None or parametros["lng"] is None:
+            raise HTTPException(status_code=400, detail="El orden por distancia requiere lat y lng")
+        if cursor:
+            raise HTTPException(status_code=400, detail="El orden por distancia se pagina por número de página")
+
+    # Si el cliente ya tiene esta versión del catálogo no hace falta filtrar
+    validadores = Validadores.de_catalogo(await repositorio.version())
+    if validadores.vigente(request):
+        return validadores.no_modificado()
+
+    # La misma consulta ya calculada se sirve del cache
+    clave = await cache.clave({
+        **parametros, "pagina": pagina, "limite": limite, "orden": orden, "cursor": cursor,
+        "campos": ",".join(seleccion) if seleccion is not None else None
+    })
+    contenido = await cache.obtener(clave)
+    if contenido is not None:
+        return validadores.aplicar(respuesta_json(contenido))
+
+    # Crear objeto de filtros
+    filtros = FiltrosPropiedad(**parametros, pagina=pagina, limite=limite, orden=orden, cursor=cursor)
+    
+    # Aplicar filtros, ordenar y paginar (por offset o a partir del cursor)
+    try:
+        desde = decodificar_cursor(cursor, orden) if cursor else None
+        propiedades_pagina, total, hay_mas = await repositorio.listar(filtros, desde)
+    except CursorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Armar la respuesta con los fragmentos JSON de cada propiedad
+    a_json = serializador(seleccion)
+    with medir("serializar"):
+        contenido = componer_json(
+            (a_json(prop_data) for prop_data in propiedades_pagina),
+            "propiedades",
+            total=total,
+            pagina=pagina,
+            limite=limite,
+            total_paginas=math.ceil(total / limite) if total > 0 else 0,
+            siguiente_cursor=codificar_cursor(orden, propiedades_pagina[-1]) if hay_mas and orden != "distancia" else None
+        )
+    await cache.guardar(clave, contenido)
+    return validadores.aplicar(respuesta_json(contenido))
+
+@router.get("/buscar", response_model=PropiedadListResponse)
+async def buscar_propiedades(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=200, description="Texto a buscar"),
+    parametros: dict = Depends(parametros_filtro),
+    pagina: int = Query(1, ge=1, description="Número de página"),
+    limite: int = Query(10, ge=1, le=100, description="Elementos por página"),
+    campos: Optional[str] = QUERY_CAMPOS
+):
+    """
+    Búsqueda de texto libre sobre título, descripción, ubicación y características,
+    ordenada por relevancia y combinable con los filtros del listado (incluido `campos`)
+    """
+    seleccion = seleccion_campos(campos)
+    validadores = Validadores.de_catalogo(await repositorio.version())
+    if validadores.vigente(request):
+        return validadores.no_modificado()
+
+    filtros = FiltrosPropiedad(**parametros, pagina=pagina, limite=limite)
+    resultados, total = await repositorio.buscar(q, filtros)
+
+    a_json = serializador(seleccion)
+    return validadores.aplicar(respuesta_json(componer_json(
+        (a_json(prop_data) for prop_data in resultados),
+        "propiedades",
         total=total,
         pagina=pagina,
         limite=limite,
         total_paginas=math.ceil(total / limite) if total > 0 else 0
-    )
+    )))
+
+@router.get("/facetas", response_model=FacetasPropiedad)
+async def obtener_facetas(request: Request, response: Response, parametros: dict = Depends(parametros_filtro)):
+    """
+    Cantidad de propiedades por tipo, operación, habitaciones y baños, e
+    histogramas de precio y metros. Cada faceta aplica todos los filtros
+    salvo el suyo, para mostrar cuántas hay en cada alternativa.
+    """
+    validadores = Validadores.de_catalogo(await repositorio.version())
+    if validadores.vigente(request):
+        return validadores.no_modificado()
+
+    filtros = FiltrosPropiedad(**parametros)
+    validadores.aplicar(response)
+    return FacetasPropiedad(**await repositorio.facetas(filtros))
+
+@router.get("/exportar")
+async def exportar_propiedades(
+    parametros: dict = Depends(parametros_filtro),
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson o csv"),
+    desde: Optional[datetime] = Query(None, description="Sólo las modificadas después de esta fecha")
+):
+    """
+    Exporta todas las propiedades que cumplen los filtros (incluidas las
+    inactivas, para que los portales puedan darlas de baja), ordenadas por id
+    y en streaming. X-Desde-Siguiente trae el valor de `desde` para pedir la
+    próxima actualización incremental.
+    """
+    if desde is not None and desde.tzinfo is not None:
+        # Las fechas del catálogo se guardan en hora local sin zona
+        desde = desde.astimezone().replace(tzinfo=None)
+    siguiente, lotes = await repositorio.exportar(FiltrosPropiedad(**parametros), desde)
+    cabeceras = {"X-Desde-Siguiente": siguiente.isoformat(), "Cache-Control": "no-store"}
+    if formato == "csv":
+        cabeceras["Content-Disposition"] = 'attachment; filename="propiedades.csv"'
+        cuerpo, tipo = exportar_csv(lotes), "text/csv"
+    else:
+        # Sin guardar en el cache de serialización: el recorrido no debe desplazar lo que se consulta seguido
+        cuerpo = exportar_ndjson(lotes, lambda registro: repositorio.json(registro, guardar=False))
+        tipo = "application/x-ndjson"
+    return StreamingResponse(cuerpo, media_type=tipo, headers=cabeceras, background=BackgroundTask(cerrar, cuerpo))
 
 @router.get("/{propiedad_id}", response_model=Propiedad)
-async def obtener_propiedad(propiedad_id: int):
+async def obtener_propiedad(propiedad_id: int, request: Request):
     """
     Obtiene los detalles de una propiedad específica por ID
     """
+    # Copia del cliente al día: se cuenta la vista pero no se carga ni serializa
+    modificada = await repositorio.version_propiedad(propiedad_id)
+    if modificada is not None:
+        validadores = Validadores.de_propiedad(modificada)
+        if validadores.vigente(request):
+            await repositorio.contar_vista(propiedad_id)
+            return validadores.no_modificado()
+
     # Buscar la propiedad
-    propiedad_data = next((p for p in mock_propiedades if p["id"] == propiedad_id), None)
+    # e incrementar contador de vistas (en producción esto se haría en DB)
+    propiedad_data = await repositorio.registrar_vista(propiedad_id)
     
     if not propiedad_data:
         raise HTTPException(status_code=404, detail="Propiedad no encontrada")
     
-    # Incrementar contador de vistas (en producción esto se haría en DB)
-    propiedad_data["vistas"] += 1
-    
-    # Convertir coordenadas si existen
-    propiedad_data_copy = propiedad_data.copy()
-    if propiedad_data_copy["coordenadas"]:
-        propiedad_data_copy["coordenadas"] = Coordenadas(**propiedad_data_copy["coordenadas"])
-    
-    return Propiedad(**propiedad_data_copy)
+    # Validadores de lo que efectivamente se envía
+    validadores = Validadores.de_propiedad(
+        propiedad_data.get("fecha_actualizacion") or propiedad_data["fecha_publicacion"]
+    )
+    with medir("serializar"):
+        contenido = repositorio.json(propiedad_data)
+    return validadores.aplicar(respuesta_json(contenido))
 
 @router.post("/", response_model=Propiedad)
 async def crear_propiedad(propiedad: PropiedadCreate):
@@ -390,103 +523,110 @@ async def crear_propiedad(propiedad: PropiedadCreate):
     """
     # En producción: verificar autenticación y permisos
     
-    nuevo_id = max([p["id"] for p in mock_propiedades]) + 1
+    try:
+        nueva_propiedad = await repositorio.crear(propiedad)
+    except AgenteInexistente as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    nueva_propiedad = {
-        "id": nuevo_id,
-        **propiedad.dict(exclude={"agente_id"}),
-        "estado": "disponible",
-        "destacada": False,
-        "fecha_publicacion": datetime.now(),
-        "agente": mock_agente,
-        "vistas": 0
-    }
-    
-    mock_propiedades.append(nueva_propiedad)
-    
-    # Convertir coordenadas si existen
-    if nueva_propiedad["coordenadas"]:
-        nueva_propiedad["coordenadas"] = Coordenadas(**nueva_propiedad["coordenadas"])
-    
-    return Propiedad(**nueva_propiedad)
+    await cache.invalidar([particion_de(nueva_propiedad)])
+    return repositorio.modelo(nueva_propiedad)
+
+# Una importación puede tocar cualquier partición del cache de listados
+PARTICIONES = [(tipo.value, operacion.value) for tipo in TipoPropiedad for operacion in TipoOperacion]
+
+# Esquema de cada línea NDJSON para la documentación (sus submodelos ya están en components)
+ESQUEMA_IMPORTADA = PropiedadImportada.model_json_schema(ref_template="#/components/schemas/{model}")
+ESQUEMA_IMPORTADA.pop("$defs", None)
+
+async def invalidar_todo():
+    await cache.invalidar(PARTICIONES)
+
+@router.post(
+    "/importar",
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/x-ndjson": {"schema": ESQUEMA_IMPORTADA},
+        "text/csv": {"schema": {"type": "string"}}
+    }}}
+)
+async def importar_propiedades(request: Request):
+    """
+    Importa un feed de propiedades (application/x-ndjson o text/csv) en
+    streaming. Crea o actualiza cada propiedad según su clave_externa y
+    responde una línea NDJSON por registro, más un resumen al final.
+    """
+    tipo_contenido = request.headers.get("content-type", "")
+    if tipo_contenido.startswith("application/x-ndjson"):
+        procesar = importar_ndjson
+    elif tipo_contenido.startswith("text/csv"):
+        procesar = importar_csv
+    else:
+        raise HTTPException(status_code=415, detail="Se espera application/x-ndjson o text/csv")
+    # En producción: verificar autenticación y que los agente_id sean del usuario
+    return RespuestaNDJSON(procesar(request.stream(), Importacion(repositorio.importar, invalidar_todo)))
 
 @router.put("/{propiedad_id}", response_model=Propiedad)
 async def actualizar_propiedad(propiedad_id: int, propiedad_actualizada: PropiedadCreate):
     """
     Actualiza una propiedad existente
     """
-    # Buscar la propiedad
-    propiedad_index = next((i for i, p in enumerate(mock_propiedades) if p["id"] == propiedad_id), None)
-    
-    if propiedad_index is None:
+    # La partición anterior también cambia si la propiedad cambia de tipo u operación
+    anterior = await repositorio.obtener(propiedad_id)
+    if anterior is None:
         raise HTTPException(status_code=404, detail="Propiedad no encontrada")
-    
+    particion_anterior = particion_de(anterior)
+
     # Actualizar datos
-    propiedad_data = mock_propiedades[propiedad_index]
-    propiedad_data.update({
-        **propiedad_actualizada.dict(exclude={"agente_id"}),
-        "fecha_actualizacion": datetime.now()
-    })
+    try:
+        propiedad_data = await repositorio.actualizar(propiedad_id, propiedad_actualizada)
+    except AgenteInexistente as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Convertir coordenadas si existen
-    if propiedad_data["coordenadas"]:
-        propiedad_data["coordenadas"] = Coordenadas(**propiedad_data["coordenadas"])
+    if propiedad_data is None:
+        raise HTTPException(status_code=404, detail="Propiedad no encontrada")
     
-    return Propiedad(**propiedad_data)
+    await cache.invalidar([particion_anterior, particion_de(propiedad_data)])
+    return repositorio.modelo(propiedad_data)
 
 @router.delete("/{propiedad_id}")
 async def eliminar_propiedad(propiedad_id: int):
     """
     Elimina una propiedad (soft delete - cambia estado a inactiva)
     """
-    # Buscar la propiedad
-    propiedad_index = next((i for i, p in enumerate(mock_propiedades) if p["id"] == propiedad_id), None)
-    
-    if propiedad_index is None:
+    propiedad = await repositorio.obtener(propiedad_id)
+    if propiedad is None:
         raise HTTPException(status_code=404, detail="Propiedad no encontrada")
-    
+    particion = particion_de(propiedad)
+
     # En lugar de eliminar, cambiar estado (soft delete)
-    mock_propiedades[propiedad_index]["estado"] = "inactiva"
-    mock_propiedades[propiedad_index]["fecha_actualizacion"] = datetime.now()
+    if not await repositorio.eliminar(propiedad_id):
+        raise HTTPException(status_code=404, detail="Propiedad no encontrada")
     
+    await cache.invalidar([particion])
     return {"message": "Propiedad eliminada correctamente"}
 
 @router.get("/{propiedad_id}/similares", response_model=List[Propiedad])
-async def obtener_propiedades_similares(propiedad_id: int, limite: int = Query(4, ge=1, le=10)):
+async def obtener_propiedades_similares(request: Request, propiedad_id: int, limite: int = Query(4, ge=1, le=10),
+                                        campos: Optional[str] = QUERY_CAMPOS):
     """
     Obtiene propiedades similares basadas en tipo, operación y rango de precio
     """
+    seleccion = seleccion_campos(campos)
+    # Dependen de las demás propiedades, así que se validan contra todo el catálogo
+    validadores = Validadores.de_catalogo(await repositorio.version())
+    if validadores.vigente(request):
+        return validadores.no_modificado()
+
     # Buscar la propiedad base
-    propiedad_base = next((p for p in mock_propiedades if p["id"] == propiedad_id), None)
+    propiedad_base = await repositorio.obtener(propiedad_id)
     
     if not propiedad_base:
         raise HTTPException(status_code=404, detail="Propiedad no encontrada")
     
-    # Filtrar propiedades similares
-    rango_precio = propiedad_base["precio"] * 0.3  # ±30% del precio
-    precio_min = propiedad_base["precio"] - rango_precio
-    precio_max = propiedad_base["precio"] + rango_precio
-    
-    similares = [
-        p for p in mock_propiedades 
-        if p["id"] != propiedad_id
-        and p["tipo"] == propiedad_base["tipo"]
-        and p["operacion"] == propiedad_base["operacion"]
-        and precio_min <= p["precio"] <= precio_max
-        and p["estado"] == "disponible"
-    ]
-    
-    # Limitar resultados y convertir
-    similares = similares[:limite]
-    propiedades_response = []
-    
-    for prop_data in similares:
-        prop_data_copy = prop_data.copy()
-        if prop_data_copy["coordenadas"]:
-            prop_data_copy["coordenadas"] = Coordenadas(**prop_data_copy["coordenadas"])
-        propiedades_response.append(Propiedad(**prop_data_copy))
+    # Mismo tipo y operación, ±30% del precio y disponibles
+    similares = await repositorio.similares(propiedad_base, limite)
     
-    return propiedades_response
+    a_json = serializador(seleccion)
+    return validadores.aplicar(respuesta_json(componer_json(a_json(prop_data) for prop_data in similares)))
 
 @router.post("/{propiedad_id}/favorito")
 async def toggle_favorito(propiedad_id: int, usuario_id: str = Query(..., description="ID del usuario")):
@@ -496,7 +636,7 @@ async def toggle_favorito(propiedad_id: int, usuario_id: str = Query(..., descri
     # En producción: esto se manejaría con una tabla de favoritos en la DB
     # y autenticación del usuario
     
-    propiedad = next((p for p in mock_propiedades if p["id"] == propiedad_id), None)
+    propiedad = await repositorio.obtener(propiedad_id)
     if not propiedad:
         raise HTTPException(status_code=404, detail="Propiedad no encontrada")
     
@@ -509,35 +649,13 @@ async def toggle_favorito(propiedad_id: int, usuario_id: str = Query(..., descri
     }
 
 @router.get("/estadisticas/generales", response_model=EstadisticasPropiedad)
-async def obtener_estadisticas():
+async def obtener_estadisticas(request: Request, response: Response):
     """
     Obtiene estadísticas generales de las propiedades
     """
-    propiedades_activas = [p for p in mock_propiedades if p["estado"] == "disponible"]
-    
-    # Contar por tipo
-    por_tipo = {}
-    for prop in propiedades_activas:
-        tipo = prop["tipo"].value
-        por_tipo[tipo] = por_tipo.get(tipo, 0) + 1
-    
-    # Contar por operación
-    por_operacion = {}
-    for prop in propiedades_activas:
-        operacion = prop["operacion"].value
-        por_operacion[operacion] = por_operacion.get(operacion, 0) + 1
-    
-    # Precio promedio
-    precios = [p["precio"] for p in propiedades_activas]
-    precio_promedio = sum(precios) / len(precios) if precios else 0
-    
-    # Destacadas
-    destacadas = len([p for p in propiedades_activas if p["destacada"]])
-    
-    return EstadisticasPropiedad(
-        total_propiedades=len(propiedades_activas),
-        por_tipo=por_tipo,
-        por_operacion=por_operacion,
-        precio_promedio=precio_promedio,
-        propiedades_destacadas=destacadas
-    )
\ No newline at end of file
+    validadores = Validadores.de_catalogo(await repositorio.version())
+    if validadores.vigente(request):
+        return validadores.no_modificado()
+
+    validadores.aplicar(response)
+    return EstadisticasPropiedad(**await repositorio.estadisticas())
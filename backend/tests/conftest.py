@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del backend se importan desde su raíz, como en main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def catalogo(monkeypatch):
+    """Repositorio y cache propios de la prueba en lugar de los de la aplicación"""
+    from benchmarks.generador import AGENTE, generar_registros
+    from cache_consultas import CacheConsultas, CacheLocal
+    from repositorios import RepositorioMemoria
+    import routes.propiedades
+
+    repositorio = RepositorioMemoria(generar_registros(200, semilla=1), AGENTE)
+    monkeypatch.setattr(routes.propiedades, "repositorio", repositorio)
+    monkeypatch.setattr(routes.propiedades, "cache", CacheConsultas(CacheLocal()))
+    return repositorio
+
+
+@pytest.fixture
+def cliente(catalogo):
+    from fastapi.testclient import TestClient
+
+    import main
+
+    return TestClient(main.app, raise_server_exceptions=False)
@@ -0,0 +1,111 @@
+"""
+Referencia por fuerza bruta para las pruebas diferenciales del catálogo en
+memoria: el mismo filtro y el mismo orden, registro por registro.
+"""
+import random
+
+from benchmarks.generador import AGENTE, BARRIOS, generar_registros
+from catalogo.geo import distancia_km
+from models import FiltrosPropiedad
+from repositorios import RepositorioMemoria
+
+ORDENES = ["recientes", "precio-asc", "precio-desc", "metros-desc", "distancia"]
+
+
+def crear_repositorio(cantidad: int = 2000, semilla: int = 21) -> RepositorioMemoria:
+    registros = generar_registros(cantidad, semilla)
+    # Algunas sin coordenadas: las búsquedas geográficas las excluyen y la distancia las deja al final
+    for registro in registros[::37]:
+        registro["coordenadas"] = None
+    return RepositorioMemoria(registros, AGENTE)
+
+
+def cumple(registro, filtros: FiltrosPropiedad) -> bool:
+    coordenadas = registro["coordenadas"]
+    return (
+        (not filtros.tipo or registro["tipo"] == filtros.tipo)
+        and (not filtros.operacion or registro["operacion"] == filtros.operacion)
+        and (filtros.featured is None or registro["destacada"] == filtros.featured)
+        and (not filtros.habitaciones or registro["habitaciones"] >= filtros.habitaciones)
+        and (not filtros.banos or registro["banos"] >= filtros.banos)
+        and (not filtros.ubicacion or filtros.ubicacion.lower() in registro["ubicacion"].lower())
+        and (not filtros.precio_min or registro["precio"] >= filtros.precio_min)
+        and (not filtros.precio_max or registro["precio"] <= filtros.precio_max)
+        and (not filtros.metros_min or registro["metros"] >= filtros.metros_min)
+        and (not filtros.metros_max or registro["metros"] <= filtros.metros_max)
+        and (filtros.lat_min is None or (
+            coordenadas is not None
+            and filtros.lat_min <= coordenadas["lat"] <= filtros.lat_max
+            and filtros.lng_min <= coordenadas["lng"] <= filtros.lng_max
+        ))
+        and (filtros.radio_km is None or (
+            coordenadas is not None
+            and distancia_km(filtros.lat, filtros.lng, coordenadas["lat"], coordenadas["lng"]) <= filtros.radio_km
+        ))
+    )
+
+
+def clave(registro, filtros: FiltrosPropiedad):
+    """Orden del listado; los empates, por id"""
+    if filtros.orden == "distancia":
+        coordenadas = registro["coordenadas"]
+        distancia = (float("inf") if coordenadas is None
+                     else distancia_km(filtros.lat, filtros.lng, coordenadas["lat"], coordenadas["lng"]))
+        return distancia, registro["id"]
+    valor = {
+        "recientes": -registro["fecha_publicacion"].timestamp(),
+        "precio-asc": registro["precio"],
+        "precio-desc": -registro["precio"],
+        "metros-desc": -registro["metros"],
+    }[filtros.orden]
+    return valor, registro["id"]
+
+
+def fuerza_bruta(repositorio: RepositorioMemoria, filtros: FiltrosPropiedad) -> list:
+    return [registro["id"] for registro in sorted(
+        (registro for registro in repositorio.almacen if cumple(registro, filtros)),
+        key=lambda registro: clave(registro, filtros)
+    )]
+
+
+def filtros_al_azar(rnd: random.Random, geo: bool = True, **extra) -> FiltrosPropiedad:
+    """Sin geo no hay caja, radio ni orden por distancia"""
+    datos = {}
+    if rnd.random() < 0.4:
+        datos["tipo"] = rnd.choice(["departamento", "casa", "local", "oficina", "terreno", "quinta"])
+    if rnd.random() < 0.4:
+        datos["operacion"] = rnd.choice(["venta", "alquiler", "alquiler-temporal"])
+    if rnd.random() < 0.2:
+        datos["featured"] = rnd.random() < 0.5
+    if rnd.random() < 0.3:
+        datos["habitaciones"] = rnd.randint(0, 4)
+    if rnd.random() < 0.2:
+        datos["banos"] = rnd.randint(0, 3)
+    if rnd.random() < 0.25:
+        barrio = rnd.choice(BARRIOS)[0]
+        datos["ubicacion"] = barrio[:rnd.randint(3, len(barrio))].upper() if rnd.random() < 0.3 else barrio
+    if rnd.random() < 0.4:
+        # Bordes en valores redondos: hay muchos precios exactamente iguales
+        datos["precio_min"] = round(rnd.lognormvariate(11, 1.5), -2)
+    if rnd.random() < 0.4:
+        datos["precio_max"] = round(rnd.lognormvariate(12, 1.5), -2)
+    if rnd.random() < 0.3:
+        datos["metros_min"] = round(rnd.uniform(15, 200), 1)
+    if rnd.random() < 0.3:
+        datos["metros_max"] = round(rnd.uniform(40, 600), 1)
+    _, _, lat, lng, _ = rnd.choice(BARRIOS)
+    if geo and rnd.random() < 0.2:
+        medio_lat, medio_lng = rnd.uniform(0.001, 0.05), rnd.uniform(0.001, 0.05)
+        datos.update(lat_min=lat - medio_lat, lat_max=lat + medio_lat, lng_min=lng - medio_lng, lng_max=lng + medio_lng)
+    if geo and rnd.random() < 0.2:
+        datos.update(lat=lat + rnd.gauss(0, 0.01), lng=lng + rnd.gauss(0, 0.01), radio_km=rnd.uniform(0.2, 6))
+    orden = rnd.choice(ORDENES if geo else ORDENES[:-1])
+    if orden == "distancia" and "lat" not in datos:
+        datos.update(lat=lat, lng=lng)
+    datos.update(orden=orden, limite=rnd.randint(1, 40), pagina=rnd.randint(1, 6))
+    datos.update(extra)
+    return FiltrosPropiedad(**datos)
+
+
+def ids_de(pagina) -> list:
+    return [registro["id"] for registro in pagina]
@@ -0,0 +1,45 @@
+"""
+Almacén indexado por id: altas, cambios y bajas mantienen índices y órdenes.
+"""
+import random
+
+import pytest
+
+from benchmarks.generador import generar_propiedades
+from referencia import crear_repositorio, filtros_al_azar, fuerza_bruta, ids_de
+
+
+@pytest.mark.asyncio
+async def test_escrituras_mantienen_indices_y_ordenes():
+    repositorio = crear_repositorio(500)
+    rnd = random.Random(5)
+    propiedades = generar_propiedades(200, semilla=9)
+    for _ in range(150):
+        accion = rnd.random()
+        if accion < 0.4:
+            await repositorio.crear(next(propiedades))
+        elif accion < 0.8:
+            await repositorio.actualizar(rnd.randint(1, 500), next(propiedades))
+        else:
+            await repositorio.eliminar(rnd.randint(1, 500))
+    for _ in range(100):
+        filtros = filtros_al_azar(rnd, pagina=1, limite=100)
+        pagina, total, _ = await repositorio.listar(filtros)
+        esperados = fuerza_bruta(repositorio, filtros)
+        assert total == len(esperados), filtros
+        assert ids_de(pagina) == esperados[:100], filtros
+
+
+@pytest.mark.asyncio
+async def test_baja_logica_y_ids_que_no_se_reutilizan():
+    repositorio = crear_repositorio(20)
+    propiedades = generar_propiedades(2, semilla=11)
+    assert await repositorio.eliminar(20)
+    assert (await repositorio.obtener(20))["estado"] == "inactiva"
+    assert not await repositorio.eliminar(21)
+    assert await repositorio.actualizar(21, next(propiedades)) is None
+
+    nueva = await repositorio.crear(next(propiedades))
+    assert nueva["id"] == 21
+    assert await repositorio.obtener(21) == nueva
+    assert (await repositorio.obtener(7))["id"] == 7
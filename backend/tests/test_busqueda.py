@@ -0,0 +1,34 @@
+"""
+Índice invertido de la búsqueda de texto.
+"""
+import pytest
+
+from benchmarks.generador import generar_propiedades
+from catalogo.texto import TOLERANCIA_LARGO_MEDIO, analizar
+from models import FiltrosPropiedad
+from referencia import crear_repositorio
+
+
+@pytest.mark.asyncio
+async def test_busqueda_recalibra_el_largo_medio():
+    repositorio = crear_repositorio(300)
+    texto = repositorio.almacen.texto
+    filtros = FiltrosPropiedad(limite=100)
+    await repositorio.buscar("casa luminosa", filtros)
+    # Altas con descripciones mucho más largas corren el largo medio
+    for propiedad in generar_propiedades(150, semilla=10):
+        await repositorio.crear(propiedad.model_copy(update={"descripcion": propiedad.descripcion * 6}))
+    resultados, total = await repositorio.buscar("casa luminosa", filtros)
+
+    largo_medio = texto._largo_total / len(texto._documentos)
+    assert abs(texto._largo_medio - largo_medio) <= TOLERANCIA_LARGO_MEDIO * largo_medio
+    assert all(texto._normalizaciones[slot] == texto._normalizacion(largo) for slot, largo in texto._largos.items())
+    terminos = set(analizar("casa luminosa"))
+    coincidencias = [
+        registro for registro in repositorio.almacen
+        if registro["estado"] == "disponible" and terminos & set(analizar(" ".join([
+            registro["titulo"], registro["descripcion"], registro["ubicacion"], *registro["caracteristicas"]
+        ])))
+    ]
+    assert total == len(coincidencias)
+    assert len(resultados) == min(100, total)
@@ -0,0 +1,78 @@
+import pytest
+
+from benchmarks.generador import generar_propiedades
+from cache_consultas import CacheConsultas, CacheLocal, CacheRedis, RedisEnMemoria
+import routes.propiedades
+
+
+@pytest.mark.asyncio
+async def test_invalidar_cambia_solo_las_claves_que_cubren_la_particion():
+    cache = CacheConsultas(CacheLocal())
+    consultas = {
+        "casa-venta": {"tipo": "casa", "operacion": "venta"},
+        "casa": {"tipo": "casa"},
+        "venta": {"operacion": "venta"},
+        "todas": {"pagina": 1},
+        "casa-alquiler": {"tipo": "casa", "operacion": "alquiler"},
+        "local": {"tipo": "local"},
+    }
+    antes = {nombre: await cache.clave(parametros) for nombre, parametros in consultas.items()}
+    await cache.invalidar([("casa", "venta")])
+    despues = {nombre: await cache.clave(parametros) for nombre, parametros in consultas.items()}
+
+    cambiadas = {nombre for nombre in consultas if antes[nombre] != despues[nombre]}
+    assert cambiadas == {"casa-venta", "casa", "venta", "todas"}
+
+
+@pytest.mark.asyncio
+async def test_clave_normaliza_los_parametros():
+    cache = CacheConsultas(CacheLocal())
+    assert await cache.clave({"tipo": "casa", "ubicacion": "Centro"}) == \
+        await cache.clave({"ubicacion": "centro", "tipo": "casa", "banos": None})
+    # El filtro no recorta espacios: " centro " no encuentra "Centro, Rosario"
+    assert await cache.clave({"ubicacion": " centro "}) != await cache.clave({"ubicacion": "centro"})
+
+
+@pytest.mark.asyncio
+async def test_clave_respeta_mayusculas_del_cursor():
+    cache = CacheConsultas(CacheLocal())
+    assert await cache.clave({"cursor": "eyJwIjoxfQ"}) != await cache.clave({"cursor": "EYJWIJOXFQ"})
+
+
+@pytest.mark.asyncio
+async def test_invalidacion_compartida_entre_procesos():
+    redis = RedisEnMemoria()
+    proceso_a = CacheConsultas(CacheLocal(), CacheRedis(redis))
+    proceso_b = CacheConsultas(CacheLocal(), CacheRedis(redis))
+    parametros = {"tipo": "casa"}
+
+    clave = await proceso_a.clave(parametros)
+    await proceso_a.guardar(clave, b"pagina")
+    # El otro proceso la encuentra en Redis y la copia a su nivel local
+    assert await proceso_b.obtener(await proceso_b.clave(parametros)) == b"pagina"
+
+    await proceso_a.invalidar([("casa", "venta")])
+    assert await proceso_b.obtener(await proceso_b.clave(parametros)) is None
+
+
+def test_escrituras_invalidan_los_listados_afectados(cliente, catalogo):
+    cache = routes.propiedades.cache
+    casas = cliente.get("/api/propiedades/", params={"tipo": "casa", "operacion": "venta"}).json()
+    locales = cliente.get("/api/propiedades/", params={"tipo": "local"}).json()
+
+    propiedad = next(generar_propiedades(1, semilla=2)).model_copy(update={"tipo": "casa", "operacion": "venta"})
+    assert cliente.post("/api/propiedades/", content=propiedad.model_dump_json()).status_code == 200
+
+    aciertos = cache.aciertos
+    assert cliente.get("/api/propiedades/", params={"tipo": "local"}).json() == locales
+    assert cache.aciertos == aciertos + 1
+    nuevas = cliente.get("/api/propiedades/", params={"tipo": "casa", "operacion": "venta"}).json()
+    assert nuevas["total"] == casas["total"] + 1
+    assert cache.aciertos == aciertos + 1
+
+    # Cambiar de partición invalida la anterior y la nueva
+    propiedad_id = nuevas["propiedades"][0]["id"]
+    cambio = propiedad.model_copy(update={"tipo": "local"})
+    assert cliente.put(f"/api/propiedades/{propiedad_id}", content=cambio.model_dump_json()).status_code == 200
+    assert cliente.get("/api/propiedades/", params={"tipo": "local"}).json()["total"] == locales["total"] + 1
+    assert cliente.get("/api/propiedades/", params={"tipo": "casa", "operacion": "venta"}).json()["total"] == casas["total"]
@@ -0,0 +1,41 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from routes.chatbot import MAX_BYTES_LOTE
+
+cliente = TestClient(main.app, raise_server_exceptions=False)
+
+
+def test_lote_json_compacto():
+    respuesta = cliente.post("/api/chatbot/mensajes/lote", json=[{"mensaje": "hola"}, {"mensaje": "¿qué precio tiene?"}])
+    assert respuesta.status_code == 200
+    assert [r["intencion"] for r in respuesta.json()] == ["saludo", "precios"]
+    assert b'", "' not in respuesta.content
+
+
+def test_lote_json_demasiado_grande_se_corta_antes_de_validar():
+    cuerpo = b"[" + b'{"mensaje":"hola"},' * (MAX_BYTES_LOTE // 19) + b'{"mensaje":"hola"}]'
+    assert cliente.post("/api/chatbot/mensajes/lote", content=cuerpo,
+                        headers={"Content-Type": "application/json"}).status_code == 413
+
+    def sin_largo():
+        # Sin Content-Length: se corta al leer
+        yield b"["
+        for _ in range(MAX_BYTES_LOTE // 1900 + 1):
+            yield b'{"mensaje":"hola"},' * 100
+
+    assert cliente.post("/api/chatbot/mensajes/lote", content=sin_largo(),
+                        headers={"Content-Type": "application/json"}).status_code == 413
+
+
+def test_lote_ndjson_con_errores_por_linea():
+    cuerpo = b'{"mensaje":"hola"}\n{"mensaje":""}\n\n' + b"x" * (2 * 1024 * 1024) + b'\n{"mensaje":"gracias"}\n'
+    respuesta = cliente.post("/api/chatbot/mensajes/lote", content=cuerpo,
+                             headers={"Content-Type": "application/x-ndjson"})
+    lineas = [json.loads(linea) for linea in respuesta.text.splitlines()]
+    assert lineas[0]["intencion"] == "saludo"
+    assert lineas[1]["linea"] == 2 and "error" in lineas[1]
+    assert lineas[2]["linea"] == 4 and lineas[2]["error"].startswith("La línea supera")
+    assert lineas[3]["intencion"] == "despedida"
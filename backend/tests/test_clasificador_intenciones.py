@@ -0,0 +1,52 @@
+import re
+
+import pytest
+
+from clasificador_intenciones import (
+    CONFIANZA_DEFAULT, CONFIANZA_MAXIMA, ClasificadorIntenciones, expandir_patron
+)
+from routes.chatbot import PATRONES_INTENCION, clasificador
+
+
+def test_expandir_patron():
+    assert sorted(expandir_patron("cu[aá]nto")) == ["cuanto", "cuánto"]
+    assert sorted(expandir_patron("casas?")) == ["casa", "casas"]
+    assert expandir_patron("hola.*") == ["hola"]
+    assert expandir_patron("(a|b)") is None
+
+
+def test_cuenta_coincidencias_superpuestas_y_prefijos():
+    c = ClasificadorIntenciones({"a": ["alquil", "alquiler"], "b": ["quiler"], "c": ["x(y|z)"]})
+    # "alquil" es prefijo de "alquiler" y "quiler" se superpone con ambas
+    assert c.puntajes("alquiler") == {"a": 2, "b": 1}
+    assert c.puntajes("xy xz") == {"c": 2}
+
+
+def test_un_punto_por_patron_y_posicion():
+    c = ClasificadorIntenciones({"a": ["casas?"], "b": ["casas?", "casa"]})
+    assert c.puntajes("casas") == {"a": 1, "b": 2}
+    assert c.puntajes("casas y casa") == {"a": 2, "b": 4}
+
+
+def test_confianza_por_proporcion_del_puntaje():
+    c = ClasificadorIntenciones({"a": ["hola"], "b": ["chau"]})
+    assert c.clasificar("Hola") == ("a", CONFIANZA_MAXIMA)
+    assert c.clasificar("nada") == ("default", CONFIANZA_DEFAULT)
+    intencion, confianza = c.clasificar("hola hola chau")
+    assert intencion == "a"
+    assert confianza == pytest.approx(CONFIANZA_DEFAULT + (CONFIANZA_MAXIMA - CONFIANZA_DEFAULT) * 2 / 3, abs=1e-3)
+    # A igualdad gana la intención declarada primero, con la confianza de la mitad
+    assert c.clasificar("chau hola") == ("a", pytest.approx((CONFIANZA_DEFAULT + CONFIANZA_MAXIMA) / 2))
+
+
+@pytest.mark.parametrize("intencion", list(PATRONES_INTENCION))
+def test_cada_patron_cuenta_como_con_re_search(intencion):
+    """Cada patrón suma un punto por cada posición donde re.match lo encuentra"""
+    patrones = PATRONES_INTENCION[intencion]
+    for patron in patrones:
+        for palabra in expandir_patron(patron) or []:
+            mensaje = f"{palabra} y {palabra}s"
+            esperado = sum(
+                1 for i in range(len(mensaje)) for otro in patrones if re.match(otro, mensaje[i:])
+            )
+            assert clasificador.puntajes(mensaje)[intencion] == esperado, (patron, mensaje)
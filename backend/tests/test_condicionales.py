@@ -0,0 +1,34 @@
+from benchmarks.generador import generar_propiedades
+
+
+def test_listado_responde_304_hasta_que_cambia_el_catalogo(cliente):
+    respuesta = cliente.get("/api/propiedades/", params={"tipo": "casa"})
+    etag = respuesta.headers["etag"]
+    assert cliente.get("/api/propiedades/", params={"tipo": "casa"}, headers={"If-None-Match": etag}).status_code == 304
+
+    propiedad = next(generar_propiedades(1, semilla=4))
+    cliente.post("/api/propiedades/", content=propiedad.model_dump_json())
+    respuesta = cliente.get("/api/propiedades/", params={"tipo": "casa"}, headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["etag"] != etag
+
+
+def test_detalle_con_last_modified(cliente):
+    respuesta = cliente.get("/api/propiedades/5")
+    modificado = respuesta.headers["last-modified"]
+    etag = respuesta.headers["etag"]
+    assert cliente.get("/api/propiedades/5", headers={"If-Modified-Since": modificado}).status_code == 304
+    assert cliente.get("/api/propiedades/5", headers={"If-None-Match": etag}).status_code == 304
+    # Las vistas no cambian la versión de la propiedad
+    assert cliente.get("/api/propiedades/5", headers={"If-None-Match": etag}).status_code == 304
+
+    cambio = next(generar_propiedades(1, semilla=6))
+    assert cliente.put("/api/propiedades/5", content=cambio.model_dump_json()).status_code == 200
+    assert cliente.get("/api/propiedades/5", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_sugerencias_con_etag_fuerte(cliente):
+    respuesta = cliente.get("/api/chatbot/sugerencias")
+    etag = respuesta.headers["etag"]
+    assert not etag.startswith("W/")
+    assert cliente.get("/api/chatbot/sugerencias", headers={"If-None-Match": etag}).status_code == 304
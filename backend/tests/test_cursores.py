@@ -0,0 +1,64 @@
+"""
+Paginado por cursor: el recorrido completo coincide con la fuerza bruta.
+"""
+import random
+
+import pytest
+
+from benchmarks.generador import generar_propiedades
+from models import FiltrosPropiedad
+from referencia import ORDENES, crear_repositorio, filtros_al_azar, fuerza_bruta, ids_de
+from repositorios import CursorInvalido, codificar_cursor, decodificar_cursor
+
+
+@pytest.fixture(scope="module")
+def repositorio():
+    return crear_repositorio()
+
+
+async def recorrer_con_cursor(repositorio, filtros: FiltrosPropiedad) -> list:
+    ids = []
+    desde = None
+    while True:
+        pagina, _, hay_mas = await repositorio.listar(filtros, desde)
+        ids.extend(ids_de(pagina))
+        if not hay_mas:
+            return ids
+        desde = decodificar_cursor(codificar_cursor(filtros.orden, pagina[-1]), filtros.orden)
+
+
+@pytest.mark.asyncio
+async def test_recorrido_con_cursor_igual_a_fuerza_bruta(repositorio):
+    rnd = random.Random(4)
+    for _ in range(120):
+        filtros = filtros_al_azar(rnd, orden=rnd.choice(ORDENES[:-1]), pagina=1)
+        assert await recorrer_con_cursor(repositorio, filtros) == fuerza_bruta(repositorio, filtros), filtros
+
+
+@pytest.mark.asyncio
+async def test_cursor_no_repite_ni_saltea_con_altas_en_el_medio():
+    repositorio = crear_repositorio(300)
+    filtros = FiltrosPropiedad(orden="precio-asc", limite=25)
+    anteriores = fuerza_bruta(repositorio, filtros)
+    pagina, _, _ = await repositorio.listar(filtros)
+    desde = decodificar_cursor(codificar_cursor("precio-asc", pagina[-1]), "precio-asc")
+    # Una más barata que todo lo ya entregado y otra más cara: sólo la segunda entra en lo que falta
+    base = next(generar_propiedades(1, semilla=8))
+    barata = await repositorio.crear(base.model_copy(update={"precio": 1.0}))
+    cara = await repositorio.crear(base.model_copy(update={"precio": 10 ** 9}))
+
+    ids = ids_de(pagina)
+    while desde is not None:
+        pagina, _, hay_mas = await repositorio.listar(filtros, desde)
+        ids.extend(ids_de(pagina))
+        desde = decodificar_cursor(codificar_cursor("precio-asc", pagina[-1]), "precio-asc") if hay_mas else None
+    assert ids == anteriores + [cara["id"]]
+    assert barata["id"] not in ids
+
+
+def test_cursor_de_otro_orden_es_invalido(repositorio):
+    registro = repositorio.almacen.registros[0]
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(codificar_cursor("precio-asc", registro), "recientes")
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor("no-es-un-cursor", "recientes")
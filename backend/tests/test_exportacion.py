@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from benchmarks.generador import AGENTE, generar_propiedades, generar_registros
+from models import FiltrosPropiedad
+from repositorios import RepositorioMemoria
+
+
+async def ids_exportados(repositorio, desde=None):
+    marca, lotes = await repositorio.exportar(FiltrosPropiedad(), desde, tamano_lote=7)
+    ids = [registro["id"] async for lote in lotes for registro in lote]
+    return marca, ids
+
+
+@pytest.mark.asyncio
+async def test_exportacion_completa_por_id():
+    repositorio = RepositorioMemoria(generar_registros(50), AGENTE)
+    _, ids = await ids_exportados(repositorio)
+    assert ids == list(range(1, 51))
+
+
+@pytest.mark.asyncio
+async def test_incremental_desde_la_marca():
+    repositorio = RepositorioMemoria(generar_registros(50), AGENTE)
+    marca, _ = await ids_exportados(repositorio)
+    _, ids = await ids_exportados(repositorio, marca)
+    assert ids == []
+
+    nueva = await repositorio.crear(next(generar_propiedades(1, semilla=5)))
+    await repositorio.actualizar(10, next(generar_propiedades(1, semilla=6)))
+    siguiente, ids = await ids_exportados(repositorio, marca)
+    assert ids == [10, nueva["id"]]
+    assert siguiente > marca
+
+
+@pytest.mark.asyncio
+async def test_escritura_durante_la_exportacion_sale_en_la_siguiente():
+    repositorio = RepositorioMemoria(generar_registros(50), AGENTE)
+    marca, lotes = await repositorio.exportar(FiltrosPropiedad(), tamano_lote=10)
+    await anext(lotes)
+    # Ya exportada en el primer lote, se modifica antes de que termine el recorrido
+    await repositorio.actualizar(3, next(generar_propiedades(1, semilla=6)))
+    async for _ in lotes:
+        pass
+    _, ids = await ids_exportados(repositorio, marca)
+    assert ids == [3]
+
+
+@pytest.mark.asyncio
+async def test_desconexion_cierra_los_lotes(catalogo, monkeypatch):
+    import main
+
+    cerrados = asyncio.Event()
+
+    async def lotes():
+        try:
+            while True:
+                yield [catalogo.almacen.obtener(1)]
+        finally:
+            cerrados.set()
+
+    # Con una referencia viva el GC no los cierra: tiene que hacerlo la respuesta
+    generados = []
+
+    async def exportar(filtros, desde=None, tamano_lote=500):
+        generados.append(lotes())
+        return datetime.now(), generados[-1]
+
+    monkeypatch.setattr(catalogo, "exportar", exportar)
+    alcance = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/api/propiedades/exportar", "raw_path": b"/api/propiedades/exportar",
+        "root_path": "", "query_string": b"", "headers": [],
+        "server": ("prueba", 80), "client": ("prueba", 1234),
+    }
+    recibidos = 0
+
+    async def recibir():
+        # El cliente se va después de recibir algunos lotes
+        while recibidos < 3:
+            await asyncio.sleep(0)
+        return {"type": "http.disconnect"}
+
+    async def enviar(mensaje):
+        nonlocal recibidos
+        if mensaje["type"] == "http.response.body":
+            recibidos += 1
+        # La desconexión llega mientras se envía: los lotes quedan suspendidos
+        await asyncio.sleep(0)
+
+    await asyncio.wait_for(main.app(alcance, recibir, enviar), timeout=5)
+    assert cerrados.is_set()
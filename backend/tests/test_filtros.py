@@ -0,0 +1,32 @@
+"""
+Filtros del catálogo en memoria contra la referencia por fuerza bruta.
+"""
+import random
+
+import pytest
+
+from models import FiltrosPropiedad
+from referencia import crear_repositorio, filtros_al_azar, fuerza_bruta, ids_de
+
+
+@pytest.fixture(scope="module")
+def repositorio():
+    return crear_repositorio()
+
+
+@pytest.mark.asyncio
+async def test_filtros_igual_a_fuerza_bruta(repositorio):
+    rnd = random.Random(3)
+    for _ in range(300):
+        filtros = filtros_al_azar(rnd, geo=False, orden="recientes", pagina=1, limite=100)
+        esperados = fuerza_bruta(repositorio, filtros)
+        pagina, total, _ = await repositorio.listar(filtros)
+        assert total == len(esperados), filtros
+        assert ids_de(pagina) == esperados[:100], filtros
+
+
+@pytest.mark.asyncio
+async def test_ubicacion_sin_distinguir_mayusculas(repositorio):
+    _, minusculas, _ = await repositorio.listar(FiltrosPropiedad(ubicacion="pichincha"))
+    _, mayusculas, _ = await repositorio.listar(FiltrosPropiedad(ubicacion="PICHINCHA"))
+    assert minusculas == mayusculas > 0
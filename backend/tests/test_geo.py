@@ -0,0 +1,26 @@
+"""
+Búsqueda por radio y por caja, y orden por distancia, contra la fuerza bruta.
+"""
+import random
+
+import pytest
+
+from referencia import crear_repositorio, filtros_al_azar, fuerza_bruta, ids_de
+
+
+@pytest.fixture(scope="module")
+def repositorio():
+    return crear_repositorio()
+
+
+@pytest.mark.asyncio
+async def test_geo_igual_a_fuerza_bruta(repositorio):
+    rnd = random.Random(6)
+    for _ in range(300):
+        filtros = filtros_al_azar(rnd)
+        esperados = fuerza_bruta(repositorio, filtros)
+        pagina, total, _ = await repositorio.listar(filtros)
+        inicio = (filtros.pagina - 1) * filtros.limite
+        assert total == len(esperados), filtros
+        assert ids_de(pagina) == esperados[inicio:inicio + filtros.limite], filtros
+
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from benchmarks.generador import AGENTE, generar_propiedades, generar_registros
+from flujos import ERROR_LINEA_LARGA, MAX_LINEA, lineas
+from importacion import Importacion, importar_csv, importar_ndjson
+from models import PropiedadImportada
+from repositorios import RepositorioMemoria
+
+
+async def en_bloques(datos: bytes, tamano: int = 37):
+    for inicio in range(0, len(datos), tamano):
+        yield datos[inicio:inicio + tamano]
+
+
+async def importar(repositorio, procesar, cuerpo: bytes, tamano_lote: int = 3) -> list:
+    guardados = []
+
+    async def al_guardar():
+        guardados.append(True)
+
+    importacion = Importacion(repositorio.importar, al_guardar, tamano_lote)
+    salida = b"".join([bloque async for bloque in procesar(en_bloques(cuerpo), importacion)])
+    return [json.loads(linea) for linea in salida.splitlines()]
+
+
+def feed(cantidad: int, semilla: int = 1, **cambios) -> list:
+    return [
+        PropiedadImportada(**propiedad.model_dump(), clave_externa=f"portal-{i}").model_copy(update=cambios)
+        for i, propiedad in enumerate(generar_propiedades(cantidad, semilla))
+    ]
+
+
+def ndjson(propiedades) -> bytes:
+    return b"".join(propiedad.model_dump_json().encode() + b"\n" for propiedad in propiedades)
+
+
+@pytest.mark.asyncio
+async def test_reimportar_actualiza_por_clave_externa():
+    repositorio = RepositorioMemoria(generar_registros(20), AGENTE)
+    primera = await importar(repositorio, importar_ndjson, ndjson(feed(7)))
+    assert [linea["accion"] for linea in primera[:-1]] == ["creada"] * 7
+    assert primera[-1] == {"resumen": {"registros": 7, "creadas": 7, "actualizadas": 0, "errores": 0}}
+
+    segunda = await importar(repositorio, importar_ndjson, ndjson(feed(7, precio=12345.0)))
+    assert [linea["id"] for linea in segunda[:-1]] == [linea["id"] for linea in primera[:-1]]
+    assert [linea["accion"] for linea in segunda[:-1]] == ["actualizada"] * 7
+    for linea in segunda[:-1]:
+        assert (await repositorio.obtener(linea["id"]))["precio"] == 12345.0
+    assert len(repositorio.almacen) == 27
+
+
+@pytest.mark.asyncio
+async def test_clave_repetida_en_el_mismo_feed_se_aplica_en_orden():
+    repositorio = RepositorioMemoria([], AGENTE)
+    propiedad = feed(1)[0]
+    resultados = await importar(repositorio, importar_ndjson, ndjson([
+        propiedad, propiedad.model_copy(update={"precio": 1000.0}), propiedad.model_copy(update={"precio": 2000.0})
+    ]), tamano_lote=10)
+    assert [linea["accion"] for linea in resultados[:-1]] == ["creada", "actualizada", "actualizada"]
+    assert (await repositorio.obtener(resultados[0]["id"]))["precio"] == 2000.0
+
+
+@pytest.mark.asyncio
+async def test_errores_por_registro_no_cortan_el_feed():
+    otro_agente = AGENTE.model_copy(update={"id": 2})
+    registros = generar_registros(3)
+    registros[0]["agente"] = otro_agente
+    repositorio = RepositorioMemoria(registros, AGENTE)
+    validas = feed(3)
+    cuerpo = b"".join([
+        validas[0].model_dump_json().encode(), b"\n",
+        b'{"titulo": "x"}\n',
+        b"\n",
+        validas[1].model_copy(update={"agente_id": 99}).model_dump_json().encode(), b"\n",
+        b"a" * (MAX_LINEA + 10), b"\n",
+        validas[2].model_copy(update={"agente_id": 2}).model_dump_json().encode(),
+    ])
+    resultados = await importar(repositorio, importar_ndjson, cuerpo)
+    por_linea = {linea["linea"]: linea for linea in resultados[:-1]}
+    assert por_linea[1]["accion"] == "creada"
+    assert {error["loc"][0] for error in por_linea[2]["error"]} >= {"descripcion", "precio", "clave_externa"}
+    assert por_linea[4] == {"linea": 4, "error": "No existe el agente 99", "clave_externa": "portal-1"}
+    assert por_linea[5] == {"linea": 5, "error": ERROR_LINEA_LARGA}
+    assert por_linea[6]["accion"] == "creada"
+    assert (await repositorio.obtener(por_linea[6]["id"]))["agente"].id == 2
+    assert resultados[-1]["resumen"] == {"registros": 5, "creadas": 2, "actualizadas": 0, "errores": 3}
+
+
+@pytest.mark.asyncio
+async def test_csv_con_listas_y_saltos_de_linea_entre_comillas():
+    repositorio = RepositorioMemoria([], AGENTE)
+    descripcion = "Departamento luminoso con balcón,\nfrente al parque y cerca de todo el centro"
+    cuerpo = (
+        "clave_externa,titulo,descripcion,precio,ubicacion,tipo,operacion,habitaciones,banos,metros,agente_id,lat,lng,caracteristicas\r\n"
+        f'c1,Departamento en el centro,"{descripcion}",150000,"Centro, Rosario",departamento,venta,2,1,60,1,-32.95,-60.64,Balcón|Cochera\r\n'
+        "c2,Sólo tres,columnas\r\n"
+        'c3,Comillas,"sin cerrar,1,2\r\n'
+    ).encode("utf-8")
+    resultados = await importar(repositorio, importar_csv, cuerpo)
+    por_linea = {linea["linea"]: linea for linea in resultados[:-1]}
+    # El registro entre comillas ocupa las líneas 2 y 3 y se informa con la primera
+    assert por_linea[2]["accion"] == "creada"
+    registro = await repositorio.obtener(por_linea[2]["id"])
+    assert registro["descripcion"] == descripcion
+    assert list(registro["caracteristicas"]) == ["Balcón", "Cochera"]
+    assert registro["coordenadas"] == {"lat": -32.95, "lng": -60.64}
+    assert por_linea[4] == {"linea": 4, "error": "Se esperaban 14 columnas y hay 3"}
+    assert por_linea[5] == {"linea": 5, "error": "Comillas sin cerrar al final del archivo"}
+
+
+@pytest.mark.asyncio
+async def test_lineas_sin_salto_no_se_acumulan():
+    async def sin_saltos():
+        for _ in range(100):
+            yield b"x" * 1000
+
+    bloques = [bloque async for bloque in lineas(sin_saltos(), max_linea=5000)]
+    assert bloques == [[None]]
+
+    bloques = [bloque async for bloque in lineas(en_bloques(b"ab\ncdefgh\nij", 2), max_linea=4)]
+    assert [linea for bloque in bloques for linea in bloque] == [b"ab", None, b"ij"]
+
+
+def test_importar_por_la_api_invalida_el_listado(cliente):
+    antes = cliente.get("/api/propiedades/").json()["total"]
+    respuesta = cliente.post(
+        "/api/propiedades/importar", content=ndjson(feed(4)), headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert json.loads(respuesta.text.splitlines()[-1])["resumen"]["creadas"] == 4
+    assert cliente.get("/api/propiedades/").json()["total"] == antes + 4
+    assert cliente.post("/api/propiedades/importar", content=b"{}", headers={"Content-Type": "text/plain"}).status_code == 415
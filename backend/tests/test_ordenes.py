@@ -0,0 +1,26 @@
+"""
+Órdenes mantenidos y paginado por top-k contra un orden completo por fuerza bruta.
+"""
+import random
+
+import pytest
+
+from referencia import crear_repositorio, filtros_al_azar, fuerza_bruta, ids_de
+
+
+@pytest.fixture(scope="module")
+def repositorio():
+    return crear_repositorio()
+
+
+@pytest.mark.asyncio
+async def test_paginas_igual_a_fuerza_bruta(repositorio):
+    rnd = random.Random(4)
+    for _ in range(400):
+        filtros = filtros_al_azar(rnd, geo=False)
+        esperados = fuerza_bruta(repositorio, filtros)
+        pagina, total, hay_mas = await repositorio.listar(filtros)
+        inicio = (filtros.pagina - 1) * filtros.limite
+        assert total == len(esperados), filtros
+        assert ids_de(pagina) == esperados[inicio:inicio + filtros.limite], filtros
+        assert hay_mas == (inicio + filtros.limite < total)
@@ -0,0 +1,161 @@
+"""
+Repositorio de PostgreSQL contra el de memoria con los mismos datos: filtros,
+órdenes y páginas, cursores, carga de las tablas hijas y escrituras.
+Necesita TEST_DATABASE_URL con db/schema.sql aplicado (se vacían sus propiedades).
+"""
+import os
+import random
+
+import pytest
+import pytest_asyncio
+
+from benchmarks.generador import AGENTE, generar_propiedades
+from models import FiltrosPropiedad, PropiedadImportada
+from referencia import filtros_al_azar, ids_de
+from repositorios import RepositorioMemoria, codificar_cursor, decodificar_cursor
+
+pytestmark = pytest.mark.skipif(
+    "TEST_DATABASE_URL" not in os.environ,
+    reason="TEST_DATABASE_URL: base de prueba con db/schema.sql (se vacían sus propiedades)"
+)
+
+CANTIDAD = 400
+CAMPOS = ("titulo", "precio", "ubicacion", "tipo", "operacion", "habitaciones", "banos", "metros",
+          "caracteristicas", "servicios", "imagenes", "coordenadas", "estado")
+
+
+def contenido(registro) -> dict:
+    return {campo: list(registro[campo]) if campo in ("caracteristicas", "servicios", "imagenes")
+            else registro[campo] for campo in CAMPOS}
+
+
+@pytest_asyncio.fixture
+async def repositorios():
+    from repositorios.postgres import RepositorioPostgres
+
+    postgres = RepositorioPostgres(os.environ["TEST_DATABASE_URL"])
+    await postgres.iniciar()
+    try:
+        async with postgres._pool.acquire() as conexion:
+            await conexion.execute("TRUNCATE propiedades, estadisticas_propiedades RESTART IDENTITY CASCADE")
+            agente_id = await conexion.fetchval("SELECT id FROM usuarios ORDER BY id LIMIT 1")
+        memoria = RepositorioMemoria([], AGENTE)
+        for i, propiedad in enumerate(generar_propiedades(CANTIDAD, semilla=13)):
+            cambios = {"agente_id": agente_id}
+            # Algunas sin coordenadas: la distancia las deja al final en los dos
+            if i % 37 == 0:
+                cambios["coordenadas"] = None
+            propiedad = propiedad.model_copy(update=cambios)
+            await postgres.crear(propiedad)
+            await memoria.crear(propiedad)
+        yield postgres, memoria, agente_id
+    finally:
+        await postgres.cerrar()
+
+
+async def recorrer_con_cursor(repositorio, filtros: FiltrosPropiedad) -> list:
+    ids = []
+    desde = None
+    while True:
+        pagina, _, hay_mas = await repositorio.listar(filtros, desde)
+        ids.extend(ids_de(pagina))
+        if not hay_mas:
+            return ids
+        desde = decodificar_cursor(codificar_cursor(filtros.orden, pagina[-1]), filtros.orden)
+
+
+@pytest.mark.asyncio
+async def test_filtros_ordenes_y_paginas_igual_a_memoria(repositorios):
+    postgres, memoria, _ = repositorios
+    rnd = random.Random(13)
+    for _ in range(200):
+        filtros = filtros_al_azar(rnd)
+        en_postgres = await postgres.listar(filtros)
+        en_memoria = await memoria.listar(filtros)
+        assert en_postgres[1] == en_memoria[1], filtros
+        assert ids_de(en_postgres[0]) == ids_de(en_memoria[0]), filtros
+        assert en_postgres[2] == en_memoria[2], filtros
+
+
+@pytest.mark.asyncio
+async def test_cursor_igual_a_memoria(repositorios):
+    postgres, memoria, _ = repositorios
+    rnd = random.Random(14)
+    for orden in ("recientes", "precio-asc", "precio-desc", "metros-desc"):
+        filtros = filtros_al_azar(rnd, geo=False, orden=orden, pagina=1, limite=17)
+        assert await recorrer_con_cursor(postgres, filtros) == await recorrer_con_cursor(memoria, filtros), filtros
+
+
+@pytest.mark.asyncio
+async def test_tablas_hijas_cargadas_en_lote(repositorios):
+    postgres, memoria, _ = repositorios
+    pagina, _, _ = await postgres.listar(FiltrosPropiedad(orden="precio-asc", limite=60))
+    assert any(registro["caracteristicas"] and registro["imagenes"] for registro in pagina)
+    for registro in pagina:
+        assert contenido(registro) == contenido(await memoria.obtener(registro["id"]))
+        # Las de una página salen iguales que leídas de a una
+        assert registro == await postgres.obtener(registro["id"])
+
+
+@pytest.mark.asyncio
+async def test_escrituras_igual_a_memoria(repositorios):
+    postgres, memoria, agente_id = repositorios
+    version, _ = await postgres.version()
+    propiedades = generar_propiedades(30, semilla=15)
+    rnd = random.Random(15)
+    for _ in range(30):
+        accion = rnd.random()
+        if accion < 0.3:
+            propiedad = next(propiedades).model_copy(update={"agente_id": agente_id})
+            assert (await postgres.crear(propiedad))["id"] == (await memoria.crear(propiedad))["id"]
+        elif accion < 0.8:
+            propiedad_id = rnd.randint(1, CANTIDAD)
+            propiedad = next(propiedades).model_copy(update={"agente_id": agente_id})
+            actualizada = await postgres.actualizar(propiedad_id, propiedad)
+            assert contenido(actualizada) == contenido(await memoria.actualizar(propiedad_id, propiedad))
+        else:
+            propiedad_id = rnd.randint(1, CANTIDAD)
+            assert await postgres.eliminar(propiedad_id) == await memoria.eliminar(propiedad_id)
+            assert (await postgres.obtener(propiedad_id))["estado"] == "inactiva"
+    assert (await postgres.version())[0] > version
+
+    for propiedad_id in range(1, CANTIDAD + 1):
+        assert contenido(await postgres.obtener(propiedad_id)) == contenido(await memoria.obtener(propiedad_id))
+    for filtros in (FiltrosPropiedad(limite=100), FiltrosPropiedad(orden="precio-desc", operacion="venta")):
+        assert ids_de((await postgres.listar(filtros))[0]) == ids_de((await memoria.listar(filtros))[0])
+
+
+@pytest.mark.asyncio
+async def test_importar_crea_y_actualiza_por_clave_externa(repositorios):
+    postgres, _, agente_id = repositorios
+    lote = [
+        PropiedadImportada(**propiedad.model_dump(), clave_externa=f"portal-{i}").model_copy(
+            update={"agente_id": agente_id}
+        )
+        for i, propiedad in enumerate(generar_propiedades(5, semilla=16))
+    ]
+    creadas = await postgres.importar(lote)
+    assert [resultado["accion"] for resultado in creadas] == ["creada"] * 5
+
+    cambiadas = [
+        propiedad.model_copy(update={"precio": propiedad.precio + 1, "caracteristicas": ["Pileta"]})
+        for propiedad in lote
+    ]
+    ajena = lote[0].model_copy(update={"agente_id": 10 ** 6, "clave_externa": "otra"})
+    actualizadas = await postgres.importar([*cambiadas, ajena])
+    assert actualizadas[:5] == [{"id": resultado["id"], "accion": "actualizada"} for resultado in creadas]
+    assert actualizadas[5] == {"error": f"No existe el agente {10 ** 6}"}
+    for resultado, propiedad in zip(creadas, cambiadas):
+        guardada = await postgres.obtener(resultado["id"])
+        assert guardada["precio"] == propiedad.precio
+        assert guardada["caracteristicas"] == ["Pileta"]
+        assert guardada["imagenes"] == propiedad.imagenes
+
+
+@pytest.mark.asyncio
+async def test_facetas_igual_a_memoria(repositorios):
+    postgres, memoria, _ = repositorios
+    rnd = random.Random(17)
+    for _ in range(30):
+        filtros = filtros_al_azar(rnd)
+        assert await postgres.facetas(filtros) == await memoria.facetas(filtros), filtros
@@ -0,0 +1,81 @@
+import os
+import random
+
+import pytest
+
+from benchmarks.generador import AGENTE, generar_propiedades, generar_registros
+from catalogo import AlmacenPropiedades
+from catalogo.similitud import VENTANA_PRECIO, diferencia
+from models import PropiedadCreate
+from repositorios import RepositorioMemoria
+
+
+def similares_fuerza_bruta(almacen: AlmacenPropiedades, base: dict, limite: int) -> list:
+    """Toda la ventana de ±30% puntuada y ordenada por (puntaje, id)"""
+    precio = base["precio"]
+    candidatos = [
+        registro for registro in almacen
+        if registro["estado"] == "disponible" and registro["id"] != base["id"]
+        and registro["tipo"] == base["tipo"] and registro["operacion"] == base["operacion"]
+        and precio - precio * VENTANA_PRECIO <= registro["precio"] <= precio + precio * VENTANA_PRECIO
+    ]
+    candidatos.sort(key=lambda registro: (diferencia(base, registro), registro["id"]))
+    return [registro["id"] for registro in candidatos[:limite]]
+
+
+def test_similares_igual_a_fuerza_bruta():
+    almacen = AlmacenPropiedades(generar_registros(3000, semilla=7))
+    rnd = random.Random(7)
+    for base in rnd.sample(almacen.registros, 150):
+        for limite in (1, 4, 10):
+            obtenidos = [registro["id"] for registro in almacen.similares(base, limite)]
+            assert obtenidos == similares_fuerza_bruta(almacen, base, limite), base["id"]
+
+
+@pytest.mark.asyncio
+async def test_similares_puntua_toda_la_ventana():
+    """Un candidato lejos en precio pero igual en todo lo demás le gana a cientos más cercanos en precio"""
+    base = next(generar_propiedades(1, semilla=3))
+    cercanos = [
+        base.model_copy(update={
+            "precio": base.precio + i, "metros": base.metros * 5, "habitaciones": base.habitaciones + 3,
+            "coordenadas": base.coordenadas.model_copy(update={"lat": base.coordenadas.lat + 1})
+        })
+        for i in range(1, 400)
+    ]
+    parecido = base.model_copy(update={"precio": base.precio * 1.25})
+    repositorio = RepositorioMemoria([], AGENTE)
+    for propiedad in [base, *cercanos, parecido]:
+        await repositorio.crear(propiedad)
+    almacen = repositorio.almacen
+    registro_base = almacen.obtener(1)
+    assert almacen.similares(registro_base, 1)[0]["id"] == len(cercanos) + 2
+    assert [r["id"] for r in almacen.similares(registro_base, 5)] == similares_fuerza_bruta(almacen, registro_base, 5)
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif("TEST_DATABASE_URL" not in os.environ,
+                    reason="TEST_DATABASE_URL: base de prueba con db/schema.sql (se vacían sus propiedades)")
+async def test_similares_memoria_y_postgres_coinciden():
+    from repositorios.postgres import RepositorioPostgres
+
+    postgres = RepositorioPostgres(os.environ["TEST_DATABASE_URL"])
+    await postgres.iniciar()
+    try:
+        async with postgres._pool.acquire() as conexion:
+            await conexion.execute("TRUNCATE propiedades, estadisticas_propiedades RESTART IDENTITY CASCADE")
+            agente_id = await conexion.fetchval("SELECT id FROM usuarios ORDER BY id LIMIT 1")
+        memoria = RepositorioMemoria([], AGENTE)
+        for propiedad in generar_propiedades(1500, semilla=11):
+            propiedad = PropiedadCreate(**{**propiedad.model_dump(), "agente_id": agente_id})
+            await postgres.crear(propiedad)
+            await memoria.crear(propiedad)
+
+        for propiedad_id in random.Random(11).sample(range(1, 1501), 100):
+            base_memoria = await memoria.obtener(propiedad_id)
+            base_postgres = await postgres.obtener(propiedad_id)
+            en_memoria = [registro["id"] for registro in await memoria.similares(base_memoria, 10)]
+            en_postgres = [registro["id"] for registro in await postgres.similares(base_postgres, 10)]
+            assert en_memoria == en_postgres, propiedad_id
+    finally:
+        await postgres.cerrar()
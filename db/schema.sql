@@ -7,6 +7,7 @@
 -- Extensiones necesarias
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "postgis";
+CREATE EXTENSION IF NOT EXISTS "unaccent";
 
 -- Tabla de usuarios/agentes
 CREATE TABLE usuarios (
@@ -46,7 +47,9 @@ CREATE TABLE propiedades (
     agente_id INTEGER REFERENCES usuarios(id) ON DELETE SET NULL,
     fecha_publicacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    vistas INTEGER DEFAULT 0
+    vistas INTEGER DEFAULT 0,
+    busqueda TSVECTOR, -- Mantenido por actualizar_busqueda_propiedad()
+    clave_externa VARCHAR(100) -- Id de la publicación en el portal de origen (importaciones)
 );
 
 -- Tabla de características de propiedades
@@ -122,6 +125,23 @@ CREATE TABLE metricas_propiedades (
     UNIQUE(propiedad_id, fecha)
 );
 
+-- Totales de propiedades disponibles por tipo y operación, mantenidos por
+-- trigger para que las estadísticas generales no recorran propiedades
+CREATE TABLE estadisticas_propiedades (
+    tipo VARCHAR(20) NOT NULL,
+    operacion VARCHAR(20) NOT NULL,
+    cantidad INTEGER NOT NULL DEFAULT 0,
+    suma_precios DECIMAL(16,2) NOT NULL DEFAULT 0,
+    destacadas INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tipo, operacion)
+);
+
+-- Versión del catálogo: cualquier alta, baja o modificación de propiedades
+-- (no las vistas) la incrementa. Es el validador HTTP de los GET del catálogo.
+-- Una secuencia y no una fila: nextval no toma locks, así que las escrituras
+-- concurrentes no se encolan detrás de una sola fila
+CREATE SEQUENCE version_catalogo;
+
 -- Tabla de conversaciones del chatbot
 CREATE TABLE conversaciones_chatbot (
     id SERIAL PRIMARY KEY,
@@ -131,6 +151,7 @@ CREATE TABLE conversaciones_chatbot (
     intencion_detectada VARCHAR(50),
     confianza DECIMAL(3,2),
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    tiempo_respuesta REAL, -- segundos que tardó el backend en responder
     satisfaccion INTEGER CHECK (satisfaccion BETWEEN 1 AND 5)
 );
 
@@ -151,6 +172,10 @@ CREATE INDEX idx_propiedades_estado ON propiedades(estado);
 CREATE INDEX idx_propiedades_destacada ON propiedades(destacada) WHERE destacada = true;
 CREATE INDEX idx_propiedades_fecha_publicacion ON propiedades(fecha_publicacion DESC);
 CREATE INDEX idx_propiedades_coordenadas ON propiedades USING GIST(coordenadas);
+CREATE INDEX idx_propiedades_similares ON propiedades(tipo, operacion, precio) WHERE estado = 'disponible';
+CREATE INDEX idx_propiedades_busqueda ON propiedades USING GIN(busqueda);
+CREATE UNIQUE INDEX idx_propiedades_clave_externa ON propiedades(agente_id, clave_externa);
+CREATE INDEX idx_propiedades_fecha_actualizacion ON propiedades(fecha_actualizacion);
 
 CREATE INDEX idx_favoritos_usuario ON favoritos(usuario_id);
 CREATE INDEX idx_consultas_estado ON consultas(estado);
@@ -166,8 +191,11 @@ BEGIN
 END;
 $ language 'plpgsql';
 
+-- Sólo los cambios de contenido: volcar vistas no cambia la versión de la propiedad
 CREATE TRIGGER trigger_propiedades_fecha_actualizacion
-    BEFORE UPDATE ON propiedades
+    BEFORE UPDATE OF titulo, descripcion, precio, ubicacion, direccion, tipo, operacion,
+        habitaciones, banos, metros, metros_terreno, antiguedad, expensas, estado,
+        destacada, coordenadas, agente_id ON propiedades
     FOR EACH ROW
     EXECUTE PROCEDURE actualizar_fecha_modificacion();
 
@@ -176,6 +204,61 @@ CREATE TRIGGER trigger_usuarios_fecha_actualizacion
     FOR EACH ROW
     EXECUTE PROCEDURE actualizar_fecha_modificacion();
 
+-- Trigger para mantener estadisticas_propiedades: resta el aporte anterior
+-- de la fila y suma el nuevo, así los cambios de estado se reflejan solos
+CREATE OR REPLACE FUNCTION actualizar_estadisticas_propiedades()
+RETURNS TRIGGER AS $
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.estado = 'disponible' THEN
+        UPDATE estadisticas_propiedades
+        SET cantidad = cantidad - 1,
+            suma_precios = suma_precios - OLD.precio,
+            destacadas = destacadas - CASE WHEN OLD.destacada THEN 1 ELSE 0 END
+        WHERE tipo = OLD.tipo AND operacion = OLD.operacion;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.estado = 'disponible' THEN
+        INSERT INTO estadisticas_propiedades (tipo, operacion, cantidad, suma_precios, destacadas)
+        VALUES (NEW.tipo, NEW.operacion, 1, NEW.precio, CASE WHEN NEW.destacada THEN 1 ELSE 0 END)
+        ON CONFLICT (tipo, operacion) DO UPDATE
+        SET cantidad = estadisticas_propiedades.cantidad + 1,
+            suma_precios = estadisticas_propiedades.suma_precios + EXCLUDED.suma_precios,
+            destacadas = estadisticas_propiedades.destacadas + EXCLUDED.destacadas;
+    END IF;
+    RETURN NULL;
+END;
+$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_propiedades_estadisticas
+    AFTER INSERT OR DELETE OR UPDATE OF estado, tipo, operacion, precio, destacada ON propiedades
+    FOR EACH ROW
+    EXECUTE PROCEDURE actualizar_estadisticas_propiedades();
+
+-- Trigger para incrementar version_catalogo al confirmar la transacción. Si
+-- se incrementara al escribir, una lectura en el medio vería la versión nueva
+-- con los datos viejos y los guardaría con esa versión; diferido, la ventana
+-- queda reducida al commit. Los triggers diferidos son por fila: la marca
+-- local a la transacción hace que la secuencia avance una sola vez
+CREATE OR REPLACE FUNCTION incrementar_version_catalogo()
+RETURNS TRIGGER AS $
+BEGIN
+    IF current_setting('inmomax.version_incrementada', true) IS DISTINCT FROM 'si' THEN
+        PERFORM nextval('version_catalogo');
+        PERFORM set_config('inmomax.version_incrementada', 'si', true);
+    END IF;
+    RETURN NULL;
+END;
+$ LANGUAGE plpgsql;
+
+-- Las tablas hijas no se escriben sin tocar la propiedad en la misma
+-- transacción (alta, edición e importación), así que alcanza con ésta
+CREATE CONSTRAINT TRIGGER trigger_propiedades_version
+    AFTER INSERT OR DELETE OR UPDATE OF titulo, descripcion, precio, ubicacion, direccion,
+        tipo, operacion, habitaciones, banos, metros, metros_terreno, antiguedad, expensas,
+        estado, destacada, coordenadas, agente_id ON propiedades
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    EXECUTE PROCEDURE incrementar_version_catalogo();
+
 -- Función para incrementar vistas
 CREATE OR REPLACE FUNCTION incrementar_vistas(propiedad_id_param INTEGER)
 RETURNS VOID AS $
@@ -192,6 +275,23 @@ BEGIN
 END;
 $ LANGUAGE plpgsql;
 
+-- Función para recalcular el vector de búsqueda de una propiedad (se llama
+-- al crearla o modificarla, después de guardar sus características)
+CREATE OR REPLACE FUNCTION actualizar_busqueda_propiedad(propiedad_id_param INTEGER)
+RETURNS VOID AS $
+BEGIN
+    UPDATE propiedades p
+    SET busqueda =
+        setweight(to_tsvector('spanish', unaccent(p.titulo)), 'A') ||
+        setweight(to_tsvector('spanish', unaccent(p.ubicacion)), 'B') ||
+        setweight(to_tsvector('spanish', unaccent(COALESCE(
+            (SELECT string_agg(cp.caracteristica, ' ') FROM caracteristicas_propiedad cp
+             WHERE cp.propiedad_id = p.id), ''))), 'B') ||
+        setweight(to_tsvector('spanish', unaccent(p.descripcion)), 'C')
+    WHERE p.id = propiedad_id_param;
+END;
+$ LANGUAGE plpgsql;
+
 -- Función para búsqueda full-text
 CREATE OR REPLACE FUNCTION buscar_propiedades(termino TEXT)
 RETURNS TABLE(
@@ -214,14 +314,10 @@ BEGIN
         p.ubicacion,
         p.tipo,
         p.operacion,
-        ts_rank(
-            to_tsvector('spanish', p.titulo || ' ' || p.descripcion || ' ' || p.ubicacion),
-            plainto_tsquery('spanish', termino)
-        ) as ranking
+        ts_rank(p.busqueda, plainto_tsquery('spanish', unaccent(termino))) as ranking
     FROM propiedades p
     WHERE p.estado = 'disponible'
-    AND to_tsvector('spanish', p.titulo || ' ' || p.descripcion || ' ' || p.ubicacion) 
-        @@ plainto_tsquery('spanish', termino)
+    AND p.busqueda @@ plainto_tsquery('spanish', unaccent(termino))
     ORDER BY ranking DESC;
 END;
 $ LANGUAGE plpgsql;
@@ -359,6 +455,9 @@ INSERT INTO imagenes_propiedad (propiedad_id, url, orden, descripcion) VALUES
 (3, '/images/casa2-1.jpg', 1, 'Frente con jardín'),
 (3, '/images/casa2-2.jpg', 2, 'Patio trasero');
 
+-- Calcular el vector de búsqueda de las propiedades de ejemplo
+SELECT actualizar_busqueda_propiedad(id) FROM propiedades;
+
 -- Comentarios útiles para el desarrollo
 /*
 -- Para conectarse a la base de datos:
@@ -29,6 +29,10 @@ export default function PropiedadCard({ propiedad }) {
             <div className="relative h-48 overflow-hidden">
             <img 
                 src={imagenError ? '/images/placeholder.jpg' : (propiedad.imagen || '/images/placeholder.jpg')}
+                srcSet={!imagenError && propiedad.imagen_tamanos
+                    ? `${propiedad.imagen_tamanos.chica} 320w, ${propiedad.imagen_tamanos.mediana} 640w`
+                    : undefined}
+                sizes="(max-width: 640px) 100vw, 400px"
                 alt={propiedad.titulo}
                 className="w-full h-full object-cover transition-transform duration-300 hover:scale-110"
                 onError={() => setImagenError(true)}
@@ -21,7 +21,7 @@ export default function Home() {
 
     const fetchFeaturedProperties = async () => {
         try {
-        const response = await fetch('/api/propiedades?featured=true&limit=6');
+        const response = await fetch('/api/propiedades?featured=true&limit=6&campos=resumen');
         const data = await response.json();
         setPropiedadesFeatured(data);
         } catch (error) {
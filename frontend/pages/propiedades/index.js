@@ -44,7 +44,8 @@ export default function Propiedades() {
         const query = new URLSearchParams({
             ...filtrosActuales,
             pagina: paginaActual,
-            limite: propiedadesPorPagina
+            limite: propiedadesPorPagina,
+            campos: 'resumen'
         }).toString();
         
         const response = await fetch(`/api/propiedades?${query}`);